@@ -0,0 +1,242 @@
+"""
+Benchmark suite for preprocess_markdown() and the conversion pipeline
+
+Times three stages separately on synthetic documents of increasing size:
+
+- preprocess: preprocess_markdown() alone
+- pandoc: the pandoc conversion of already preprocessed markdown
+- request: the full POST /convert/text request path (result cache disabled)
+
+For every stage and size the best wall time, the throughput and the peak
+Python memory (tracemalloc) are recorded and compared with a stored
+baseline. The run fails when a stage gets slower or uses more memory than
+the baseline allows.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --update-baseline
+    python -m benchmarks.bench_pipeline --stages preprocess --sizes 1KB,1MB,50MB
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Measure real work: no cached results, no time limits
+os.environ.setdefault("RESULT_CACHE_MEMORY_BYTES", "0")
+os.environ.setdefault("RESULT_CACHE_DISK_BYTES", "0")
+os.environ.setdefault("PANDOC_TIMEOUT", "3600")
+os.environ.setdefault("PREPROCESS_TIME_BUDGET", "0")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.documents import format_size, generate_document, parse_size
+from utils import DOCX_DIR, convert_markdown_to_docx_bytes, pandoc_registry, preprocess_markdown
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+STAGES = ["preprocess", "pandoc", "request"]
+DEFAULT_SIZES = "1KB,10KB,100KB,1MB,10MB,50MB"
+
+# Timings this short are dominated by noise and never count as regressions
+MIN_COMPARED_SECONDS = 0.005
+
+
+def measure(run, repeat: int) -> dict:
+    """
+    Measure a benchmark callable
+    
+    The first call runs under tracemalloc to record the peak Python memory
+    (and warms up caches); the following `repeat` calls are timed.
+    
+    Args:
+        run: Callable performing one iteration
+        repeat: Number of timed iterations
+    
+    Returns:
+        Best wall time in seconds and peak traced memory in bytes
+    """
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def bench_preprocess(markdown: str):
+    def run():
+        preprocess_markdown(markdown)
+    return run
+
+
+def bench_pandoc(markdown: str):
+    processed = preprocess_markdown(markdown)
+    
+    def run():
+        if asyncio.run(convert_markdown_to_docx_bytes(processed)) is None:
+            raise RuntimeError("pandoc conversion failed")
+    return run
+
+
+def bench_request(markdown: str, client):
+    def run():
+        response = client.post("/convert/text", json={"markdown": markdown, "filename": "benchmark"})
+        if response.status_code != 200:
+            raise RuntimeError(f"request failed: {response.status_code} {response.text}")
+        (DOCX_DIR / response.json()["filename"]).unlink(missing_ok=True)
+    return run
+
+
+def run_benchmarks(sizes, stages, repeat: int, pandoc_max_size: int) -> dict:
+    """
+    Run the selected stages for every document size
+    
+    Returns:
+        Mapping of "stage:size" to the measured metrics
+    """
+    client = None
+    if "request" in stages:
+        from fastapi.testclient import TestClient
+        from main import app
+        client = TestClient(app)
+    
+    results = {}
+    for size in sizes:
+        markdown = generate_document(size)
+        length = len(markdown.encode("utf-8"))
+        for stage in stages:
+            if stage != "preprocess" and size > pandoc_max_size:
+                continue
+            if stage == "preprocess":
+                run = bench_preprocess(markdown)
+            elif stage == "pandoc":
+                run = bench_pandoc(markdown)
+            else:
+                run = bench_request(markdown, client)
+            
+            metrics = measure(run, repeat)
+            metrics["bytes"] = length
+            metrics["mb_per_s"] = length / (1024 * 1024) / metrics["seconds"] if metrics["seconds"] else 0.0
+            key = f"{stage}:{format_size(size)}"
+            results[key] = metrics
+            print(
+                f"{key:<20} {metrics['seconds'] * 1000:>12.2f} ms "
+                f"{metrics['mb_per_s']:>10.2f} MB/s "
+                f"{metrics['peak_bytes'] / (1024 * 1024):>10.2f} MB peak"
+            )
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare results with a baseline
+    
+    Args:
+        results: Output of run_benchmarks()
+        baseline: Previously stored results
+        threshold: Allowed relative slowdown / memory growth (0.25 = 25%)
+    
+    Returns:
+        Descriptions of every regression found
+    """
+    regressions = []
+    for key, metrics in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        
+        seconds, base_seconds = metrics["seconds"], reference["seconds"]
+        if seconds >= MIN_COMPARED_SECONDS and seconds > base_seconds * (1 + threshold):
+            regressions.append(
+                f"{key}: {seconds * 1000:.2f} ms vs baseline {base_seconds * 1000:.2f} ms "
+                f"(+{(seconds / base_seconds - 1) * 100:.0f}%)"
+            )
+        
+        peak, base_peak = metrics["peak_bytes"], reference["peak_bytes"]
+        if peak > base_peak * (1 + threshold) and peak - base_peak > 1024 * 1024:
+            regressions.append(
+                f"{key}: peak memory {peak / (1024 * 1024):.2f} MB vs baseline "
+                f"{base_peak / (1024 * 1024):.2f} MB"
+            )
+    return regressions
+
+
+def environment() -> dict:
+    """Describe the machine the numbers were taken on"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandoc": pandoc_registry.info.version
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the markdown to DOCX pipeline")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma separated document sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma separated stages to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed iterations per benchmark (best is kept)")
+    parser.add_argument("--pandoc-max-size", default="1MB", help="Largest document run through pandoc (pandoc and request stages)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression (default: 0.25)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    args = parser.parse_args(argv)
+    
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    stages = [stage.strip() for stage in args.stages.split(",")]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    if stages != ["preprocess"] and not pandoc_registry.info.installed:
+        print("Pandoc is not installed; only the preprocess stage can run")
+        stages = [stage for stage in stages if stage == "preprocess"]
+    
+    results = run_benchmarks(sizes, stages, args.repeat, parse_size(args.pandoc_max_size))
+    
+    if args.update_baseline:
+        stored = {}
+        if args.baseline.exists():
+            stored = json.loads(args.baseline.read_text()).get("results", {})
+        stored.update(results)
+        args.baseline.write_text(json.dumps(
+            {"environment": environment(), "results": stored},
+            indent=2,
+            sort_keys=True
+        ) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("environment") != environment():
+        print(f"\nNote: baseline was recorded on {baseline.get('environment')}")
+    
+    regressions = compare(results, baseline.get("results", {}), args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) past {args.threshold * 100:.0f}%:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+    
+    print(f"\n✅ No regressions past {args.threshold * 100:.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
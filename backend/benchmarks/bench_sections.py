@@ -0,0 +1,89 @@
+"""
+Benchmark of section-parallel conversion for very large documents
+
+Converts the same preprocessed synthetic document twice and compares the
+wall time:
+
+- single: one pandoc conversion of the whole document
+- sections: split at top-level headings, sections converted concurrently
+  and merged into one DOCX
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_sections
+    python -m benchmarks.bench_sections --sizes 1MB,4MB --parts 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Measure real work: no cached results, no time limits
+os.environ.setdefault("RESULT_CACHE_MEMORY_BYTES", "0")
+os.environ.setdefault("RESULT_CACHE_DISK_BYTES", "0")
+os.environ.setdefault("PANDOC_TIMEOUT", "3600")
+os.environ.setdefault("PREPROCESS_TIME_BUDGET", "0")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.documents import format_size, generate_document, parse_size
+from utils import (
+    convert_markdown_sections_to_docx,
+    convert_markdown_to_docx_bytes,
+    pandoc_registry,
+    preprocess_markdown,
+    split_markdown_sections
+)
+from utils.config import SECTION_PARALLEL_MAX_PARTS
+
+DEFAULT_SIZES = "512KB,2MB"
+
+
+def best_time(convert, repeat: int) -> float:
+    """
+    Best wall time of an async conversion over `repeat` runs
+    
+    Raises:
+        RuntimeError: If a conversion fails
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if asyncio.run(convert()) is None:
+            raise RuntimeError("conversion failed")
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark section-parallel DOCX conversion")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma separated document sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--parts", type=int, default=SECTION_PARALLEL_MAX_PARTS, help="Maximum number of sections converted at once")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed iterations per benchmark (best is kept)")
+    args = parser.parse_args(argv)
+    
+    if not pandoc_registry.info.installed:
+        print("Pandoc is not installed")
+        return 1
+    
+    print(f"{'size':<10} {'parts':>5} {'single':>12} {'sections':>12} {'speedup':>8}")
+    for size in [parse_size(size) for size in args.sizes.split(",")]:
+        processed = preprocess_markdown(generate_document(size))
+        parts = len(split_markdown_sections(processed, args.parts))
+        
+        single = best_time(lambda: convert_markdown_to_docx_bytes(processed), args.repeat)
+        sections = best_time(
+            lambda: convert_markdown_sections_to_docx(processed, parts=args.parts),
+            args.repeat
+        )
+        print(
+            f"{format_size(size):<10} {parts:>5} {single:>11.2f}s {sections:>11.2f}s "
+            f"{single / sections:>7.2f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Synthetic ChatGPT-style markdown documents for benchmarks
+"""
+import random
+import re
+
+# Building blocks that together cover every notation fix_latex_formulas()
+# handles, mixed with the prose, tables, lists and code fences ChatGPT
+# answers usually contain
+_PROSE = [
+    "For a periodic function \\( f(t) \\) with period \\( T \\), we can represent it using a Fourier series.",
+    "The exponential coefficients \\( c_n \\) relate to the trigonometric coefficients ( a_n ) and ( b_n ).",
+    "Normal parentheses (like this) and links [see docs](https://pandoc.org) are left alone.",
+    "With the learning rate ( \\alpha = 0.01 ) the loss decreases steadily over ( n ) epochs.",
+    "The variance [\\sigma^2] measures how far the samples spread from the mean [\\mu].",
+    "This sentence has **bold**, *italic* and `inline code` but no formula at all.",
+]
+
+_LATEX_BLOCKS = [
+    "\\[\nf(t) = a_0 + \\sum_{n=1}^{\\infty} \\left[ a_n \\cos(n\\omega_0 t) + b_n \\sin(n\\omega_0 t) \\right]\n\\]",
+    "\\[\na_n = \\frac{2}{T} \\int_{T} f(t)\\cos(n\\omega_0 t)\\, dt\n\\]",
+    "\\[ c_n = \\frac{1}{T} \\int_{T} f(t) e^{-j n \\omega_0 t}\\, dt \\]",
+]
+
+_LEGACY_BLOCKS = [
+    "[\n\\text{Energy} = \\frac{1}{T} \\int_{T} |f(t)|^2\\, dt\n]",
+    "[ a_0 = \\frac{1}{T} \\int_{T} f(t), dt ]",
+    "[ not a formula, just brackets ]",
+]
+
+_TABLE = """| Quantity | Symbol | Formula |
+|----------|--------|---------|
+| Mean | ( \\mu ) | \\( \\frac{1}{n} \\sum x_i \\) |
+| Variance | [\\sigma^2] | ( \\frac{1}{n} \\sum (x_i - \\mu)^2 ) |
+| Frequency | \\( \\omega_0 \\) | \\( \\frac{2\\pi}{T} \\) |"""
+
+_CODE = """```python
+def fourier_coefficient(f, n, T, steps=1000):
+    # (x) and [y] inside code look like formulas to the preprocessor
+    dt = T / steps
+    return sum(f(k * dt) * cmath.exp(-1j * n * k * dt) for k in range(steps)) / steps
+```"""
+
+_LIST = """- LaTeX style: \\( inline \\) and \\[ block \\]
+- Legacy style: ( inline = equation ) and [ block ]
+- Nested brackets: \\( \\left[ x \\right] \\) stay intact"""
+
+
+def _section(rng: random.Random, index: int) -> str:
+    """Build one section of a synthetic answer"""
+    parts = [f"## Section {index}"]
+    for _ in range(rng.randint(2, 4)):
+        parts.append(" ".join(rng.choice(_PROSE) for _ in range(rng.randint(1, 3))))
+        block = rng.random()
+        if block < 0.35:
+            parts.append(rng.choice(_LATEX_BLOCKS))
+        elif block < 0.55:
+            parts.append(rng.choice(_LEGACY_BLOCKS))
+        elif block < 0.7:
+            parts.append(_TABLE)
+        elif block < 0.85:
+            parts.append(_CODE)
+        else:
+            parts.append(_LIST)
+    return "\n\n".join(parts)
+
+
+def generate_document(size: int, seed: int = 0) -> str:
+    """
+    Generate a deterministic ChatGPT-style markdown document
+    
+    Args:
+        size: Approximate size of the document in bytes
+        seed: Seed for the random choice of building blocks
+    
+    Returns:
+        Markdown text of at least `size` bytes (UTF-8 encoded)
+    """
+    rng = random.Random(seed)
+    sections = ["# Synthetic Benchmark Document"]
+    length = len(sections[0])
+    index = 1
+    while length < size:
+        section = _section(rng, index)
+        sections.append(section)
+        length += len(section.encode("utf-8")) + 2
+        index += 1
+    return "\n\n".join(sections) + "\n"
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a human readable size such as "1KB", "10MB" or "512"
+    
+    Args:
+        value: Size with an optional B/KB/MB/GB suffix
+    
+    Returns:
+        Size in bytes
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*', value.upper())
+    if match is None:
+        raise ValueError(f"Invalid size: {value}")
+    number, unit = match.groups()
+    multiplier = {"": 1, "B": 1, "K": 1024, "KB": 1024, "M": 1024 ** 2, "MB": 1024 ** 2,
+                  "G": 1024 ** 3, "GB": 1024 ** 3}[unit]
+    return int(float(number) * multiplier)
+
+
+def format_size(size: int) -> str:
+    """Format a byte count the way parse_size() reads it"""
+    for unit, multiplier in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024)):
+        if size >= multiplier and size % multiplier == 0:
+            return f"{size // multiplier}{unit}"
+    return f"{size}B"
@@ -0,0 +1,353 @@
+"""
+End-to-end HTTP load test for the conversion API
+
+Starts the `main:app` FastAPI app with uvicorn (or targets a running
+server with --url) and drives /convert/text, /convert/upload and
+/download/{filename} concurrently. Requests arrive open-loop at a fixed
+average rate (Poisson arrivals), so a slow server builds up a backlog
+instead of silently lowering the offered load.
+
+Reports p50/p95/p99 latency, throughput and error rate per endpoint, plus
+the number of pandoc processes running on the machine while the test ran.
+
+Usage (from the backend directory):
+    python -m benchmarks.loadtest --rate 5 --duration 30
+    python -m benchmarks.loadtest --workers 4 --rate 20 --mix 1KB:80,100KB:20
+    python -m benchmarks.loadtest --url http://localhost:8000 --endpoints text:100
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.documents import generate_document, parse_size
+
+
+def parse_weights(value: str) -> list:
+    """
+    Parse a weighted mix such as "1KB:70,100KB:30"
+    
+    Returns:
+        List of (name, weight) tuples
+    """
+    mix = []
+    for item in value.split(","):
+        name, _, weight = item.partition(":")
+        mix.append((name.strip(), float(weight) if weight else 1.0))
+    return mix
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0.0 if empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def count_pandoc_processes() -> int:
+    """Count running pandoc processes by scanning /proc (-1 if unavailable)"""
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return -1
+    count = 0
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            if (entry / "comm").read_text().strip() == "pandoc":
+                count += 1
+        except OSError:
+            continue
+    return count
+
+
+class ProcessSampler(threading.Thread):
+    """Samples the pandoc process count at a fixed interval"""
+    
+    def __init__(self, interval: float = 0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        while not self._stop_event.is_set():
+            count = count_pandoc_processes()
+            if count >= 0:
+                self.samples.append(count)
+            self._stop_event.wait(self.interval)
+    
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class LoadTest:
+    """
+    Open-loop load generator
+    
+    Every arrival converts one document through the chosen endpoint and,
+    when that succeeds, downloads the result (unless `stream` asks for the
+    DOCX in the conversion response). Each step is recorded as a
+    separate operation ("text", "upload", "download"). Conversion latency
+    is measured from the scheduled arrival, so time spent waiting for a
+    free client thread counts against the server.
+    """
+    
+    def __init__(self, base_url: str, size_mix: list, endpoint_mix: list,
+                 unique_documents: bool = True, keep_files: bool = False, stream: bool = False,
+                 seed: int = 0):
+        self.base_url = base_url.rstrip("/")
+        self.size_mix = size_mix
+        self.endpoint_mix = endpoint_mix
+        self.unique_documents = unique_documents
+        self.keep_files = keep_files
+        self.stream = stream
+        self.rng = random.Random(seed)
+        
+        # One document per size; a per-request marker defeats the result cache
+        self.documents = {name: generate_document(parse_size(name), seed) for name, _ in size_mix}
+        
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.counter = 0
+        self.local = threading.local()
+    
+    def _session(self) -> requests.Session:
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        return session
+    
+    def _record(self, operation: str, latency: float, ok: bool) -> None:
+        with self.lock:
+            self.latencies.setdefault(operation, [])
+            self.errors.setdefault(operation, 0)
+            if ok:
+                self.latencies[operation].append(latency)
+            else:
+                self.errors[operation] += 1
+    
+    def _timed(self, operation: str, method: str, url: str, start: float = None, **kwargs):
+        if start is None:
+            start = time.perf_counter()
+        try:
+            response = self._session().request(method, url, timeout=300, **kwargs)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            response, ok = None, False
+        self._record(operation, time.perf_counter() - start, ok)
+        return response if ok else None
+    
+    def one_request(self, size_name: str, endpoint: str, arrival: float) -> None:
+        markdown = self.documents[size_name]
+        with self.lock:
+            self.counter += 1
+            number = self.counter
+        if self.unique_documents:
+            markdown = f"{markdown}\n<!-- load test request {number} -->\n"
+        
+        params = {"stream": "true"} if self.stream else None
+        if endpoint == "upload":
+            response = self._timed(
+                "upload", "POST", f"{self.base_url}/convert/upload", start=arrival, params=params,
+                files={"file": (f"loadtest_{number}.md", markdown.encode("utf-8"), "text/markdown")}
+            )
+        else:
+            response = self._timed(
+                "text", "POST", f"{self.base_url}/convert/text", start=arrival, params=params,
+                json={"markdown": markdown, "filename": f"loadtest_{number}"}
+            )
+        if response is None or self.stream:
+            return
+        
+        result = response.json()
+        self._timed("download", "GET", f"{self.base_url}{result['download_url']}")
+        
+        if not self.keep_files:
+            try:
+                stem = result["filename"].rsplit(".", 1)[0]
+                self._session().delete(f"{self.base_url}/cleanup/{stem}", timeout=30)
+            except requests.RequestException:
+                pass
+    
+    def _pick(self, mix: list) -> str:
+        names = [name for name, _ in mix]
+        weights = [weight for _, weight in mix]
+        return self.rng.choices(names, weights)[0]
+    
+    def run(self, rate: float, duration: float, max_in_flight: int) -> float:
+        """
+        Offer `rate` requests per second for `duration` seconds
+        
+        Returns:
+            Wall time until every request finished
+        """
+        start = time.perf_counter()
+        next_arrival = start
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            while next_arrival - start < duration:
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(
+                    self.one_request,
+                    self._pick(self.size_mix),
+                    self._pick(self.endpoint_mix),
+                    next_arrival
+                )
+                next_arrival += self.rng.expovariate(rate)
+        return time.perf_counter() - start
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    """Start uvicorn with main:app and wait until /health answers"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 60 seconds")
+
+
+def summarize(test: LoadTest, elapsed: float, samples: list) -> dict:
+    """Build the report printed at the end of a run"""
+    report = {"elapsed_seconds": elapsed, "operations": {}}
+    for operation in sorted(set(test.latencies) | set(test.errors)):
+        latencies = test.latencies.get(operation, [])
+        errors = test.errors.get(operation, 0)
+        total = len(latencies) + errors
+        report["operations"][operation] = {
+            "requests": total,
+            "errors": errors,
+            "error_rate": errors / total if total else 0.0,
+            "throughput_per_s": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": max(latencies) * 1000 if latencies else 0.0
+        }
+    report["pandoc_processes"] = {
+        "max": max(samples) if samples else None,
+        "mean": sum(samples) / len(samples) if samples else None
+    }
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"\nCompleted in {report['elapsed_seconds']:.1f}s\n")
+    print(f"{'operation':<10} {'requests':>8} {'errors':>7} {'err %':>6} {'req/s':>7} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for operation, stats in report["operations"].items():
+        print(
+            f"{operation:<10} {stats['requests']:>8} {stats['errors']:>7} "
+            f"{stats['error_rate'] * 100:>6.1f} {stats['throughput_per_s']:>7.2f} "
+            f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}"
+        )
+    processes = report["pandoc_processes"]
+    if processes["max"] is None:
+        print("\nPandoc processes: not available (no /proc)")
+    else:
+        print(f"\nPandoc processes: max {processes['max']}, mean {processes['mean']:.2f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the conversion API")
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes to start")
+    parser.add_argument("--rate", type=float, default=2.0, help="Average arrivals per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to keep offering load")
+    parser.add_argument("--mix", default="1KB:70,10KB:25,100KB:5", help="Document size mix (size:weight,...)")
+    parser.add_argument("--endpoints", default="text:50,upload:50", help="Endpoint mix (text/upload:weight,...)")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Client threads sending requests concurrently")
+    parser.add_argument("--repeat-documents", action="store_true", help="Send identical documents so the result cache can hit")
+    parser.add_argument("--stream", action="store_true", help="Receive the DOCX in the convert response (no download call)")
+    parser.add_argument("--keep-files", action="store_true", help="Do not delete converted files after downloading")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for arrivals and document mix")
+    parser.add_argument("--json", type=Path, help="Also write the report to this file")
+    args = parser.parse_args(argv)
+    
+    endpoint_mix = parse_weights(args.endpoints)
+    unknown = {name for name, _ in endpoint_mix} - {"text", "upload"}
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    
+    server = None
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        print(f"Starting uvicorn main:app on port {port} with {args.workers} worker(s)...")
+        server = start_server(port, args.workers)
+        base_url = f"http://127.0.0.1:{port}"
+    
+    sampler = ProcessSampler()
+    try:
+        test = LoadTest(
+            base_url,
+            parse_weights(args.mix),
+            endpoint_mix,
+            unique_documents=not args.repeat_documents,
+            keep_files=args.keep_files,
+            stream=args.stream,
+            seed=args.seed
+        )
+        print(f"Offering {args.rate} req/s for {args.duration}s against {base_url}...")
+        sampler.start()
+        elapsed = test.run(args.rate, args.duration, args.max_in_flight)
+    finally:
+        if sampler.is_alive():
+            sampler.stop()
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+    
+    report = summarize(test, elapsed, sampler.samples)
+    report["config"] = {
+        "rate": args.rate,
+        "duration": args.duration,
+        "workers": args.workers if args.url is None else None,
+        "mix": args.mix,
+        "endpoints": args.endpoints,
+        "stream": args.stream,
+        "cpu_count": os.cpu_count()
+    }
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
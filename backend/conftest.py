@@ -0,0 +1,13 @@
+"""
+Pytest configuration shared by the test scripts
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+# Conversions made by the tests must not fill the real result cache; this
+# runs before any test module imports utils.config
+_cache_dir = tempfile.mkdtemp(prefix="mdtodocx-test-cache-")
+os.environ["RESULT_CACHE_DIR"] = _cache_dir
+atexit.register(shutil.rmtree, _cache_dir, True)
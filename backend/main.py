@@ -1,11 +1,34 @@
 """
 Markdown to DOCX Converter API - Main Application
 """
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 
-from utils import check_pandoc_installed, ALLOWED_ORIGINS
-from web.routes import conversion_router
+from utils import (
+    admission_controller,
+    conversion_flights,
+    metrics_registry,
+    pandoc_registry,
+    pandoc_scheduler,
+    pandoc_server_backend,
+    pandoc_warm_pool,
+    job_manager,
+    preprocess_pool,
+    result_cache,
+    template_registry,
+    upload_janitor,
+    ALLOWED_ORIGINS,
+    BATCH_MAX_BYTES,
+    MAX_DECOMPRESSED_BYTES,
+    MAX_UPLOAD_BYTES,
+    METRICS_CONTENT_TYPE,
+    TEMPLATE_MAX_BYTES
+)
+from web.middleware import BodySizeLimitMiddleware, RequestDecompressionMiddleware
+from web.routes import conversion_router, jobs_router, templates_router
 
 
 # Initialize FastAPI app
@@ -15,6 +38,26 @@ app = FastAPI(
     version="2.0.0"
 )
 
+# Reject oversized request bodies before they are buffered
+# (added first so CORS headers are still applied to the 413 response)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits=[
+        ("/convert/batch", BATCH_MAX_BYTES),
+        ("/convert/", MAX_UPLOAD_BYTES),
+        ("/jobs", MAX_UPLOAD_BYTES),
+        ("/templates/", TEMPLATE_MAX_BYTES)
+    ]
+)
+
+# Decompress gzip/deflate request bodies as they stream in
+# (outside the size limits, so those count decompressed bytes)
+app.add_middleware(
+    RequestDecompressionMiddleware,
+    prefixes=["/convert/", "/jobs"],
+    max_bytes=MAX_DECOMPRESSED_BYTES
+)
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -26,14 +69,36 @@ app.add_middleware(
 
 # Include routers
 app.include_router(conversion_router)
+app.include_router(jobs_router)
+app.include_router(templates_router)
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Check if pandoc is installed on startup"""
-    if not check_pandoc_installed():
+    """Probe pandoc once on startup and start the background tasks"""
+    info = await pandoc_registry.refresh_async()
+    if not info.installed:
         print("WARNING: Pandoc is not installed or not in PATH!")
         print("Please install pandoc: https://pandoc.org/installing.html")
+    pandoc_registry.start()
+    await pandoc_server_backend.start()
+    # Templates first, so the warm pool also starts processes for them
+    await asyncio.to_thread(template_registry.load)
+    pandoc_warm_pool.start()
+    preprocess_pool.start()
+    upload_janitor.start()
+    job_manager.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks"""
+    await pandoc_registry.stop()
+    await pandoc_server_backend.stop()
+    await pandoc_warm_pool.stop()
+    await upload_janitor.stop()
+    await job_manager.stop()
+    await preprocess_pool.stop()
 
 
 @app.get("/")
@@ -46,14 +111,24 @@ async def root():
             "Convert markdown text to DOCX",
             "Upload markdown files and convert to DOCX",
             "Automatic LaTeX formula conversion",
-            "Support for both inline ($formula$) and block ($$formula$$) math"
+            "Support for both inline ($formula$) and block ($$formula$$) math",
+            "Branded output with reference DOCX templates"
         ],
         "endpoints": {
             "POST /convert/text": "Convert markdown text to DOCX",
+            "POST /convert/markdown": "Convert a raw text/markdown request body to DOCX",
             "POST /convert/upload": "Upload markdown file and convert to DOCX",
+            "POST /convert/batch": "Convert many documents and download a ZIP",
+            "POST /jobs": "Queue a conversion and return a job id",
+            "GET /jobs/{job_id}": "Conversion job status",
+            "GET /templates": "List reference DOCX templates",
+            "PUT /templates/{name}": "Register a reference DOCX template",
+            "DELETE /templates/{name}": "Delete a reference DOCX template",
             "GET /download/{filename}": "Download converted DOCX file",
             "DELETE /cleanup/{filename}": "Delete converted files",
-            "GET /health": "Health check endpoint"
+            "GET /health": "Health check endpoint",
+            "GET /stats": "Runtime statistics (admission, priority lanes, result cache, single flight, pandoc backend, preprocessing, janitor, jobs)",
+            "GET /metrics": "Prometheus metrics (stage timings, failures, running pandoc processes)"
         }
     }
 
@@ -61,13 +136,38 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    pandoc_installed = check_pandoc_installed()
+    info = pandoc_registry.info
+    return {
+        "status": "healthy" if info.installed else "unhealthy",
+        "pandoc_installed": info.installed,
+        "pandoc_version": info.version,
+        "pandoc_features": info.features,
+        "pandoc_checked_at": info.checked_at
+    }
+
+
+@app.get("/stats")
+async def stats():
+    """Runtime statistics used to size caches and pools"""
     return {
-        "status": "healthy" if pandoc_installed else "unhealthy",
-        "pandoc_installed": pandoc_installed
+        "admission": admission_controller.stats(),
+        "scheduler": pandoc_scheduler.stats(),
+        "result_cache": result_cache.stats(),
+        "single_flight": conversion_flights.stats(),
+        "pandoc": pandoc_server_backend.stats(),
+        "pandoc_warm_pool": pandoc_warm_pool.stats(),
+        "preprocess": preprocess_pool.stats(),
+        "janitor": upload_janitor.stats(),
+        "jobs": job_manager.stats()
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Stage timings, failure counters and pandoc gauges in the Prometheus text format"""
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
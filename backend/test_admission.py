@@ -0,0 +1,150 @@
+"""
+Test script for admission control of the conversion endpoints
+"""
+import asyncio
+import uuid
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils import LANE_BULK, LANE_INTERACTIVE, AdmissionController, AdmissionRejected, check_pandoc_installed
+from web.routes import conversion
+
+
+def test_queue_and_rejections():
+    """Requests beyond the slots wait; a full queue or a long wait is rejected"""
+    controller = AdmissionController(max_active=1, max_queue=1, max_wait=0.2, reserved={})
+
+    async def run():
+        await controller.acquire(LANE_INTERACTIVE)
+        waiter = asyncio.create_task(controller.acquire(LANE_INTERACTIVE))
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+
+        try:
+            await controller.acquire(LANE_INTERACTIVE)
+            raise AssertionError("a full queue must reject")
+        except AdmissionRejected as e:
+            assert e.reason == "queue_full" and e.retry_after >= 1
+
+        try:
+            await waiter
+            raise AssertionError("a long wait must reject")
+        except AdmissionRejected as e:
+            assert e.reason == "timeout"
+
+        # A released slot goes straight to the next waiter
+        waiter = asyncio.create_task(controller.acquire(LANE_INTERACTIVE))
+        await asyncio.sleep(0)
+        controller.release(LANE_INTERACTIVE, 2.0)
+        await waiter
+        assert controller.active == 1 and controller.queued == 0
+        controller.release(LANE_INTERACTIVE, 2.0)
+
+    asyncio.run(run())
+    stats = controller.stats()
+    print("Stats:", stats)
+    assert stats["active"] == 0
+    assert stats["admitted"] == 2
+    assert stats["rejected_queue_full"] == 1 and stats["rejected_timeout"] == 1
+    assert stats["retry_after"] == 2
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    """A client that disconnects while queued does not keep a slot"""
+    controller = AdmissionController(max_active=1, max_queue=5, max_wait=0, reserved={})
+
+    async def run():
+        await controller.acquire(LANE_INTERACTIVE)
+        waiter = asyncio.create_task(controller.acquire(LANE_INTERACTIVE))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert controller.queued == 0
+        controller.release(LANE_INTERACTIVE)
+
+    asyncio.run(run())
+    assert controller.active == 0
+
+
+def test_bulk_cannot_take_interactive_slots():
+    """Bulk conversions leave the interactive reservation free and yield freed slots to it"""
+    controller = AdmissionController(
+        max_active=3, max_queue=10, max_wait=0,
+        reserved={LANE_INTERACTIVE: 1, LANE_BULK: 1}
+    )
+
+    async def run():
+        # Bulk takes its reserved slot and the shared one, then queues
+        for _ in range(2):
+            await controller.acquire(LANE_BULK)
+        bulk_waiter = asyncio.create_task(controller.acquire(LANE_BULK))
+        await asyncio.sleep(0)
+        assert controller.lane_active[LANE_BULK] == 2 and controller.queued == 1
+
+        # The interactive reservation is still free
+        await asyncio.wait_for(controller.acquire(LANE_INTERACTIVE), timeout=0.1)
+        interactive_waiter = asyncio.create_task(controller.acquire(LANE_INTERACTIVE))
+        await asyncio.sleep(0)
+
+        # A freed shared slot goes to the interactive lane first
+        controller.release(LANE_BULK)
+        await asyncio.wait_for(interactive_waiter, timeout=0.1)
+        assert not bulk_waiter.done()
+        controller.release(LANE_INTERACTIVE)
+        controller.release(LANE_INTERACTIVE)
+        await asyncio.wait_for(bulk_waiter, timeout=0.1)
+        controller.release(LANE_BULK)
+        controller.release(LANE_BULK)
+
+    asyncio.run(run())
+    stats = controller.stats()
+    print("Lanes:", stats["lanes"])
+    assert stats["active"] == 0 and stats["queued"] == 0
+    assert stats["lanes"][LANE_INTERACTIVE]["reserved"] == 1
+
+
+def test_reservations_fit_the_slots():
+    """Reservations larger than the slots are cut down, interactive first"""
+    controller = AdmissionController(max_active=2, reserved={LANE_INTERACTIVE: 2, LANE_BULK: 1})
+    assert controller.reserved == {LANE_INTERACTIVE: 2, LANE_BULK: 0}
+
+
+def test_busy_conversions_get_503_but_cache_hits_do_not():
+    """Only conversions that run pandoc need a slot; busy ones get 503 + Retry-After"""
+    markdown = f"# Admission {uuid.uuid4()}\n\nSome text."
+    client = TestClient(app)
+    saturated = AdmissionController(max_active=1, max_queue=0, max_wait=5, reserved={})
+    asyncio.run(saturated.acquire(LANE_INTERACTIVE))
+
+    original_controller = conversion.admission_controller
+    conversion.admission_controller = saturated
+    try:
+        busy = client.post("/convert/text?stream=true", json={"markdown": markdown})
+        print("Busy:", busy.status_code, busy.headers.get("retry-after"))
+        assert busy.status_code == 503
+        assert int(busy.headers["retry-after"]) >= 1
+        assert saturated.rejected_queue_full == 1
+
+        if not check_pandoc_installed():
+            print("Pandoc not installed, skipping the cache hit")
+            return
+        conversion.admission_controller = original_controller
+        assert client.post("/convert/text?stream=true", json={"markdown": markdown}).status_code == 200
+        conversion.admission_controller = saturated
+        cached = client.post("/convert/text?stream=true", json={"markdown": markdown})
+        print("Cached:", cached.status_code)
+        assert cached.status_code == 200
+        assert saturated.active == 1 and saturated.rejected_queue_full == 1
+    finally:
+        conversion.admission_controller = original_controller
+    assert original_controller.active == 0
+
+
+if __name__ == "__main__":
+    test_queue_and_rejections()
+    test_cancelled_waiter_leaves_the_queue()
+    test_bulk_cannot_take_interactive_slots()
+    test_reservations_fit_the_slots()
+    test_busy_conversions_get_503_but_cache_hits_do_not()
+    print("All admission tests passed")
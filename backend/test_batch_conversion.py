@@ -0,0 +1,130 @@
+"""
+Test script for the /convert/batch endpoint
+"""
+import asyncio
+import io
+import json
+import uuid
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils import LANE_BULK, ZipStream, check_pandoc_installed
+from web.routes import conversion
+
+
+def test_zip_stream():
+    """Entries written incrementally form a valid archive"""
+    archive = ZipStream()
+    data = archive.add("a.docx", b"first")
+    data += archive.add(archive.unique_name("a.docx"), b"second")
+    data += archive.close()
+
+    with zipfile.ZipFile(io.BytesIO(data)) as result:
+        print("Archive entries:", result.namelist())
+        assert result.namelist() == ["a.docx", "a_2.docx"]
+        assert result.read("a_2.docx") == b"second"
+
+
+def test_batch_reports_item_failures():
+    """Failed documents are listed in the manifest instead of failing the batch"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    with TestClient(app) as client:
+        response = client.post("/convert/batch", json=[
+            {"markdown": "# First\n\n\\( x \\)", "filename": "notes.md"},
+            {"markdown": "   "},
+            {"markdown": "# Second", "filename": "notes"}
+        ])
+
+    print("Status:", response.status_code)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as result:
+        manifest = json.loads(result.read("manifest.json"))
+        print("Manifest:", manifest)
+        assert sorted(result.namelist()) == ["manifest.json", "notes.docx", "notes_2.docx"]
+
+    assert manifest["succeeded"] == 2
+    assert manifest["items"][1]["error"] == "Markdown content is required"
+
+
+def test_batch_uploads():
+    """Multipart uploads are converted; non-markdown files are rejected per item"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    with TestClient(app) as client:
+        response = client.post("/convert/batch", files=[
+            ("files", ("report.md", b"# Report", "text/markdown")),
+            ("files", ("image.png", b"\x89PNG", "image/png"))
+        ])
+        empty = client.post("/convert/batch", json=[])
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as result:
+        manifest = json.loads(result.read("manifest.json"))
+        assert "report.docx" in result.namelist()
+
+    print("Upload manifest:", manifest["items"])
+    assert manifest["items"][1]["error"] == "Only markdown files (.md) are supported"
+    assert empty.status_code == 400
+
+
+def test_batch_upload_size_limit():
+    """An oversized file is rejected on its own; the rest of the batch converts"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    original_limit = conversion.MAX_UPLOAD_BYTES
+    conversion.MAX_UPLOAD_BYTES = 100
+    try:
+        with TestClient(app) as client:
+            response = client.post("/convert/batch", files=[
+                ("files", ("small.md", b"# Small", "text/markdown")),
+                ("files", ("large.md", b"# Large\n\n" + b"x" * 200, "text/markdown"))
+            ])
+    finally:
+        conversion.MAX_UPLOAD_BYTES = original_limit
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as result:
+        manifest = json.loads(result.read("manifest.json"))
+        assert result.namelist() == ["small.docx", "manifest.json"]
+
+    print("Size limit manifest:", manifest["items"])
+    assert manifest["succeeded"] == 1
+    assert manifest["items"][1]["error"] == "File is too large. The maximum size is 100 bytes."
+
+
+
+def test_abandoned_batch_leaves_no_tasks():
+    """Closing the ZIP stream early cancels and awaits the pending conversions"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    items = [conversion._BatchItem(index, f"doc{index}", f"# Document {uuid.uuid4()}") for index in range(4)]
+
+    async def main():
+        stream = conversion._stream_batch(items, LANE_BULK)
+        await stream.__anext__()
+        await stream.aclose()
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    leftover = asyncio.run(main())
+    print("Tasks left after closing the stream:", leftover)
+    assert leftover == []
+
+
+if __name__ == "__main__":
+    test_zip_stream()
+    test_batch_reports_item_failures()
+    test_batch_uploads()
+    test_batch_upload_size_limit()
+    test_abandoned_batch_leaves_no_tasks()
+    print("All batch conversion tests passed")
@@ -0,0 +1,123 @@
+"""
+Test script for cancelling conversions when the client disconnects
+"""
+import asyncio
+import json
+import time
+import uuid
+
+from main import app
+from utils import (
+    PandocServerBackend,
+    check_pandoc_installed,
+    conversion_cancellations,
+    pandoc_in_flight,
+    pandoc_killed,
+    pandoc_registry
+)
+
+
+def _large_markdown() -> str:
+    # Several seconds of pandoc work, below the section-parallel threshold
+    return f"# Abandoned {uuid.uuid4()}\n\n" + "Paragraph with $x^2$ math and **bold** text.\n\n" * 15000
+
+
+def _pandoc_running() -> bool:
+    return pandoc_in_flight.value(backend="cli") + pandoc_in_flight.value(backend="server") > 0
+
+
+async def _until_pandoc_runs():
+    while not _pandoc_running():
+        await asyncio.sleep(0.01)
+
+
+def test_disconnect_kills_pandoc():
+    """A client leaving mid-conversion gets its pandoc process killed"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    body = json.dumps({"markdown": _large_markdown()}).encode("utf-8")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/convert/text",
+        "raw_path": b"/convert/text",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 12345),
+        "server": ("testserver", 80)
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client gives up once pandoc is busy with its document
+        await _until_pandoc_runs()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    killed = pandoc_killed.value(reason="cancelled")
+    cancelled = conversion_cancellations.value(endpoint="/convert/text")
+    started = time.perf_counter()
+    asyncio.run(app(scope, receive, send))
+    elapsed = time.perf_counter() - started
+
+    print(f"Cancelled after {elapsed:.2f}s, status {sent[0]['status']}")
+    assert sent[0]["status"] == 499
+    assert pandoc_killed.value(reason="cancelled") == killed + 1
+    assert conversion_cancellations.value(endpoint="/convert/text") == cancelled + 1
+    assert not _pandoc_running()
+
+
+def test_cancelled_server_conversion_kills_the_server():
+    """An abandoned conversion on the pandoc server backend kills and restarts its server"""
+    if not check_pandoc_installed() or not pandoc_registry.info.supports("server"):
+        print("Pandoc server not available, skipping")
+        return
+
+    backend = PandocServerBackend(processes=1, health_interval=0, enabled=True)
+    params = {"text": _large_markdown(), "from": "markdown", "to": "docx"}
+
+    async def main():
+        await backend.start()
+        try:
+            if not backend.available:
+                print("Pandoc server did not start, skipping")
+                return
+            server = backend.servers[0]
+            process = server.process
+            killed = pandoc_killed.value(reason="cancelled")
+
+            task = asyncio.create_task(backend.convert(params))
+            await _until_pandoc_runs()
+            started = time.perf_counter()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            elapsed = time.perf_counter() - started
+
+            print(f"Server killed after {elapsed:.2f}s")
+            assert process.poll() is not None
+            assert pandoc_killed.value(reason="cancelled") == killed + 1
+            await asyncio.gather(*backend._restarts.values())
+            assert server.healthy and server.process is not process
+            assert await backend.convert({"text": "# Back", "from": "markdown", "to": "docx"}) is not None
+        finally:
+            await backend.stop()
+
+    asyncio.run(main())
+    assert not _pandoc_running()
+
+
+if __name__ == "__main__":
+    test_disconnect_kills_pandoc()
+    test_cancelled_server_conversion_kills_the_server()
+    print("All client disconnect tests passed")
@@ -0,0 +1,135 @@
+"""
+Test script for the single-pass fix_latex_formulas() scanner
+
+The expected outputs were produced by the previous multi-pass
+implementation, so they pin down behaviour that depends on the order in
+which the notations used to be converted.
+"""
+import time
+
+from utils.markdown_processor import PreprocessingTimeout, fix_latex_formulas, preprocess_markdown
+
+
+CASES = [
+    (
+        "LaTeX delimiters with \\left[ inside a block",
+        'For a periodic function \\( f(t) \\) with period \\( T \\):\n\\[\nf(t) = a_0 + \\sum_{n=1}^{\\infty} \\left[ a_n \\cos(n\\omega_0 t) + b_n \\sin(n\\omega_0 t) \\right]\n\\]',
+        'For a periodic function $f(t)$ with period $T$:\n\n$$\nf(t) = a_0 + \\sum_{n=1}^{\\infty} \\left[ a_n \\cos(n\\omega_0 t) + b_n \\sin(n\\omega_0 t) \\right]\n$$\n',
+    ),
+    (
+        "Legacy block formula and blank line cleanup",
+        'Text before\n\n[\na_0 = \\frac{1}{T} \\int_{T} f(t), dt\n]\n\n\n\nText after',
+        'Text before\n\n$$\na_0 = \\frac{1}{T} \\int_{T} f(t), dt\n$$\n\nText after',
+    ),
+    (
+        "Single-line bracket formula next to a plain bracket line",
+        '[ x = \\frac{y}{z} ]\n\n[ just a note ]',
+        '\n$$\nx = \\frac{y}{z}\n$$\n\n[ just a note ]',
+    ),
+    (
+        "Inline parentheses and brackets in prose",
+        'The value ( x ) with (a, b) and ( B^2 - 4AC > 0 ) in [\\alpha_{1}] but not [link](url)',
+        'The value $x$ with (a, b) and $B^2 - 4AC > 0$ in $\\alpha_{1}$ but not [link](url)',
+    ),
+    (
+        "Formulas inside table cells",
+        '| Type | ( x = 1 ) |\n|------|------|\n| Row | [\\beta] |',
+        '| Type | $x = 1$ |\n|------|------|\n| Row | $\\beta$ |',
+    ),
+    (
+        "Lines using \\left[ are left alone",
+        'Keep \\left[ ( x ) \\right] here\nbut convert ( y )',
+        'Keep \\left[ ( x ) \\right] here\nbut convert $y$',
+    ),
+    (
+        "Bracket followed by a converted parenthesis",
+        '[see \\frac{a}{b}]( x ) stays a bracket',
+        '[see \\frac{a}{b}]$x$ stays a bracket',
+    ),
+    (
+        "Single-line bracket formula before a \\[ ... \\] block",
+        '[n^{2}] \\[ B^2 \\]',
+        '\n$$\nn^{2}\n$$\n\n$$\nB^2\n$$\n',
+    ),
+    (
+        "Legacy block formula after a \\[ ... \\] block",
+        'Energy: \\[ E = mc^2 \\] [\nE_k = \\frac{1}{2} m v^2\n]',
+        'Energy: \n$$\nE = mc^2\n$$\n\n$$\nE_k = \\frac{1}{2} m v^2\n$$\n',
+    ),
+    (
+        "Text after a \\[ ... \\] block is a line of its own",
+        '$$ [x = y] \\[ B^2 \\] ( a_{1} + b )',
+        '$$ [x = y] \n$$\nB^2\n$$\n $a_{1} + b$',
+    ),
+]
+
+
+def test_scanner_matches_previous_output():
+    """Each notation converts exactly as before"""
+    for name, markdown, expected in CASES:
+        result = fix_latex_formulas(markdown)
+        print(f"{name}: {'Passed' if result == expected else 'FAILED'}")
+        assert result == expected, name
+
+
+def test_empty_input():
+    """Empty input is returned unchanged"""
+    assert fix_latex_formulas("") == ""
+
+
+def test_unterminated_blocks_are_linear():
+    """Unterminated [ blocks no longer backtrack exponentially"""
+    for markdown in ("[\n" + "a\n" * 50000 + "x", "\n[ " + "\\left] " * 50000 + "x"):
+        start = time.monotonic()
+        assert fix_latex_formulas(markdown).endswith("x")
+        elapsed = time.monotonic() - start
+        print(f"{len(markdown)} chars: {elapsed:.3f}s")
+        assert elapsed < 2
+
+
+def test_unclosed_inline_delimiters_are_linear():
+    """Long lines of ( and \\( without a closing delimiter are not rescanned"""
+    for markdown in ("( a " * 40000, "\\( a " * 40000, "[ ( a " * 40000 + "]", "( a " * 40000 + "\n x )"):
+        start = time.monotonic()
+        fix_latex_formulas(markdown, deadline=start + 10)
+        elapsed = time.monotonic() - start
+        print(f"{len(markdown)} chars: {elapsed:.3f}s")
+        assert elapsed < 2
+
+
+def test_blocks_and_inline_formulas_on_one_line_are_linear():
+    """A long line mixing \\[ ... \\] blocks with inline formulas scales linearly"""
+    for unit, tail in (("\\[ x \\] \\( a \\) ", ""), ("\\[ x \\] ( a ) ", "\\left["), ("\\[ x \\] ( a ) \\left[ ", "")):
+        timings = []
+        for count in (10000, 40000):
+            markdown = unit * count + tail
+            start = time.monotonic()
+            result = fix_latex_formulas(markdown, deadline=start + 30)
+            timings.append(time.monotonic() - start)
+            assert result.count("$$") == 2 * count
+        print(f"{unit!r}: {timings[0]:.3f}s, {timings[1]:.3f}s for 4x the input")
+        # Four times the input may take at most about four times as long
+        assert timings[1] < 2 and timings[1] < 8 * timings[0] + 0.1
+
+
+def test_time_budget():
+    """Preprocessing past its deadline raises PreprocessingTimeout"""
+    markdown = "( x ) [y] \\( z \\)\n" * 1000
+    try:
+        fix_latex_formulas(markdown, deadline=time.monotonic() - 1)
+    except PreprocessingTimeout:
+        print("Time budget: Passed")
+    else:
+        raise AssertionError("expected PreprocessingTimeout")
+    
+    # Without a budget the same document converts normally
+    assert preprocess_markdown(markdown, time_budget=0).count("$x$") == 1000
+
+
+if __name__ == "__main__":
+    test_scanner_matches_previous_output()
+    test_empty_input()
+    test_unterminated_blocks_are_linear()
+    test_unclosed_inline_delimiters_are_linear()
+    test_blocks_and_inline_formulas_on_one_line_are_linear()
+    test_time_budget()
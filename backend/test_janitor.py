@@ -0,0 +1,58 @@
+"""
+Test script for the upload retention janitor
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from utils.janitor import UploadJanitor
+
+
+def _write(path: Path, size: int, age: float) -> None:
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def test_ttl_expiry():
+    """Files older than their directory's TTL are deleted"""
+    with tempfile.TemporaryDirectory() as tmp:
+        md_dir, docx_dir = Path(tmp, "md"), Path(tmp, "docx")
+        md_dir.mkdir()
+        docx_dir.mkdir()
+        _write(md_dir / "old.md", 10, age=120)
+        _write(md_dir / "new.md", 10, age=0)
+        _write(docx_dir / "old.docx", 10, age=120)
+        
+        janitor = UploadJanitor([(md_dir, 60), (docx_dir, 600)], quota_bytes=0, interval=0)
+        result = janitor.sweep()
+        
+        print("Sweep result:", result)
+        assert result == {"expired_files": 1, "evicted_files": 0, "reclaimed_bytes": 10}
+        assert sorted(p.name for p in md_dir.iterdir()) == ["new.md"]
+        assert (docx_dir / "old.docx").exists()
+
+
+def test_quota_eviction():
+    """Over quota, the oldest files are evicted first"""
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        for index, age in enumerate([30, 20, 10, 0]):
+            _write(directory / f"file{index}.docx", 100, age=age)
+        _write(directory / ".in-progress.docx.tmp", 100, age=60)
+        
+        janitor = UploadJanitor([(directory, 0)], quota_bytes=300, interval=0)
+        janitor.sweep()
+        
+        print("Stats:", janitor.stats())
+        assert sorted(p.name for p in directory.iterdir()) == [".in-progress.docx.tmp", "file2.docx", "file3.docx"]
+        assert janitor.stats()["evicted_files"] == 2
+        assert janitor.stats()["reclaimed_bytes"] == 200
+        assert janitor.stats()["tracked_bytes"] == 300
+
+
+if __name__ == "__main__":
+    test_ttl_expiry()
+    test_quota_eviction()
+    print("All janitor tests passed")
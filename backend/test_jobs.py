@@ -0,0 +1,54 @@
+"""
+Test script for the asynchronous job API
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils import DOCX_DIR, check_pandoc_installed
+
+
+def _wait_for(client: TestClient, status_url: str) -> dict:
+    for _ in range(200):
+        job = client.get(status_url).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_job_lifecycle():
+    """A queued job finishes and its result is served by /download"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    with TestClient(app) as client:
+        response = client.post("/jobs", json={"markdown": "# Job\n\n\\( x \\)", "filename": "job"})
+        print("Created:", response.status_code, response.json())
+        assert response.status_code == 202
+        assert response.json()["status"] in ("queued", "running", "done")
+
+        job = _wait_for(client, response.json()["status_url"])
+        print("Finished:", job)
+        assert job["status"] == "done"
+        assert job["run_seconds"] is not None
+
+        download = client.get(job["download_url"])
+        assert download.status_code == 200
+        assert download.content.startswith(b"PK")
+
+    (DOCX_DIR / job["filename"]).unlink()
+
+
+def test_unknown_job():
+    """Unknown job ids return 404"""
+    with TestClient(app) as client:
+        assert client.get("/jobs/does-not-exist").status_code == 404
+
+
+if __name__ == "__main__":
+    test_job_lifecycle()
+    test_unknown_job()
+    print("All job tests passed")
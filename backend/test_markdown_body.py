@@ -0,0 +1,78 @@
+"""
+Test script for raw markdown request bodies (/convert/markdown)
+"""
+import io
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils import DOCX_DIR, check_pandoc_installed
+
+MARKDOWN = "# Raw body\n\nEnergy: \\( E = mc^2 \\)\n\n\\[\n\\frac{a}{b} = \\sqrt{c}\n\\]\n"
+
+
+def _document_xml(docx_bytes: bytes) -> bytes:
+    return zipfile.ZipFile(io.BytesIO(docx_bytes)).read("word/document.xml")
+
+
+def test_raw_body_matches_json_body():
+    """A text/markdown body converts exactly like the same text sent as JSON"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    with TestClient(app) as client:
+        raw = client.post(
+            "/convert/markdown?stream=true&filename=raw",
+            content=MARKDOWN.encode("utf-8"),
+            headers={"Content-Type": "text/markdown; charset=utf-8"}
+        )
+        json_body = client.post("/convert/text?stream=true", json={"markdown": MARKDOWN})
+
+    assert raw.status_code == 200 and json_body.status_code == 200
+    assert raw.headers["content-disposition"].startswith('attachment; filename="raw_')
+    assert _document_xml(raw.content) == _document_xml(json_body.content)
+
+
+def test_filename_header_and_download():
+    """X-Filename names the saved DOCX when no query parameter is given"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/convert/markdown",
+            content=MARKDOWN.encode("utf-8"),
+            headers={"Content-Type": "text/plain", "X-Filename": "r%C3%A9sum%C3%A9"}
+        )
+
+    print("Response:", response.json())
+    assert response.status_code == 200
+    filename = response.json()["filename"]
+    assert filename.startswith("résumé_") and (DOCX_DIR / filename).exists()
+    (DOCX_DIR / filename).unlink()
+
+
+def test_rejected_bodies():
+    """Other content types, invalid UTF-8 and empty bodies are refused"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    with TestClient(app) as client:
+        wrong_type = client.post("/convert/markdown", content=b"# x", headers={"Content-Type": "application/json"})
+        not_utf8 = client.post("/convert/markdown", content=b"# \xff\xfe", headers={"Content-Type": "text/markdown"})
+        empty = client.post("/convert/markdown", content=b"  \n", headers={"Content-Type": "text/markdown"})
+
+    assert wrong_type.status_code == 415
+    assert not_utf8.status_code == 400 and "UTF-8" in not_utf8.json()["detail"]
+    assert empty.status_code == 400
+
+
+if __name__ == "__main__":
+    test_raw_body_matches_json_body()
+    test_filename_header_and_download()
+    test_rejected_bodies()
+    print("All raw markdown body tests passed")
@@ -0,0 +1,119 @@
+"""
+Test script for the Prometheus metrics endpoint
+"""
+import asyncio
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils import DOCX_DIR, Counter, Gauge, Histogram, MetricsRegistry, check_pandoc_installed, metrics_registry
+from utils.cache import ResultCache
+from utils.janitor import UploadJanitor
+
+
+def _sample(text: str, name: str, labels: str = "") -> float:
+    """Value of one sample in exposition text (0 if absent)"""
+    match = re.search(rf"^{re.escape(name + labels)} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_exposition_format():
+    """Metrics render as Prometheus text with cumulative histogram buckets"""
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("demo_seconds", "Demo timings", ["stage"], buckets=(0.1, 1)))
+    counter = registry.register(Counter("demo_failures_total", "Demo failures", ["cause"]))
+    gauge = registry.register(Gauge("demo_in_flight", "Demo gauge"))
+
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5, stage="a")
+    counter.inc(cause='say "hi"')
+    with gauge.track():
+        assert gauge.value() == 1
+    gauge.inc(2)
+
+    text = registry.render()
+    print(text)
+    assert "# TYPE demo_seconds histogram" in text
+    assert _sample(text, "demo_seconds_bucket", '{stage="a",le="0.1"}') == 1
+    assert _sample(text, "demo_seconds_bucket", '{stage="a",le="1"}') == 2
+    assert _sample(text, "demo_seconds_bucket", '{stage="a",le="+Inf"}') == 3
+    assert _sample(text, "demo_seconds_count", '{stage="a"}') == 3
+    assert _sample(text, "demo_seconds_sum", '{stage="a"}') == 5.55
+    assert _sample(text, "demo_failures_total", '{cause="say \\"hi\\""}') == 1
+    assert _sample(text, "demo_in_flight") == 2
+
+
+def test_metrics_endpoint():
+    """A conversion and a download show up in the stage histograms"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    with TestClient(app) as client:
+        before = client.get("/metrics").text
+        response = client.post("/convert/text", json={"markdown": "# Metrics\n\n$x^2$", "filename": "metrics"})
+        assert response.status_code == 200
+        filename = response.json()["filename"]
+        assert client.get(f"/download/{filename}").status_code == 200
+        response = client.post("/convert/upload", files={"file": ("bad.md", b"\xff\xfe", "text/markdown")})
+        assert response.status_code == 400
+        metrics = client.get("/metrics")
+    (DOCX_DIR / filename).unlink(missing_ok=True)
+
+    text = metrics.text
+    print(text)
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    for stage in ("preprocess", "docx_write", "download"):
+        name, labels = "mdtodocx_stage_seconds_count", f'{{stage="{stage}"}}'
+        assert _sample(text, name, labels) == _sample(before, name, labels) + 1
+    assert _sample(text, "mdtodocx_conversion_failures_total", '{cause="decode_error"}') \
+        == _sample(before, "mdtodocx_conversion_failures_total", '{cause="decode_error"}') + 1
+    assert "# TYPE mdtodocx_pandoc_in_flight gauge" in text
+
+
+def test_cache_and_janitor_metrics():
+    """Result cache lookups and janitor sweeps are exported for scraping"""
+    before = metrics_registry.render()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(Path(tmp, "cache"), memory_max_bytes=10, disk_max_bytes=0)
+
+        async def run():
+            assert await cache.get("a") is None
+            await cache.put("a", b"x" * 8)
+            await cache.put("b", b"y" * 8)
+            assert await cache.get("b") == b"y" * 8
+
+        asyncio.run(run())
+
+        uploads = Path(tmp, "uploads")
+        uploads.mkdir()
+        old = uploads / "old.md"
+        old.write_bytes(b"x" * 10)
+        os.utime(old, (time.time() - 120, time.time() - 120))
+        (uploads / "new.md").write_bytes(b"y" * 30)
+        UploadJanitor([(uploads, 60)], quota_bytes=20, interval=0).sweep()
+
+    text = metrics_registry.render()
+    print(text)
+    for name, labels, delta in [
+        ("mdtodocx_result_cache_hits_total", '{tier="memory"}', 1),
+        ("mdtodocx_result_cache_misses_total", "", 1),
+        ("mdtodocx_result_cache_evictions_total", '{tier="memory"}', 1),
+        ("mdtodocx_janitor_reclaimed_bytes_total", '{reason="expired"}', 10),
+        ("mdtodocx_janitor_reclaimed_bytes_total", '{reason="quota"}', 30),
+        ("mdtodocx_janitor_scan_seconds_count", "", 1)
+    ]:
+        assert _sample(text, name, labels) == _sample(before, name, labels) + delta, name
+
+
+if __name__ == "__main__":
+    test_exposition_format()
+    test_metrics_endpoint()
+    test_cache_and_janitor_metrics()
+    print("All metrics tests passed")
@@ -0,0 +1,74 @@
+"""
+Test script for the `pandoc server` conversion backend
+"""
+import asyncio
+
+from utils import check_pandoc_installed, pandoc
+from utils.pandoc import PandocServerBackend, PandocServerError
+
+
+def _convert_with(backend: PandocServerBackend, kill_servers: bool = False):
+    async def run():
+        await backend.start()
+        try:
+            available = backend.available
+            if kill_servers:
+                for server in backend.servers:
+                    server.process.kill()
+                    server.process.wait()
+            return available, await pandoc.convert_markdown_to_docx_bytes("# Title\n\n$x^2$")
+        finally:
+            await backend.stop()
+
+    original = pandoc.pandoc_server_backend
+    pandoc.pandoc_server_backend = backend
+    try:
+        return asyncio.run(run())
+    finally:
+        pandoc.pandoc_server_backend = original
+
+
+def test_server_backend_converts():
+    """Conversions go to the server when it is healthy, else to the CLI"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    backend = PandocServerBackend(processes=1, health_interval=0, enabled=True)
+    available, docx_bytes = _convert_with(backend)
+    print("Server available:", available, "Stats:", backend.stats())
+    assert docx_bytes is not None and docx_bytes.startswith(b"PK")
+    assert backend.conversions == (1 if available else 0)
+
+
+def test_dead_server_falls_back():
+    """A server that died is marked unhealthy and the CLI takes over"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    backend = PandocServerBackend(processes=1, health_interval=0, enabled=True)
+    available, docx_bytes = _convert_with(backend, kill_servers=True)
+    print("Server available:", available, "Stats after kill:", backend.stats())
+    assert docx_bytes is not None and docx_bytes.startswith(b"PK")
+    assert backend.conversions == 0
+    assert backend.fallbacks == (1 if available else 0)
+
+
+def test_no_healthy_server():
+    """convert() refuses to run without a healthy server"""
+    backend = PandocServerBackend(processes=1, health_interval=0, enabled=False)
+    assert not backend.available
+    try:
+        asyncio.run(backend.convert({"text": "x", "from": "markdown", "to": "docx"}))
+    except PandocServerError:
+        print("No healthy server: Passed")
+    else:
+        raise AssertionError("expected PandocServerError")
+
+
+if __name__ == "__main__":
+    test_server_backend_converts()
+    test_dead_server_falls_back()
+    test_no_healthy_server()
+    print("All pandoc server tests passed")
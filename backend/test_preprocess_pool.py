@@ -0,0 +1,89 @@
+"""
+Test script for preprocessing large documents in worker processes
+"""
+import asyncio
+
+from utils.markdown_processor import PreprocessingTimeout, preprocess_markdown
+from utils.preprocess_pool import PreprocessingCrashed, PreprocessPool
+
+
+def test_pool_matches_inline():
+    """Large documents go to the pool and preprocess exactly as inline"""
+    async def run():
+        pool = PreprocessPool(workers=2, min_size=1000)
+        pool.start()
+        try:
+            small = "( x )"
+            large = "( x ) [y] \\( z \\)\n" * 1000
+            results = await asyncio.gather(pool.preprocess(small), pool.preprocess(large), pool.preprocess(large))
+            return pool.stats(), small, large, results
+        finally:
+            await pool.stop()
+
+    stats, small, large, results = asyncio.run(run())
+    print("Stats:", stats)
+    assert results == [preprocess_markdown(small), preprocess_markdown(large), preprocess_markdown(large)]
+    assert stats["inline_runs"] == 1
+    assert stats["pool_runs"] == 2
+
+
+def test_pool_time_budget():
+    """A time budget exceeded in a worker raises PreprocessingTimeout"""
+    async def run():
+        pool = PreprocessPool(workers=1, min_size=0)
+        pool.start()
+        try:
+            await pool.preprocess("( x )\n" * 1000, time_budget=1e-9)
+        finally:
+            await pool.stop()
+
+    try:
+        asyncio.run(run())
+    except PreprocessingTimeout:
+        print("Time budget in worker: Passed")
+    else:
+        raise AssertionError("expected PreprocessingTimeout")
+
+
+def test_crashed_worker():
+    """A dead worker fails its request and the pool is replaced"""
+    async def run():
+        pool = PreprocessPool(workers=1, min_size=0)
+        pool.start()
+        try:
+            # Let the worker start, then kill it as the OOM killer would
+            await pool.preprocess("( x )")
+            for process in list(pool._executor._processes.values()):
+                process.kill()
+            try:
+                await pool.preprocess("( y )")
+            except PreprocessingCrashed:
+                crashed = True
+            else:
+                crashed = False
+            return crashed, await pool.preprocess("( z )"), pool.stats()
+        finally:
+            await pool.stop()
+
+    crashed, result, stats = asyncio.run(run())
+    print("Stats after crash:", stats)
+    assert crashed
+    assert result == "$z$"
+    assert stats["restarts"] == 1
+    assert stats["inline_runs"] == 0
+
+
+def test_disabled_pool():
+    """With no workers everything is preprocessed inline"""
+    pool = PreprocessPool(workers=0, min_size=0)
+    pool.start()
+    assert asyncio.run(pool.preprocess("( x )")) == "$x$"
+    assert pool.stats()["workers"] == 0
+
+
+if __name__ == "__main__":
+    test_pool_matches_inline()
+    test_pool_time_budget()
+    test_crashed_worker()
+    test_disabled_pool()
+    print("All preprocess pool tests passed")
@@ -0,0 +1,186 @@
+"""
+Test script for the priority lanes of the pandoc scheduler
+"""
+import asyncio
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils import (
+    LANE_BULK,
+    LANE_INTERACTIVE,
+    AdmissionController,
+    PandocScheduler,
+    check_pandoc_installed,
+    pandoc,
+    pandoc_scheduler,
+    render_docx,
+    select_lane
+)
+
+
+def test_select_lane():
+    """Small documents are interactive, large ones bulk, unless a lane is requested"""
+    assert select_lane(1000) == LANE_INTERACTIVE
+    assert select_lane(10 * 1024 * 1024) == LANE_BULK
+    assert select_lane(10, "Bulk") == LANE_BULK
+    assert select_lane(10 * 1024 * 1024, "interactive") == LANE_INTERACTIVE
+    try:
+        select_lane(10, "urgent")
+        raise AssertionError("unknown lanes must be rejected")
+    except ValueError:
+        pass
+
+
+def test_weighted_fair_dispatch():
+    """Contended slots go to the lanes in proportion to their weights"""
+    scheduler = PandocScheduler(capacity=1, lanes={LANE_INTERACTIVE: (4, 0), LANE_BULK: (1, 0)})
+    order = []
+
+    async def convert(lane):
+        async with scheduler.slot(lane):
+            order.append(lane)
+            await asyncio.sleep(0)
+
+    async def main():
+        await scheduler.acquire(LANE_BULK)
+        # The bulk backlog arrives first; interactive work still gets ahead
+        tasks = [asyncio.create_task(convert(LANE_BULK)) for _ in range(10)]
+        tasks += [asyncio.create_task(convert(LANE_INTERACTIVE)) for _ in range(10)]
+        await asyncio.sleep(0)
+        scheduler.release(LANE_BULK)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    print("Order:", "".join(lane[0] for lane in order))
+    # About four interactive starts per bulk one, and bulk is never starved
+    assert order[:10].count(LANE_INTERACTIVE) >= 8
+    assert LANE_BULK in order[:6]
+    assert scheduler.active == 0
+
+
+def test_reserved_slots():
+    """Bulk work cannot take the slot reserved for interactive conversions"""
+    scheduler = PandocScheduler(capacity=2, lanes={LANE_INTERACTIVE: (1, 1), LANE_BULK: (1, 0)})
+
+    async def main():
+        await scheduler.acquire(LANE_BULK)
+        waiting_bulk = asyncio.create_task(scheduler.acquire(LANE_BULK))
+        await asyncio.sleep(0)
+        assert not waiting_bulk.done()
+
+        # The reserved slot is free at once for an interactive conversion
+        await asyncio.wait_for(scheduler.acquire(LANE_INTERACTIVE), timeout=1)
+        stats = scheduler.stats()
+        assert stats["lanes"][LANE_BULK]["queued"] == 1
+
+        # A cancelled waiter does not keep a slot
+        waiting_bulk.cancel()
+        await asyncio.gather(waiting_bulk, return_exceptions=True)
+        scheduler.release(LANE_BULK)
+        scheduler.release(LANE_INTERACTIVE)
+
+    asyncio.run(main())
+    stats = scheduler.stats()
+    print("Stats:", stats)
+    assert stats["active"] == 0
+    assert stats["lanes"][LANE_BULK]["queued"] == 0
+
+
+def test_saturated_bulk_does_not_delay_interactive():
+    """With bulk conversions filling admission and pandoc, an interactive render_docx starts at once"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    scheduler = PandocScheduler(capacity=4, lanes={LANE_INTERACTIVE: (4, 1), LANE_BULK: (1, 1)})
+    admission = AdmissionController(
+        max_active=4, max_queue=100, max_wait=0,
+        reserved={LANE_INTERACTIVE: 1, LANE_BULK: 1}
+    )
+
+    async def main():
+        bulk = [
+            asyncio.create_task(render_docx(
+                f"# Bulk {uuid.uuid4()}\n\n" + "A paragraph of **bulk** text.\n\n" * 3000,
+                lane=LANE_BULK,
+                admission=admission
+            ))
+            for _ in range(8)
+        ]
+        try:
+            while admission.stats()["lanes"][LANE_BULK]["queued"] < 5:
+                await asyncio.sleep(0.01)
+
+            started = time.monotonic()
+            docx_bytes = await asyncio.wait_for(
+                render_docx(f"# Interactive {uuid.uuid4()}", lane=LANE_INTERACTIVE, admission=admission),
+                timeout=10
+            )
+            elapsed = time.monotonic() - started
+            lanes = admission.stats()["lanes"]
+            print(f"Interactive done after {elapsed:.2f}s, admission lanes: {lanes}")
+            assert docx_bytes is not None
+            assert lanes[LANE_BULK]["active"] == 3 and lanes[LANE_BULK]["queued"] == 5
+            assert scheduler.stats()["lanes"][LANE_INTERACTIVE]["total_wait_seconds"] == 0
+        finally:
+            for task in bulk:
+                task.cancel()
+            await asyncio.gather(*bulk, return_exceptions=True)
+
+    original = pandoc.pandoc_scheduler
+    pandoc.pandoc_scheduler = scheduler
+    try:
+        asyncio.run(main())
+    finally:
+        pandoc.pandoc_scheduler = original
+    assert admission.active == 0 and admission.queued == 0
+
+
+def test_endpoints_pick_lanes():
+    """Small text conversions run interactive, uploads bulk, X-Priority overrides"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    def dispatched():
+        lanes = pandoc_scheduler.stats()["lanes"]
+        return lanes[LANE_INTERACTIVE]["dispatched"], lanes[LANE_BULK]["dispatched"]
+
+    with TestClient(app) as client:
+        before = dispatched()
+        response = client.post("/convert/text?stream=true", json={"markdown": f"# Text {uuid.uuid4()}"})
+        assert response.status_code == 200
+        after_text = dispatched()
+
+        files = {"file": ("notes.md", f"# Upload {uuid.uuid4()}".encode("utf-8"), "text/markdown")}
+        response = client.post("/convert/upload?stream=true", files=files)
+        assert response.status_code == 200
+        after_upload = dispatched()
+
+        response = client.post(
+            "/convert/text?stream=true",
+            json={"markdown": f"# Bulk text {uuid.uuid4()}"},
+            headers={"X-Priority": "bulk"}
+        )
+        assert response.status_code == 200
+        after_header = dispatched()
+
+        invalid = client.post("/convert/text", json={"markdown": "# x"}, headers={"X-Priority": "urgent"})
+
+    print("Dispatched:", before, after_text, after_upload, after_header)
+    assert after_text == (before[0] + 1, before[1])
+    assert after_upload == (after_text[0], after_text[1] + 1)
+    assert after_header == (after_upload[0], after_upload[1] + 1)
+    assert invalid.status_code == 400
+
+
+if __name__ == "__main__":
+    test_select_lane()
+    test_weighted_fair_dispatch()
+    test_reserved_slots()
+    test_saturated_bulk_does_not_delay_interactive()
+    test_endpoints_pick_lanes()
+    print("All priority lane tests passed")
@@ -0,0 +1,142 @@
+"""
+Test script for compressed request bodies (Content-Encoding on /convert)
+"""
+import gzip
+import io
+import json
+import zipfile
+import zlib
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from main import app
+from utils import check_pandoc_installed
+from web.middleware import RequestDecompressionMiddleware
+
+MARKDOWN = "# Compressed\n\n" + "Formula \\( x^2 + y^2 \\) and more text.\n\n" * 200
+
+
+def _document_xml(docx_bytes: bytes) -> bytes:
+    return zipfile.ZipFile(io.BytesIO(docx_bytes)).read("word/document.xml")
+
+
+def test_gzip_json_and_raw_bodies():
+    """gzip and deflate bodies convert like their uncompressed versions"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    body = json.dumps({"markdown": MARKDOWN}).encode("utf-8")
+    with TestClient(app) as client:
+        plain = client.post("/convert/text?stream=true", content=body, headers={"Content-Type": "application/json"})
+        gzipped = client.post(
+            "/convert/text?stream=true",
+            content=gzip.compress(body),
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        )
+        deflated = client.post(
+            "/convert/markdown?stream=true",
+            content=zlib.compress(MARKDOWN.encode("utf-8")),
+            headers={"Content-Type": "text/markdown", "Content-Encoding": "deflate"}
+        )
+
+    print("Compressed size:", len(gzip.compress(body)), "of", len(body))
+    assert plain.status_code == gzipped.status_code == deflated.status_code == 200
+    assert _document_xml(gzipped.content) == _document_xml(plain.content)
+    assert _document_xml(deflated.content) == _document_xml(plain.content)
+
+
+def test_gzip_upload():
+    """A gzip-compressed multipart upload is decompressed before form parsing"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    boundary = "compressedboundary"
+    form = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="notes.md"\r\n'
+        "Content-Type: text/markdown\r\n\r\n"
+        f"{MARKDOWN}\r\n"
+        f"--{boundary}--\r\n"
+    ).encode("utf-8")
+    with TestClient(app) as client:
+        response = client.post(
+            "/convert/upload?stream=true",
+            content=gzip.compress(form),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}", "Content-Encoding": "gzip"}
+        )
+    assert response.status_code == 200
+    assert b"Compressed" in _document_xml(response.content)
+
+
+def test_invalid_and_unsupported_encodings():
+    """Corrupt data is a 400; unknown encodings are a 415"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    with TestClient(app) as client:
+        corrupt = client.post(
+            "/convert/markdown",
+            content=b"definitely not gzip",
+            headers={"Content-Type": "text/markdown", "Content-Encoding": "gzip"}
+        )
+        truncated = client.post(
+            "/convert/markdown",
+            content=gzip.compress(MARKDOWN.encode("utf-8"))[:100],
+            headers={"Content-Type": "text/markdown", "Content-Encoding": "gzip"}
+        )
+        unknown = client.post(
+            "/convert/markdown",
+            content=b"# x",
+            headers={"Content-Type": "text/markdown", "Content-Encoding": "compress"}
+        )
+        # No bounded-output decoder for these, so they are refused
+        unbounded = [
+            client.post(
+                "/convert/markdown",
+                content=b"# x",
+                headers={"Content-Type": "text/markdown", "Content-Encoding": encoding}
+            )
+            for encoding in ("br", "zstd")
+        ]
+
+    print("Statuses:", corrupt.status_code, truncated.status_code, unknown.status_code,
+          [response.status_code for response in unbounded])
+    assert corrupt.status_code == 400
+    assert truncated.status_code == 400
+    assert unknown.status_code == 415
+    assert all(response.status_code == 415 for response in unbounded)
+
+
+def test_decompressed_size_limit():
+    """A zip bomb is cut off at max_bytes with a 413"""
+    small_app = FastAPI()
+    small_app.add_middleware(RequestDecompressionMiddleware, prefixes=["/convert/"], max_bytes=1024 * 1024)
+
+    @small_app.post("/convert/echo")
+    async def echo(request: Request):
+        size = 0
+        async for chunk in request.stream():
+            assert len(chunk) <= 64 * 1024
+            size += len(chunk)
+        return {"size": size}
+
+    bomb = gzip.compress(b"\0" * (50 * 1024 * 1024))
+    with TestClient(small_app) as client:
+        ok = client.post("/convert/echo", content=gzip.compress(b"a" * 1000), headers={"Content-Encoding": "gzip"})
+        rejected = client.post("/convert/echo", content=bomb, headers={"Content-Encoding": "gzip"})
+
+    print("Bomb:", len(bomb), "bytes ->", rejected.status_code)
+    assert ok.json() == {"size": 1000}
+    assert rejected.status_code == 413
+
+
+if __name__ == "__main__":
+    test_gzip_json_and_raw_bodies()
+    test_gzip_upload()
+    test_invalid_and_unsupported_encodings()
+    test_decompressed_size_limit()
+    print("All request decompression tests passed")
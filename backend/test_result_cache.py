@@ -0,0 +1,68 @@
+"""
+Test script for the DOCX result cache
+"""
+import asyncio
+import tempfile
+from pathlib import Path
+
+from utils.cache import ResultCache, make_cache_key
+
+
+def test_cache_key():
+    """Keys depend on content, pandoc version and options"""
+    key = make_cache_key("# Title", "3.1.9", {"to": "docx"})
+    
+    print("Same input, same key:", key == make_cache_key("# Title", "3.1.9", {"to": "docx"}))
+    assert key == make_cache_key("# Title", "3.1.9", {"to": "docx"})
+    assert key != make_cache_key("# Title!", "3.1.9", {"to": "docx"})
+    assert key != make_cache_key("# Title", "3.2", {"to": "docx"})
+    assert key != make_cache_key("# Title", "3.1.9", {"to": "docx", "template": "brand"})
+
+
+def test_memory_and_disk_tiers():
+    """Results survive memory eviction through the disk tier"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(Path(tmp), memory_max_bytes=10, disk_max_bytes=100)
+        
+        async def run():
+            assert await cache.get("a") is None
+            await cache.put("a", b"x" * 8)
+            await cache.put("b", b"y" * 8)
+            
+            print("Stats after two puts:", cache.stats())
+            assert cache.memory_evictions == 1
+            assert await cache.get("b") == b"y" * 8
+            assert await cache.get("a") == b"x" * 8
+        
+        asyncio.run(run())
+        assert cache.stats()["memory_hits"] == 1
+        assert cache.stats()["disk_hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+
+def test_disk_eviction():
+    """The disk tier is trimmed oldest-first to its byte budget"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(Path(tmp), memory_max_bytes=0, disk_max_bytes=20)
+        
+        async def run():
+            for key in ["a", "b", "c"]:
+                await cache.put(key, b"z" * 8)
+            
+            print("Files on disk:", sorted(p.name for p in Path(tmp).iterdir()))
+            assert cache.disk_evictions == 1
+            assert await cache.get("a") is None
+            assert await cache.get("c") == b"z" * 8
+            
+            # A fresh instance picks up the files left on disk
+            reopened = ResultCache(Path(tmp), memory_max_bytes=0, disk_max_bytes=20)
+            assert await reopened.get("b") == b"z" * 8
+        
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_cache_key()
+    test_memory_and_disk_tiers()
+    test_disk_eviction()
+    print("All result cache tests passed")
@@ -0,0 +1,164 @@
+"""
+Test script for section-parallel conversion of large documents
+"""
+import asyncio
+import io
+import re
+import zipfile
+
+from utils import (
+    check_pandoc_installed,
+    convert_markdown_sections_to_docx,
+    convert_markdown_to_docx_bytes,
+    merge_docx,
+    preprocess_markdown,
+    split_markdown_sections
+)
+
+PIXEL = (
+    "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJ"
+    "AAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+DOCUMENT = f"""# Intro
+
+Text with a note[^a], [a link](https://example.com) and [a reference][r].
+
+1. one
+2. two
+
+![pixel]({PIXEL})
+
+```
+# not a heading
+```
+
+# Methods
+
+Formula:
+
+\\[
+x = 1
+
+# not a heading either
+\\]
+
+- bullet
+- bullet
+
+![pixel]({PIXEL})
+
+# Intro
+
+Repeated heading, [another link](https://example.org) and a note[^b].
+
+[^a]: Note a with [a link](https://note.example.com).
+[^b]: Note b.
+
+[r]: https://reference.example.com
+"""
+
+
+def test_split_is_safe_around_fences_and_math():
+    """Only real headings split; definitions are shared by every chunk"""
+    processed = preprocess_markdown(DOCUMENT)
+    chunks = split_markdown_sections(processed, 3)
+
+    assert len(chunks) == 3
+    assert chunks[0].startswith("# Intro") and "# not a heading\n```" in chunks[0]
+    assert chunks[1].startswith("# Methods") and "# not a heading either\n$$" in chunks[1]
+    assert chunks[2].startswith("# Intro")
+    for chunk in chunks:
+        assert "[^a]: Note a" in chunk and "[r]: https://reference.example.com" in chunk
+        assert chunk.count("$$") % 2 == 0 and chunk.count("```") % 2 == 0
+
+
+def test_split_groups_sections():
+    """Sections are grouped into at most `parts` chunks; a title does not count"""
+    markdown = "# Title\n\n" + "".join(f"## Section {i}\n\nText {i}.\n\n" for i in range(8))
+
+    chunks = split_markdown_sections(markdown, 4)
+    assert len(chunks) == 4
+    assert "".join(chunks) == markdown
+    assert chunks[0].startswith("# Title\n\n## Section 0")
+
+    assert split_markdown_sections(markdown, 1) == [markdown]
+    assert split_markdown_sections("No headings at all.\n", 4) == ["No headings at all.\n"]
+
+
+def _ids(xml: str, pattern: str) -> list:
+    return re.findall(pattern, xml)
+
+
+def test_merged_docx_matches_single_conversion():
+    """The merged DOCX is valid and reads back like a single conversion"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    processed = preprocess_markdown(DOCUMENT)
+    chunks = split_markdown_sections(processed, 3)
+
+    async def run():
+        parts = [await convert_markdown_to_docx_bytes(chunk) for chunk in chunks]
+        return merge_docx(parts), await convert_markdown_to_docx_bytes(processed)
+
+    merged, single = asyncio.run(run())
+    with zipfile.ZipFile(io.BytesIO(merged)) as archive:
+        document = archive.read("word/document.xml").decode()
+        rels = archive.read("word/_rels/document.xml.rels").decode()
+        footnotes = archive.read("word/footnotes.xml").decode()
+        numbering = archive.read("word/numbering.xml").decode()
+        names = archive.namelist()
+
+    bookmarks = _ids(document, r'<w:bookmarkStart [^>]*w:name="([^"]*)"')
+    print("Bookmarks:", bookmarks)
+    assert len(bookmarks) == len(set(bookmarks)) and "intro-1" in bookmarks
+    bookmark_ids = _ids(document, r'<w:bookmarkStart [^>]*w:id="(\d+)"')
+    assert len(bookmark_ids) == len(set(bookmark_ids))
+    drawing_ids = _ids(document, r'<wp:docPr [^>]*id="(\d+)"')
+    assert len(drawing_ids) == 2 and len(set(drawing_ids)) == 2
+
+    rel_ids = set(_ids(rels, r'Id="([^"]*)"'))
+    for reference in _ids(document, r'r:(?:id|embed)="([^"]*)"'):
+        assert reference in rel_ids
+    assert len([name for name in names if name.startswith("word/media/")]) == 2
+
+    notes = _ids(footnotes, r'<w:footnote w:id="(\d+)"')
+    assert sorted(_ids(document, r'<w:footnoteReference w:id="(\d+)"')) == sorted(notes)
+    nums = set(_ids(numbering, r'<w:num w:numId="(\d+)"'))
+    assert set(_ids(document, r'<w:numId w:val="(\d+)"')) <= nums
+
+    # Pandoc reads both back to the same document (image names aside)
+    async def read_back(data):
+        process = await asyncio.create_subprocess_exec(
+            "pandoc", "-f", "docx", "-t", "plain",
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+        )
+        output, _ = await process.communicate(data)
+        return output.decode()
+
+    assert asyncio.run(read_back(merged)) == asyncio.run(read_back(single))
+
+
+def test_sectioned_conversion():
+    """convert_markdown_sections_to_docx() returns one DOCX for any document"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    markdown = "".join(f"# Part {i}\n\n1. item\n2. item\n\nText[^n{i}].\n\n[^n{i}]: Note {i}.\n\n" for i in range(6))
+    docx_bytes = asyncio.run(convert_markdown_sections_to_docx(markdown, parts=3))
+    assert docx_bytes.startswith(b"PK")
+    with zipfile.ZipFile(io.BytesIO(docx_bytes)) as archive:
+        document = archive.read("word/document.xml").decode()
+    assert all(f"Part {i}" in document for i in range(6))
+    assert len(_ids(document, r'<w:footnoteReference w:id="(\d+)"')) == 6
+
+
+if __name__ == "__main__":
+    test_split_is_safe_around_fences_and_math()
+    test_split_groups_sections()
+    test_merged_docx_matches_single_conversion()
+    test_sectioned_conversion()
+    print("All section tests passed")
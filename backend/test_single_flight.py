@@ -0,0 +1,127 @@
+"""
+Test script for single-flight deduplication of identical conversions
+"""
+import asyncio
+import gc
+import uuid
+
+from utils import SingleFlight, check_pandoc_installed, conversion_flights, render_docx
+
+
+def test_identical_calls_share_one_run():
+    """Concurrent calls with one key run the work once; other keys run separately"""
+    flights = SingleFlight()
+    calls = []
+
+    def work(value):
+        async def run():
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            return value
+        return run
+
+    async def main():
+        return await asyncio.gather(
+            *(flights.run("a", work("a")) for _ in range(5)),
+            flights.run("b", work("b"))
+        )
+
+    results = asyncio.run(main())
+    print("Results:", results, "Stats:", flights.stats())
+    assert results == ["a"] * 5 + ["b"]
+    assert sorted(calls) == ["a", "b"]
+    assert flights.stats() == {"in_flight": 0, "leaders": 2, "followers": 4}
+
+
+def test_cancelled_callers():
+    """One caller leaving does not fail the others; the last one stops the work"""
+    flights = SingleFlight()
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.1)
+        finished.append(True)
+        return "done"
+
+    async def main():
+        leader = asyncio.create_task(flights.run("k", work))
+        follower = asyncio.create_task(flights.run("k", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await follower == "done"
+
+        lonely = asyncio.create_task(flights.run("k", work))
+        await asyncio.sleep(0.01)
+        lonely.cancel()
+        await asyncio.gather(lonely, return_exceptions=True)
+        await asyncio.sleep(0.15)
+
+    asyncio.run(main())
+    assert finished == [True]
+    assert flights.in_flight == 0
+
+
+def test_abandoned_run_winds_down_first():
+    """The last caller leaving waits for the run to stop; a new call starts only after it"""
+    flights = SingleFlight()
+    events = []
+    unhandled = []
+
+    async def work():
+        events.append("start")
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            # Killing pandoc takes a moment and may fail
+            await asyncio.sleep(0.05)
+            events.append("stopped")
+            raise RuntimeError("pandoc did not exit cleanly")
+        return "done"
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+        lonely = asyncio.create_task(flights.run("k", work))
+        await asyncio.sleep(0.01)
+        lonely.cancel()
+        await asyncio.sleep(0)
+        retry = asyncio.create_task(flights.run("k", work))
+        await asyncio.gather(lonely, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        retry.cancel()
+        await asyncio.gather(retry, return_exceptions=True)
+        del lonely, retry
+        gc.collect()
+
+    asyncio.run(main())
+    print("Events:", events, "Stats:", flights.stats())
+    assert events == ["start", "stopped", "start", "stopped"]
+    assert flights.stats() == {"in_flight": 0, "leaders": 2, "followers": 0}
+    assert unhandled == []
+
+
+def test_render_docx_deduplicates():
+    """Identical cold-cache render_docx() calls share one pandoc run"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    markdown = f"# Single flight {uuid.uuid4()}\n\n$x^2$\n"
+    before = conversion_flights.stats()
+
+    async def main():
+        return await asyncio.gather(*(render_docx(markdown) for _ in range(4)))
+
+    results = asyncio.run(main())
+    after = conversion_flights.stats()
+    print("Stats:", after)
+    assert all(result is not None and result.startswith(b"PK") for result in results)
+    assert after["leaders"] - before["leaders"] == 1
+    assert after["followers"] - before["followers"] == 3
+
+
+if __name__ == "__main__":
+    test_identical_calls_share_one_run()
+    test_cancelled_callers()
+    test_abandoned_run_winds_down_first()
+    test_render_docx_deduplicates()
+    print("All single flight tests passed")
@@ -0,0 +1,54 @@
+"""
+Test script for single-round-trip conversions (DOCX in the response body)
+"""
+import io
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils import DOCX_DIR, check_pandoc_installed
+
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def test_stream_query_flag():
+    """?stream=true returns the DOCX and writes nothing to disk"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    before = set(DOCX_DIR.iterdir())
+    with TestClient(app) as client:
+        response = client.post("/convert/text?stream=true", json={"markdown": "# Hello", "filename": "notes"})
+
+    print("Headers:", response.headers["content-type"], response.headers["content-disposition"])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == DOCX_MEDIA_TYPE
+    assert response.headers["content-disposition"].startswith('attachment; filename="notes_')
+    assert "word/document.xml" in zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+    assert set(DOCX_DIR.iterdir()) == before
+
+
+def test_stream_accept_header():
+    """An Accept header with the DOCX media type also streams the result"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/convert/upload",
+            files={"file": ("report.md", b"# Report", "text/markdown")},
+            headers={"Accept": DOCX_MEDIA_TYPE}
+        )
+
+    print("Upload streamed:", response.status_code, len(response.content), "bytes")
+    assert response.status_code == 200
+    assert response.content.startswith(b"PK")
+
+
+if __name__ == "__main__":
+    test_stream_query_flag()
+    test_stream_accept_header()
+    print("All streaming response tests passed")
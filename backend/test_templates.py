@@ -0,0 +1,134 @@
+"""
+Test script for reference DOCX templates
+"""
+import io
+import subprocess
+import tempfile
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from main import app
+from utils import TemplateRegistry, check_pandoc_installed
+
+BRAND_STYLE = (
+    '<w:style w:type="paragraph" w:customStyle="1" w:styleId="BrandNote">'
+    '<w:name w:val="Brand Note"/></w:style>'
+)
+
+
+def _branded_reference_docx() -> bytes:
+    """pandoc's default reference.docx with one extra style"""
+    default = subprocess.run(
+        ["pandoc", "--print-default-data-file", "reference.docx"],
+        capture_output=True,
+        check=True
+    ).stdout
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(default)) as source, zipfile.ZipFile(output, "w") as target:
+        for info in source.infolist():
+            data = source.read(info)
+            if info.filename == "word/styles.xml":
+                data = data.replace(b"</w:styles>", BRAND_STYLE.encode() + b"</w:styles>")
+            target.writestr(info, data)
+    return output.getvalue()
+
+
+def _styles_of(docx_bytes: bytes) -> bytes:
+    with zipfile.ZipFile(io.BytesIO(docx_bytes)) as archive:
+        return archive.read("word/styles.xml")
+
+
+def test_template_lifecycle():
+    """A registered template styles text, upload and batch conversions"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    with TestClient(app) as client:
+        response = client.put(
+            "/templates/brand-test",
+            files={"file": ("brand.docx", _branded_reference_docx())}
+        )
+        print("Registered:", response.status_code, response.json()["sha256"])
+        assert response.status_code == 200
+        assert "Brand Note" in response.json()["styles"]
+        assert "brand-test" in [t["name"] for t in client.get("/templates").json()["templates"]]
+
+        try:
+            body = {"markdown": "# Styled", "template": "brand-test"}
+            styled = client.post("/convert/text?stream=true", json=body)
+            plain = client.post("/convert/text?stream=true", json={"markdown": "# Styled"})
+            assert styled.status_code == 200
+            assert b"Brand Note" in _styles_of(styled.content)
+            assert b"Brand Note" not in _styles_of(plain.content)
+
+            upload = client.post(
+                "/convert/upload?stream=true&template=brand-test",
+                files={"file": ("styled.md", b"# Styled", "text/markdown")}
+            )
+            assert b"Brand Note" in _styles_of(upload.content)
+
+            batch = client.post("/convert/batch", json=[body, {"markdown": "# Plain"}])
+            with zipfile.ZipFile(io.BytesIO(batch.content)) as archive:
+                assert b"Brand Note" in _styles_of(archive.read("document_1.docx"))
+                assert b"Brand Note" not in _styles_of(archive.read("document_2.docx"))
+        finally:
+            assert client.delete("/templates/brand-test").status_code == 200
+
+        assert client.get("/templates/brand-test").status_code == 404
+
+
+def test_invalid_templates():
+    """Unknown names and non-DOCX uploads are rejected"""
+    with TestClient(app) as client:
+        unknown = client.post("/convert/text", json={"markdown": "# x", "template": "missing"})
+        print("Unknown template:", unknown.status_code, unknown.json())
+        assert unknown.status_code == 400
+
+        not_docx = client.put("/templates/broken", files={"file": ("broken.docx", b"not a zip")})
+        print("Invalid upload:", not_docx.status_code, not_docx.json())
+        assert not_docx.status_code == 400
+
+        bad_name = client.put("/templates/bad.name", files={"file": ("a.docx", b"x")})
+        assert bad_name.status_code == 400
+
+
+def test_templates_shared_between_processes():
+    """A registry sees templates another process registered, replaced or deleted"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Two registries on one directory, like two server workers
+        first = TemplateRegistry(directory)
+        second = TemplateRegistry(directory)
+        first.load()
+        second.load()
+
+        registered = first.register("shared", _branded_reference_docx())
+        found = second.get("shared")
+        assert found is not None and found.sha256 == registered.sha256
+        assert [t.name for t in second.list()] == ["shared"]
+
+        default = subprocess.run(
+            ["pandoc", "--print-default-data-file", "reference.docx"],
+            capture_output=True,
+            check=True
+        ).stdout
+        replaced = first.register("shared", default)
+        print("Replaced:", registered.sha256[:12], "->", replaced.sha256[:12])
+        assert replaced.sha256 != registered.sha256
+        assert second.get("shared").sha256 == replaced.sha256
+
+        assert first.remove("shared")
+        assert second.get("shared") is None
+        assert second.list() == []
+
+
+if __name__ == "__main__":
+    test_template_lifecycle()
+    test_invalid_templates()
+    test_templates_shared_between_processes()
+    print("All template tests passed")
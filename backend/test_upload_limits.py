@@ -0,0 +1,85 @@
+"""
+Test script for size-limited, chunked uploads
+"""
+import asyncio
+import io
+
+from fastapi import FastAPI, HTTPException, Request, UploadFile
+from fastapi.testclient import TestClient
+
+from main import app
+from utils import MAX_UPLOAD_BYTES
+from web.middleware import BodySizeLimitMiddleware
+from web.routes import conversion
+
+
+def _limited_app(max_bytes: int) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, limits=[("/echo", max_bytes)])
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_content_length_limit():
+    """Bodies announcing a size over the limit are rejected with 413"""
+    client = _limited_app(100)
+    small = client.post("/echo", content=b"x" * 100)
+    large = client.post("/echo", content=b"x" * 101)
+    print("Small:", small.status_code, "Large:", large.status_code)
+    assert small.json() == {"size": 100}
+    assert large.status_code == 413
+
+
+def test_streamed_body_limit():
+    """Chunked bodies without Content-Length are cut off at the limit"""
+    client = _limited_app(100)
+
+    def chunks():
+        for _ in range(5):
+            yield b"x" * 30
+
+    response = client.post("/echo", content=chunks())
+    print("Chunked:", response.status_code, response.json())
+    assert response.status_code == 413
+
+
+def test_jobs_body_limit():
+    """POST /jobs rejects bodies over MAX_UPLOAD_BYTES before queueing them"""
+    body = b'{"markdown": "' + b"x" * MAX_UPLOAD_BYTES + b'"}'
+    with TestClient(app) as client:
+        response = client.post("/jobs", content=body, headers={"Content-Type": "application/json"})
+    print("Oversized job:", response.status_code)
+    assert response.status_code == 413
+
+
+def test_incremental_utf8_decoding():
+    """Multi-byte characters split across chunks decode correctly"""
+    original_chunk_size = conversion.UPLOAD_CHUNK_SIZE
+    conversion.UPLOAD_CHUNK_SIZE = 7
+    try:
+        text = "é€😀 ( x ) " * 50
+        upload = UploadFile(io.BytesIO(text.encode("utf-8")), filename="a.md")
+        assert asyncio.run(conversion._read_markdown_upload(upload)) == text
+
+        invalid = UploadFile(io.BytesIO("ok".encode("utf-8") + b"\xe2\x82"), filename="b.md")
+        try:
+            asyncio.run(conversion._read_markdown_upload(invalid))
+        except HTTPException as e:
+            print("Truncated UTF-8:", e.status_code, e.detail)
+            assert e.status_code == 400
+        else:
+            raise AssertionError("expected HTTPException")
+    finally:
+        conversion.UPLOAD_CHUNK_SIZE = original_chunk_size
+
+
+if __name__ == "__main__":
+    test_content_length_limit()
+    test_streamed_body_limit()
+    test_jobs_body_limit()
+    test_incremental_utf8_decoding()
+    print("All upload limit tests passed")
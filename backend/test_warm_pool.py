@@ -0,0 +1,109 @@
+"""
+Test script for the pool of pre-spawned pandoc processes
+"""
+import asyncio
+from pathlib import Path
+
+from utils import check_pandoc_installed, pandoc
+from utils.pandoc import PandocWarmPool
+
+
+def _convert_with(pool: PandocWarmPool, conversions: int, pause: float = 0.3):
+    async def run():
+        pool.start()
+        try:
+            results = []
+            for _ in range(conversions):
+                await asyncio.sleep(pause)
+                results.append(await pandoc.convert_markdown_to_docx_bytes("# Warm\n\n$x$"))
+            return results
+        finally:
+            await pool.stop()
+
+    original = pandoc.pandoc_warm_pool
+    pandoc.pandoc_warm_pool = pool
+    try:
+        return asyncio.run(run())
+    finally:
+        pandoc.pandoc_warm_pool = original
+
+
+def test_warm_processes_are_used():
+    """Conversions take pre-spawned processes and the pool refills itself"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    pool = PandocWarmPool(size=2, max_age=60)
+    results = _convert_with(pool, 3)
+    print("Stats:", pool.stats())
+    assert all(result.startswith(b"PK") for result in results)
+    assert pool.stats()["hits"] == 3
+    assert pool.stats()["spawned"] >= 5
+    assert pool.stats()["idle"] == 0
+
+
+def test_expired_processes_are_replaced():
+    """Idle processes past max_age are killed instead of used"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    pool = PandocWarmPool(size=1, max_age=0)
+    results = _convert_with(pool, 2)
+    print("Stats:", pool.stats())
+    assert all(result.startswith(b"PK") for result in results)
+    assert pool.stats()["hits"] == 0
+    assert pool.stats()["expired"] == 2
+
+
+def test_disabled_pool():
+    """A pool of size 0 never hands out processes"""
+    pool = PandocWarmPool(size=0)
+
+    async def run():
+        pool.start()
+        return pool.take(pandoc.DOCX_STDIN_ARGS)
+
+    assert asyncio.run(run()) is None
+    assert pool.stats()["misses"] == 0
+
+
+def test_only_recent_templates_stay_warm():
+    """Argument lists beyond max_extra lose their idle processes, least recently used first"""
+    if not check_pandoc_installed():
+        print("Pandoc not installed, skipping")
+        return
+
+    pool = PandocWarmPool(size=1, max_age=60, max_extra=1)
+    first = pandoc.docx_stdin_args(Path("first.docx"))
+    second = pandoc.docx_stdin_args(Path("second.docx"))
+
+    async def run():
+        pool.start()
+        try:
+            cold = pool.take(first)
+            await asyncio.sleep(0.5)
+            first_idle = len(pool._idle[tuple(first)])
+            pool.take(second)
+            await asyncio.sleep(0.5)
+            return cold, first_idle, pool.stats()
+        finally:
+            await pool.stop()
+
+    cold, first_idle, stats = asyncio.run(run())
+    print("Stats:", stats)
+    assert cold is None
+    assert first_idle == 1
+    assert list(pool._extra) == [tuple(second)]
+    assert stats["warm_args"] == 2
+    assert stats["idle"] == 2
+    assert stats["misses"] == 2
+
+
+if __name__ == "__main__":
+    test_warm_processes_are_used()
+    test_expired_processes_are_replaced()
+    test_disabled_pool()
+    test_only_recent_templates_stay_warm()
+    print("All warm pool tests passed")
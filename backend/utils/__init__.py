@@ -1,18 +1,148 @@
 """
 Initialize utils package
 """
-from .pandoc import check_pandoc_installed, convert_md_to_docx
-from .markdown_processor import fix_latex_formulas, preprocess_markdown
-from .config import BASE_DIR, UPLOADS_DIR, MD_DIR, DOCX_DIR, ALLOWED_ORIGINS
+from .pandoc import (
+    PandocInfo,
+    PandocServerBackend,
+    PandocServerError,
+    PandocWarmPool,
+    check_pandoc_installed,
+    convert_md_to_docx,
+    convert_markdown_to_docx_bytes,
+    pandoc_registry,
+    pandoc_server_backend,
+    pandoc_warm_pool,
+    probe_pandoc,
+    run_pandoc_async,
+    save_docx
+)
+from .scheduler import (
+    LANE_BULK,
+    LANE_INTERACTIVE,
+    LANES,
+    PandocScheduler,
+    pandoc_scheduler,
+    select_lane
+)
+from .metrics import (
+    METRICS_CONTENT_TYPE,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    conversion_cancellations,
+    conversion_failures,
+    docx_size_bytes,
+    metrics_registry,
+    pandoc_in_flight,
+    pandoc_killed,
+    stage_seconds
+)
+from .markdown_processor import PreprocessingTimeout, fix_latex_formulas, preprocess_markdown
+from .preprocess_pool import PreprocessingCrashed, PreprocessPool, preprocess_pool
+from .cache import ResultCache, make_cache_key, result_cache
+from .docx_merge import DocxMergeError, merge_docx
+from .sections import convert_markdown_sections_to_docx, split_markdown_sections
+from .templates import TemplateError, TemplateInfo, TemplateRegistry, template_registry
+from .admission import AdmissionController, AdmissionRejected, admission_controller
+from .singleflight import SingleFlight, conversion_flights
+from .decompression import SUPPORTED_ENCODINGS, BodyDecoder, DecompressionError, body_decoder
+from .pipeline import CONVERSION_OPTIONS, render_docx
+from .zipstream import ZipStream
+from .janitor import UploadJanitor, upload_janitor
+from .jobs import ConversionJob, JobManager, JobQueueFull, job_manager
+from .config import (
+    BASE_DIR,
+    UPLOADS_DIR,
+    MD_DIR,
+    DOCX_DIR,
+    ALLOWED_ORIGINS,
+    BATCH_MAX_BYTES,
+    BATCH_MAX_CONCURRENCY,
+    BATCH_MAX_ITEMS,
+    MAX_DECOMPRESSED_BYTES,
+    MAX_UPLOAD_BYTES,
+    TEMPLATE_MAX_BYTES,
+    UPLOAD_CHUNK_SIZE
+)
 
 __all__ = [
+    'PandocInfo',
+    'PandocServerBackend',
+    'PandocServerError',
+    'PandocWarmPool',
     'check_pandoc_installed',
     'convert_md_to_docx',
+    'convert_markdown_to_docx_bytes',
+    'pandoc_registry',
+    'pandoc_server_backend',
+    'pandoc_warm_pool',
+    'probe_pandoc',
+    'run_pandoc_async',
+    'save_docx',
+    'LANE_BULK',
+    'LANE_INTERACTIVE',
+    'LANES',
+    'PandocScheduler',
+    'pandoc_scheduler',
+    'select_lane',
+    'METRICS_CONTENT_TYPE',
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'MetricsRegistry',
+    'conversion_cancellations',
+    'conversion_failures',
+    'docx_size_bytes',
+    'metrics_registry',
+    'pandoc_in_flight',
+    'pandoc_killed',
+    'stage_seconds',
+    'PreprocessingTimeout',
     'fix_latex_formulas',
     'preprocess_markdown',
+    'PreprocessingCrashed',
+    'PreprocessPool',
+    'preprocess_pool',
+    'ResultCache',
+    'make_cache_key',
+    'result_cache',
+    'DocxMergeError',
+    'merge_docx',
+    'convert_markdown_sections_to_docx',
+    'split_markdown_sections',
+    'TemplateError',
+    'TemplateInfo',
+    'TemplateRegistry',
+    'template_registry',
+    'AdmissionController',
+    'AdmissionRejected',
+    'admission_controller',
+    'SingleFlight',
+    'conversion_flights',
+    'SUPPORTED_ENCODINGS',
+    'BodyDecoder',
+    'DecompressionError',
+    'body_decoder',
+    'CONVERSION_OPTIONS',
+    'render_docx',
+    'ZipStream',
+    'UploadJanitor',
+    'upload_janitor',
+    'ConversionJob',
+    'JobManager',
+    'JobQueueFull',
+    'job_manager',
     'BASE_DIR',
     'UPLOADS_DIR',
     'MD_DIR',
     'DOCX_DIR',
-    'ALLOWED_ORIGINS'
+    'ALLOWED_ORIGINS',
+    'BATCH_MAX_BYTES',
+    'BATCH_MAX_CONCURRENCY',
+    'BATCH_MAX_ITEMS',
+    'MAX_DECOMPRESSED_BYTES',
+    'MAX_UPLOAD_BYTES',
+    'TEMPLATE_MAX_BYTES',
+    'UPLOAD_CHUNK_SIZE'
 ]
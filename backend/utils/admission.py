@@ -0,0 +1,243 @@
+"""
+Admission control for the conversion endpoints
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from .config import (
+    ADMISSION_MAX_ACTIVE,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_WAIT,
+    PRIORITY_BULK_RESERVED,
+    PRIORITY_INTERACTIVE_RESERVED
+)
+from .metrics import admission_active, admission_queued, admission_rejections
+from .scheduler import LANE_BULK, LANE_INTERACTIVE, LANES
+
+# Longest Retry-After ever suggested, in seconds
+MAX_RETRY_AFTER = 300
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries the suggested retry delay"""
+    
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Request not admitted ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounds the number of conversions in progress.
+    
+    Up to `max_active` conversions run at once. Like the pandoc slots,
+    admission slots are shared between the priority lanes: each lane has
+    `reserved` slots no other lane may take, so bulk conversions (batches,
+    uploads, X-Priority: bulk) can never hold every slot while an
+    interactive request waits. A freed slot goes to the interactive lane
+    first. Further conversions wait in a FIFO queue per lane of at most
+    `max_queue` entries, for at most `max_wait` seconds; anything beyond
+    that is rejected straight away instead of piling more pandoc work onto
+    a saturated node. The suggested retry delay is the expected time for
+    the queue ahead to drain, based on a moving average of how long
+    admitted conversions take.
+    
+    Args:
+        max_active: Conversions in progress at once (0 disables admission control)
+        max_queue: Conversions of each lane allowed to wait for a slot
+        max_wait: Seconds a conversion may wait before it is rejected (0 waits forever)
+        reserved: Slots reserved for each lane (defaults to the reservations
+            of the pandoc priority lanes, cut down to fit `max_active`)
+    """
+    
+    def __init__(
+        self,
+        max_active: int = ADMISSION_MAX_ACTIVE,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        max_wait: float = ADMISSION_MAX_WAIT,
+        reserved: Optional[Dict[str, int]] = None
+    ):
+        if reserved is None:
+            reserved = {
+                LANE_INTERACTIVE: PRIORITY_INTERACTIVE_RESERVED,
+                LANE_BULK: PRIORITY_BULK_RESERVED
+            }
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.reserved = {}
+        free = max(max_active, 0)
+        for lane in LANES:
+            self.reserved[lane] = min(max(reserved.get(lane, 0), 0), free)
+            free -= self.reserved[lane]
+        self.lane_active = {lane: 0 for lane in LANES}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        self._service_seconds = None
+        
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.total_wait_seconds = 0.0
+    
+    @property
+    def enabled(self) -> bool:
+        """False if admission control is switched off"""
+        return self.max_active > 0
+    
+    @property
+    def active(self) -> int:
+        """Conversions currently holding a slot"""
+        return sum(self.lane_active.values())
+    
+    @property
+    def queued(self) -> int:
+        """Conversions currently waiting for a slot"""
+        return sum(len(waiters) for waiters in self._waiters.values())
+    
+    def retry_after(self, lane: str = LANE_INTERACTIVE) -> int:
+        """Seconds until a new conversion in a lane would likely be admitted"""
+        service = self._service_seconds or 1.0
+        slots = self.max_active - sum(
+            reserved for other, reserved in self.reserved.items() if other != lane
+        )
+        waves = (len(self._waiters[lane]) + 1) / max(slots, 1)
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(service * waves)))
+    
+    def _reject(self, reason: str, lane: str) -> AdmissionRejected:
+        if reason == "queue_full":
+            self.rejected_queue_full += 1
+        else:
+            self.rejected_timeout += 1
+        admission_rejections.inc(reason=reason)
+        return AdmissionRejected(reason, self.retry_after(lane))
+    
+    def _can_start(self, lane: str) -> bool:
+        # Slots other lanes have reserved but are not using stay free for them
+        held_back = sum(
+            max(0, reserved - self.lane_active[other])
+            for other, reserved in self.reserved.items() if other != lane
+        )
+        return self.active + held_back < self.max_active
+    
+    def _start(self, lane: str) -> None:
+        self.lane_active[lane] += 1
+        admission_active.inc()
+    
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting conversions, interactive lane first"""
+        for lane in LANES:
+            waiters = self._waiters[lane]
+            while waiters and self._can_start(lane):
+                future = waiters.popleft()
+                if not future.done():
+                    self._start(lane)
+                    future.set_result(None)
+    
+    async def acquire(self, lane: str) -> None:
+        """
+        Wait for a free slot in a priority lane
+        
+        Args:
+            lane: One of utils.scheduler.LANES
+        
+        Raises:
+            AdmissionRejected: If the lane's queue is full or the wait took too long
+        """
+        waiters = self._waiters[lane]
+        if not waiters and self._can_start(lane):
+            self._start(lane)
+            self.admitted += 1
+            return
+        if len(waiters) >= self.max_queue:
+            raise self._reject("queue_full", lane)
+        
+        future = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        admission_queued.inc()
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(future, timeout=self.max_wait if self.max_wait > 0 else None)
+        except asyncio.TimeoutError:
+            raise self._reject("timeout", lane)
+        except asyncio.CancelledError:
+            # The client went away; a slot handed over meanwhile goes to the next waiter
+            if future.done() and not future.cancelled():
+                self.release(lane)
+            raise
+        finally:
+            if future in waiters:
+                waiters.remove(future)
+            admission_queued.dec()
+            self.total_wait_seconds += time.monotonic() - started
+        self.admitted += 1
+    
+    def release(self, lane: str, service_seconds: Optional[float] = None) -> None:
+        """
+        Give a slot back, handing it to the next waiter that may take it
+        
+        Args:
+            lane: The lane the slot was acquired in
+            service_seconds: How long the conversion held the slot, if it completed
+        """
+        if service_seconds is not None:
+            # Exponential moving average, so bursts of slow documents show quickly
+            if self._service_seconds is None:
+                self._service_seconds = service_seconds
+            else:
+                self._service_seconds += 0.2 * (service_seconds - self._service_seconds)
+        
+        self.lane_active[lane] -= 1
+        admission_active.dec()
+        self._dispatch()
+    
+    @asynccontextmanager
+    async def admit(self, lane: str):
+        """
+        Hold a slot in a priority lane for the enclosed block
+        
+        Raises:
+            AdmissionRejected: If the conversion cannot be admitted
+        """
+        if not self.enabled:
+            yield
+            return
+        await self.acquire(lane)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(lane, time.monotonic() - started)
+    
+    def stats(self) -> dict:
+        """Current load and admission counters"""
+        return {
+            "enabled": self.enabled,
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "max_wait": self.max_wait,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "total_wait_seconds": self.total_wait_seconds,
+            "service_seconds": self._service_seconds,
+            "retry_after": self.retry_after(),
+            "lanes": {
+                lane: {
+                    "reserved": self.reserved[lane],
+                    "active": self.lane_active[lane],
+                    "queued": len(self._waiters[lane]),
+                    "retry_after": self.retry_after(lane)
+                }
+                for lane in LANES
+            }
+        }
+
+
+admission_controller = AdmissionController()
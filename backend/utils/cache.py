@@ -0,0 +1,235 @@
+"""
+Content-addressed cache for converted DOCX files
+"""
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+from .config import RESULT_CACHE_DIR, RESULT_CACHE_DISK_BYTES, RESULT_CACHE_MEMORY_BYTES
+from .metrics import result_cache_evictions, result_cache_hits, result_cache_misses
+
+
+def make_cache_key(processed_markdown: str, pandoc_version: Optional[str], options: dict) -> str:
+    """
+    Build the cache key for a conversion
+    
+    Args:
+        processed_markdown: Markdown after preprocess_markdown()
+        pandoc_version: Version of the pandoc that produces the output
+        options: Conversion options that influence the output
+    
+    Returns:
+        Hex digest identifying the conversion result
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([pandoc_version, options], sort_keys=True).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(processed_markdown.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier LRU cache of DOCX bytes keyed by make_cache_key().
+    
+    The memory tier holds the most recently used results up to
+    `memory_max_bytes`. Every result is also written to `cache_dir`, which
+    is trimmed to `disk_max_bytes` by evicting the least recently used
+    files (tracked through their mtime). Disk reads, writes and deletions
+    run in a worker thread so they never stall the event loop; the LRU
+    bookkeeping itself stays on the loop.
+    """
+    
+    def __init__(
+        self,
+        cache_dir: Path = RESULT_CACHE_DIR,
+        memory_max_bytes: int = RESULT_CACHE_MEMORY_BYTES,
+        disk_max_bytes: int = RESULT_CACHE_DISK_BYTES
+    ):
+        self.cache_dir = cache_dir
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._writing = set()
+        
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+        
+        if self.disk_max_bytes > 0:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._load_disk_index()
+    
+    def _load_disk_index(self) -> None:
+        """Rebuild the disk LRU order from the files left by earlier runs"""
+        entries = []
+        for path in self.cache_dir.glob("*.docx"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._delete_files(self._trim_disk())
+    
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.docx"
+    
+    @staticmethod
+    def _read_file(path: Path) -> bytes:
+        data = path.read_bytes()
+        # The mtime records recency for the next start's LRU order
+        os.utime(path)
+        return data
+    
+    @staticmethod
+    def _write_file(path: Path, data: bytes) -> None:
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+    
+    @staticmethod
+    def _delete_files(paths: List[Path]) -> None:
+        for path in paths:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a conversion result
+        
+        Args:
+            key: Cache key from make_cache_key()
+        
+        Returns:
+            The cached DOCX bytes, or None on a miss
+        """
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            result_cache_hits.inc(tier="memory")
+            return data
+        
+        # Files written by other workers sharing the directory are adopted
+        if self.disk_max_bytes > 0:
+            try:
+                data = await asyncio.to_thread(self._read_file, self._path(key))
+            except FileNotFoundError:
+                # Never written, or removed behind our back (another worker or eviction)
+                self._disk_bytes -= self._disk.pop(key, 0)
+            except OSError as e:
+                print(f"Result cache read error: {str(e)}")
+            else:
+                if key not in self._disk:
+                    self._disk[key] = len(data)
+                    self._disk_bytes += len(data)
+                self._disk.move_to_end(key)
+                self.disk_hits += 1
+                result_cache_hits.inc(tier="disk")
+                self._remember(key, data)
+                return data
+        
+        self.misses += 1
+        result_cache_misses.inc()
+        return None
+    
+    async def put(self, key: str, data: bytes) -> None:
+        """
+        Store a conversion result in both tiers
+        
+        Args:
+            key: Cache key from make_cache_key()
+            data: DOCX bytes
+        """
+        self._remember(key, data)
+        
+        if (
+            self.disk_max_bytes <= 0
+            or len(data) > self.disk_max_bytes
+            or key in self._disk
+            or key in self._writing
+        ):
+            return
+        
+        self._writing.add(key)
+        try:
+            await asyncio.to_thread(self._write_file, self._path(key), data)
+        except OSError as e:
+            print(f"Result cache write error: {str(e)}")
+            return
+        finally:
+            self._writing.discard(key)
+        
+        self._disk[key] = len(data)
+        self._disk_bytes += len(data)
+        evicted = self._trim_disk()
+        if evicted:
+            await asyncio.to_thread(self._delete_files, evicted)
+    
+    def _remember(self, key: str, data: bytes) -> None:
+        """Insert into the memory tier, evicting least recently used entries"""
+        if self.memory_max_bytes <= 0 or len(data) > self.memory_max_bytes:
+            return
+        
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.memory_evictions += 1
+            result_cache_evictions.inc(tier="memory")
+    
+    def _trim_disk(self) -> List[Path]:
+        """Drop least recently used entries until the disk tier fits; returns their files"""
+        evicted = []
+        while self._disk_bytes > self.disk_max_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            evicted.append(self._path(key))
+            self.disk_evictions += 1
+            result_cache_evictions.inc(tier="disk")
+        return evicted
+    
+    def stats(self) -> dict:
+        """Counters and sizes used to tune the cache budgets"""
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_evictions": self.memory_evictions,
+            "disk_evictions": self.disk_evictions,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_max_bytes": self.memory_max_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+            "disk_max_bytes": self.disk_max_bytes
+        }
+
+
+result_cache = ResultCache()
@@ -1,6 +1,7 @@
 """
 Configuration and constants for the application
 """
+import os
 from pathlib import Path
 
 # Base directories
@@ -22,3 +23,107 @@ ALLOWED_ORIGINS = [
     "http://127.0.0.1:5173",
     "http://127.0.0.1:8080"
 ]
+
+# Pandoc settings
+# Seconds between background re-probes of the pandoc installation (0 disables)
+PANDOC_REFRESH_INTERVAL = float(os.getenv("PANDOC_REFRESH_INTERVAL", "300"))
+# Maximum number of pandoc processes running at once in one worker
+PANDOC_MAX_CONCURRENCY = int(os.getenv("PANDOC_MAX_CONCURRENCY", str(os.cpu_count() or 1)))
+# Seconds a single pandoc run may take before it is killed
+PANDOC_TIMEOUT = float(os.getenv("PANDOC_TIMEOUT", "30"))
+# Conversion backend: "cli" runs one pandoc process per conversion, "server"
+# sends conversions to long-lived `pandoc server` processes (CLI fallback)
+PANDOC_BACKEND = os.getenv("PANDOC_BACKEND", "cli").lower()
+# Number of `pandoc server` processes kept running by the server backend
+PANDOC_SERVER_PROCESSES = int(os.getenv("PANDOC_SERVER_PROCESSES", str(PANDOC_MAX_CONCURRENCY)))
+# Seconds between health checks of the `pandoc server` processes
+PANDOC_SERVER_HEALTH_INTERVAL = float(os.getenv("PANDOC_SERVER_HEALTH_INTERVAL", "30"))
+# Conversions after which a `pandoc server` process is recycled (0 never recycles)
+PANDOC_SERVER_MAX_USES = int(os.getenv("PANDOC_SERVER_MAX_USES", "0"))
+# Idle pandoc CLI processes kept ready for the next conversion (0 disables)
+PANDOC_WARM_POOL_SIZE = int(os.getenv("PANDOC_WARM_POOL_SIZE", "2"))
+# Seconds an idle pre-spawned pandoc process is kept before it is replaced
+PANDOC_WARM_POOL_MAX_AGE = float(os.getenv("PANDOC_WARM_POOL_MAX_AGE", "300"))
+# Most recently used templates that also get idle pandoc processes (0 warms none)
+PANDOC_WARM_POOL_TEMPLATES = int(os.getenv("PANDOC_WARM_POOL_TEMPLATES", "4"))
+
+# Result cache settings
+RESULT_CACHE_DIR = Path(os.getenv("RESULT_CACHE_DIR", str(UPLOADS_DIR / "cache")))
+# Byte budgets for the in-memory LRU tier and the on-disk tier (0 disables a tier)
+RESULT_CACHE_MEMORY_BYTES = int(os.getenv("RESULT_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_DISK_BYTES = int(os.getenv("RESULT_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+
+# Retention settings for uploads/md and uploads/docx
+# Seconds a file is kept after it was written (0 keeps it until the quota needs space)
+UPLOAD_TTL_MD = float(os.getenv("UPLOAD_TTL_MD", str(60 * 60)))
+UPLOAD_TTL_DOCX = float(os.getenv("UPLOAD_TTL_DOCX", str(24 * 60 * 60)))
+# Total bytes allowed across both directories; oldest files go first (0 disables)
+UPLOADS_QUOTA_BYTES = int(os.getenv("UPLOADS_QUOTA_BYTES", str(5 * 1024 * 1024 * 1024)))
+# Seconds between retention sweeps (0 disables the janitor)
+JANITOR_INTERVAL = float(os.getenv("JANITOR_INTERVAL", "300"))
+
+# Job settings
+# Number of background jobs converted at once
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(PANDOC_MAX_CONCURRENCY)))
+# Maximum number of jobs waiting to run
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))
+# Seconds a finished job stays queryable (matches the DOCX retention by default)
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(UPLOAD_TTL_DOCX or 24 * 60 * 60)))
+
+# Reference DOCX template settings
+TEMPLATES_DIR = Path(os.getenv("TEMPLATES_DIR", str(UPLOADS_DIR / "templates")))
+# Maximum size of an uploaded reference DOCX, in bytes (0 disables)
+TEMPLATE_MAX_BYTES = int(os.getenv("TEMPLATE_MAX_BYTES", str(10 * 1024 * 1024)))
+
+# Admission control settings for the /convert endpoints
+# Conversions in progress at once (0 disables admission control)
+ADMISSION_MAX_ACTIVE = int(os.getenv("ADMISSION_MAX_ACTIVE", str(PANDOC_MAX_CONCURRENCY)))
+# Conversions of each priority lane allowed to wait for a slot; further requests get 503 right away
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", str(4 * ADMISSION_MAX_ACTIVE)))
+# Seconds a conversion may wait for a slot before its request gets 503 (0 waits forever)
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "10"))
+
+# Priority lane settings for the pandoc slots
+# Largest document, in characters, a /convert/text or /convert/markdown
+# request may have to run in the interactive lane
+PRIORITY_INTERACTIVE_MAX_SIZE = int(os.getenv("PRIORITY_INTERACTIVE_MAX_SIZE", str(64 * 1024)))
+# Relative share of contended pandoc slots given to each lane
+PRIORITY_INTERACTIVE_WEIGHT = int(os.getenv("PRIORITY_INTERACTIVE_WEIGHT", "4"))
+PRIORITY_BULK_WEIGHT = int(os.getenv("PRIORITY_BULK_WEIGHT", "1"))
+# Pandoc slots only the lane may use (defaults keep at least one shared slot)
+PRIORITY_INTERACTIVE_RESERVED = int(os.getenv(
+    "PRIORITY_INTERACTIVE_RESERVED",
+    str(max(1, PANDOC_MAX_CONCURRENCY // 4) if PANDOC_MAX_CONCURRENCY >= 2 else 0)
+))
+PRIORITY_BULK_RESERVED = int(os.getenv("PRIORITY_BULK_RESERVED", "1" if PANDOC_MAX_CONCURRENCY >= 3 else "0"))
+
+# Upload settings
+# Maximum request body size of the single document endpoints, in bytes (0 disables)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+# Size of the chunks uploaded files are read and decoded in
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+# Largest request body accepted after Content-Encoding decompression, in bytes (0 disables)
+MAX_DECOMPRESSED_BYTES = int(os.getenv("MAX_DECOMPRESSED_BYTES", str(200 * 1024 * 1024)))
+
+# Preprocessing settings
+# Seconds a single request may spend preprocessing markdown (0 disables)
+PREPROCESS_TIME_BUDGET = float(os.getenv("PREPROCESS_TIME_BUDGET", "10"))
+# Worker processes for preprocessing large documents (0 preprocesses on the event loop)
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", str(os.cpu_count() or 1)))
+# Smallest document, in characters, preprocessed in a worker process
+PREPROCESS_POOL_MIN_SIZE = int(os.getenv("PREPROCESS_POOL_MIN_SIZE", str(256 * 1024)))
+
+# Large document settings
+# Smallest document, in characters, split at top-level headings and converted
+# section by section in parallel (0 disables)
+SECTION_PARALLEL_MIN_SIZE = int(os.getenv("SECTION_PARALLEL_MIN_SIZE", str(1024 * 1024)))
+# Maximum number of sections one document is converted in
+SECTION_PARALLEL_MAX_PARTS = int(os.getenv("SECTION_PARALLEL_MAX_PARTS", str(PANDOC_MAX_CONCURRENCY)))
+
+# Batch conversion settings
+# Maximum number of documents accepted by one /convert/batch request
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+# Maximum number of documents of one batch converted at once
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", str(PANDOC_MAX_CONCURRENCY)))
+# Maximum request body size of /convert/batch, in bytes (0 disables)
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
@@ -0,0 +1,98 @@
+"""
+Incremental decoders for compressed request bodies
+"""
+import zlib
+from typing import Iterator, Optional
+
+# Largest piece of output produced from one step of decompression
+OUTPUT_CHUNK_SIZE = 64 * 1024
+
+# Request Content-Encodings that can be decoded with bounded output
+SUPPORTED_ENCODINGS = ("gzip", "x-gzip", "deflate")
+
+
+class DecompressionError(Exception):
+    """Raised when a request body is not valid data in its declared encoding"""
+
+
+class BodyDecoder:
+    """
+    Decompresses a body chunk by chunk, never producing more than a bounded
+    amount of output from one step.
+    
+    Args:
+        encoding: Content-Encoding of the body
+    """
+    
+    def __init__(self, encoding: str):
+        if encoding not in SUPPORTED_ENCODINGS:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+        self.encoding = encoding
+        self._zlib = self._new_zlib()
+    
+    def _new_zlib(self):
+        # 31: gzip header, 15: zlib header (what HTTP calls "deflate")
+        return zlib.decompressobj(wbits=15 if self.encoding == "deflate" else 31)
+    
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        """
+        Decompress the next chunk of the body
+        
+        Yields:
+            Decompressed pieces of at most OUTPUT_CHUNK_SIZE bytes
+        
+        Raises:
+            DecompressionError: If the data is corrupt
+        """
+        try:
+            yield from self._feed_zlib(data)
+        except zlib.error as e:
+            raise DecompressionError(f"Invalid {self.encoding} data: {str(e)}")
+    
+    def _feed_zlib(self, data: bytes) -> Iterator[bytes]:
+        while True:
+            if self._zlib.eof:
+                if not data:
+                    return
+                # gzip bodies may hold several members back to back
+                if self.encoding == "deflate":
+                    raise DecompressionError("Unexpected data after the end of the deflate stream")
+                self._zlib = self._new_zlib()
+            piece = self._zlib.decompress(data, OUTPUT_CHUNK_SIZE)
+            if piece:
+                yield piece
+            data = self._zlib.unconsumed_tail or (self._zlib.unused_data if self._zlib.eof else b"")
+            # A full piece may leave more output buffered even without input
+            if not data and len(piece) < OUTPUT_CHUNK_SIZE:
+                return
+    
+    def finish(self) -> None:
+        """
+        Check that the body was complete
+        
+        Raises:
+            DecompressionError: If the compressed stream ended early
+        """
+        if not self._zlib.eof:
+            raise DecompressionError(f"Truncated {self.encoding} data")
+
+
+def body_decoder(encoding: Optional[str]) -> Optional[BodyDecoder]:
+    """
+    Create a decoder for a Content-Encoding header value
+    
+    Args:
+        encoding: The header value ("identity" and None need no decoding)
+    
+    Returns:
+        A decoder, or None if the body is not compressed
+    
+    Raises:
+        ValueError: If the encoding is not one of SUPPORTED_ENCODINGS
+    """
+    encoding = (encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return None
+    if encoding not in SUPPORTED_ENCODINGS:
+        raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+    return BodyDecoder(encoding)
@@ -0,0 +1,329 @@
+"""
+Merging of DOCX files converted separately by pandoc
+"""
+import io
+import re
+import zipfile
+from typing import Dict, List, Tuple
+
+# Relationships that belong to the content of one document (everything else
+# points at shared parts such as styles.xml that every section has too)
+_CONTENT_RELATIONSHIPS = ("/hyperlink", "/image")
+
+_RELATIONSHIP = re.compile(r'<Relationship\s[^>]*?/>')
+_ATTRIBUTE = re.compile(r'([\w:]+)="([^"]*)"')
+_RELATIONSHIP_REF = re.compile(r'(<[\w:]+\s[^>]*?\br:(?:id|embed|link)=")([^"]*)(")')
+_BOOKMARK_ID = re.compile(r'(<w:bookmark(?:Start|End)\s[^>]*?\bw:id=")(\d+)(")')
+_BOOKMARK_NAME = re.compile(r'(<w:bookmarkStart\s[^>]*?\bw:name=")([^"]*)(")')
+_DRAWING_ID = re.compile(r'(<(?:wp:docPr|pic:cNvPr)\s[^>]*?\bid=")(\d+)(")')
+_FOOTNOTE = re.compile(r'<w:footnote\s[^>]*?\bw:id="(-?\d+)"[^>]*>.*?</w:footnote>', re.S)
+_FOOTNOTE_ID = re.compile(r'(<w:footnote\s[^>]*?\bw:id=")(-?\d+)(")')
+_FOOTNOTE_REF = re.compile(r'(<w:footnoteReference\s[^>]*?\bw:id=")(-?\d+)(")')
+_ABSTRACT_NUM = re.compile(r'<w:abstractNum\s[^>]*?\bw:abstractNumId="(\d+)"[^>]*>.*?</w:abstractNum>', re.S)
+_ABSTRACT_NUM_ID = re.compile(r'(<w:abstractNum\s[^>]*?\bw:abstractNumId=")(\d+)(")')
+_ABSTRACT_NUM_REF = re.compile(r'(<w:abstractNumId\s[^>]*?\bw:val=")(\d+)(")')
+_NSID = re.compile(r'(<w:nsid\s[^>]*?\bw:val=")([0-9A-Fa-f]+)(")')
+_NUM = re.compile(r'<w:num\s[^>]*?\bw:numId="(\d+)"[^>]*>.*?</w:num>', re.S)
+_NUM_ID = re.compile(r'(<w:num\s[^>]*?\bw:numId=")(\d+)(")')
+_NUM_REF = re.compile(r'(<w:numId\s[^>]*?\bw:val=")(\d+)(")')
+
+
+class DocxMergeError(Exception):
+    """Raised when documents contain parts that cannot be merged safely"""
+
+
+def _renumber(pattern: re.Pattern, text: str, mapping) -> str:
+    """Rewrite the value captured by `pattern` (group 2) with `mapping`"""
+    return pattern.sub(lambda m: m.group(1) + mapping(m.group(2)) + m.group(3), text)
+
+
+def _max_id(pattern: re.Pattern, text: str, default: int = 0) -> int:
+    return max((int(m.group(2)) for m in pattern.finditer(text)), default=default)
+
+
+def _relationships(rels: str) -> List[Tuple[str, Dict[str, str]]]:
+    return [(m.group(0), dict(_ATTRIBUTE.findall(m.group(0)))) for m in _RELATIONSHIP.finditer(rels)]
+
+
+class _DocxMerger:
+    """
+    Appends the bodies of DOCX files to a base DOCX.
+    
+    All documents must come from the same pandoc version and reference
+    document, so styles, settings and section properties are taken from
+    the base. What is local to a document is renumbered so it cannot clash:
+    hyperlink and image relationships (and their media), list numbering
+    instances, footnotes, bookmarks and drawing ids. Bookmark names that
+    already exist get a "-N" suffix, as pandoc gives duplicate headings.
+    """
+    
+    def __init__(self, base: bytes):
+        with zipfile.ZipFile(io.BytesIO(base)) as archive:
+            self.parts = {name: archive.read(name) for name in archive.namelist()}
+        
+        document = self._text("word/document.xml")
+        body_end = document.rfind("<w:sectPr")
+        if body_end == -1:
+            body_end = document.rfind("</w:body>")
+        if body_end == -1:
+            raise DocxMergeError("Base document has no body")
+        self.bodies = [document[:body_end]]
+        self.document_tail = document[body_end:]
+        
+        self.document_rels = self._text("word/_rels/document.xml.rels")
+        self.footnote_rels = self._text("word/_rels/footnotes.xml.rels", "")
+        self.numbering = self._text("word/numbering.xml", "")
+        self.footnotes = self._text("word/footnotes.xml", "")
+        self.content_types = self._text("[Content_Types].xml")
+        
+        self.bookmark_names = {m.group(2) for m in _BOOKMARK_NAME.finditer(document)}
+        self.next_bookmark = _max_id(_BOOKMARK_ID, document) + 1
+        self.next_drawing = _max_id(_DRAWING_ID, document) + 1
+        self.next_footnote = _max_id(_FOOTNOTE_ID, self.footnotes) + 1
+        self.next_abstract_num = _max_id(_ABSTRACT_NUM_ID, self.numbering) + 1
+        self.next_num = _max_id(_NUM_ID, self.numbering) + 1
+        
+        # Identical list definitions are shared instead of duplicated
+        self.abstract_nums = {
+            self._definition(m.group(0)): m.group(1) for m in _ABSTRACT_NUM.finditer(self.numbering)
+        }
+        self.new_abstract_nums: List[str] = []
+        self.new_nums: List[str] = []
+        self.new_footnotes: List[str] = []
+    
+    def _text(self, name: str, default: str = None) -> str:
+        if name not in self.parts:
+            if default is None:
+                raise DocxMergeError(f"Base document has no {name}")
+            return default
+        return self.parts[name].decode("utf-8")
+    
+    @staticmethod
+    def _definition(abstract_num: str) -> str:
+        """An abstractNum without its id and nsid, for comparing definitions"""
+        abstract_num = _renumber(_ABSTRACT_NUM_ID, abstract_num, lambda _: "")
+        return _renumber(_NSID, abstract_num, lambda _: "")
+    
+    def _merge_relationships(
+        self,
+        archive: zipfile.ZipFile,
+        rels_name: str,
+        base_rels: str,
+        index: int
+    ) -> Tuple[str, Dict[str, str]]:
+        """Copy the content relationships of a part, returning the new rels and the id mapping"""
+        if rels_name not in archive.namelist():
+            return base_rels, {}
+        
+        shared = {(attrs.get("Type"), attrs.get("Target")) for _, attrs in _relationships(base_rels)}
+        mapping = {}
+        added = []
+        section_types = archive.read("[Content_Types].xml").decode("utf-8")
+        for element, attrs in _relationships(archive.read(rels_name).decode("utf-8")):
+            rel_type = attrs.get("Type", "")
+            target = attrs.get("Target", "")
+            if not rel_type.endswith(_CONTENT_RELATIONSHIPS):
+                if (rel_type, target) not in shared:
+                    raise DocxMergeError(f"Unexpected relationship {rel_type} -> {target}")
+                continue
+            
+            new_id = f"rIdS{index}x{attrs['Id']}"
+            element = element.replace(f'Id="{attrs["Id"]}"', f'Id="{new_id}"')
+            if rel_type.endswith("/image") and attrs.get("TargetMode") != "External":
+                new_target = self._copy_media(archive, section_types, target, index)
+                element = element.replace(f'Target="{target}"', f'Target="{new_target}"')
+            mapping[attrs["Id"]] = new_id
+            added.append(element)
+        
+        if added and "</Relationships>" not in base_rels:
+            raise DocxMergeError(f"Base document has no {rels_name}")
+        return base_rels.replace("</Relationships>", "".join(added) + "</Relationships>"), mapping
+    
+    def _copy_media(self, archive: zipfile.ZipFile, section_types: str, target: str, index: int) -> str:
+        """Copy an embedded file under a name unique to its section"""
+        source = f"word/{target}"
+        directory, _, filename = target.rpartition("/")
+        new_target = f"{directory}/s{index}_{filename}" if directory else f"s{index}_{filename}"
+        if f"word/{new_target}" in self.parts:
+            return new_target
+        self.parts[f"word/{new_target}"] = archive.read(source)
+        
+        override = re.search(rf'<Override\s[^>]*?PartName="/{re.escape(source)}"[^>]*/>', section_types)
+        if override:
+            element = override.group(0).replace(f'PartName="/{source}"', f'PartName="/word/{new_target}"')
+            self.content_types = self.content_types.replace("</Types>", element + "</Types>")
+        else:
+            extension = filename.rpartition(".")[2]
+            default = re.search(rf'<Default\s[^>]*?Extension="{re.escape(extension)}"[^>]*/>', section_types)
+            if default and f'Extension="{extension}"' not in self.content_types:
+                self.content_types = self.content_types.replace("<Default", default.group(0) + "<Default", 1)
+        return new_target
+    
+    def add(self, index: int, data: bytes) -> None:
+        """Append the body of another DOCX"""
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            names = set(archive.namelist())
+            document = archive.read("word/document.xml").decode("utf-8")
+            body_start = document.find("<w:body>")
+            body_end = document.rfind("<w:sectPr")
+            if body_end == -1:
+                body_end = document.rfind("</w:body>")
+            if body_start == -1 or body_end < body_start:
+                raise DocxMergeError(f"Section {index} has no body")
+            body = document[body_start + len("<w:body>"):body_end]
+            
+            if "word/comments.xml" in names and b"<w:comment " in archive.read("word/comments.xml"):
+                raise DocxMergeError("Comments cannot be merged")
+            
+            self.document_rels, document_map = self._merge_relationships(
+                archive, "word/_rels/document.xml.rels", self.document_rels, index
+            )
+            self.footnote_rels, footnote_rel_map = self._merge_relationships(
+                archive, "word/_rels/footnotes.xml.rels", self.footnote_rels, index
+            )
+            numbering = archive.read("word/numbering.xml").decode("utf-8") if "word/numbering.xml" in names else ""
+            footnotes = archive.read("word/footnotes.xml").decode("utf-8") if "word/footnotes.xml" in names else ""
+        
+        body = self._map_relationships(body, document_map)
+        body = self._renumber_drawings(body)
+        
+        # Bookmarks: fresh ids, and unique names for duplicate headings
+        bookmark_offset = self.next_bookmark
+        body = _renumber(_BOOKMARK_ID, body, lambda value: str(int(value) + bookmark_offset))
+        self.next_bookmark = _max_id(_BOOKMARK_ID, body, bookmark_offset) + 1
+        renamed = {}
+        for match in _BOOKMARK_NAME.finditer(body):
+            name = new_name = match.group(2)
+            suffix = 1
+            while new_name in self.bookmark_names:
+                new_name = f"{name}-{suffix}"
+                suffix += 1
+            self.bookmark_names.add(new_name)
+            if new_name != name:
+                renamed[name] = new_name
+        # Internal links keep their target: in one document they would
+        # point at the first heading of that name too
+        if renamed:
+            body = _renumber(_BOOKMARK_NAME, body, lambda value: renamed.get(value, value))
+        
+        body = self._merge_numbering(body, numbering)
+        body = self._merge_footnotes(body, footnotes, footnote_rel_map)
+        self.bodies.append(body)
+    
+    def _map_relationships(self, xml: str, mapping: Dict[str, str]) -> str:
+        def rewrite(value: str) -> str:
+            if value not in mapping:
+                raise DocxMergeError(f"Reference to unknown relationship {value}")
+            return mapping[value]
+        return _renumber(_RELATIONSHIP_REF, xml, rewrite)
+    
+    def _renumber_drawings(self, xml: str) -> str:
+        offset = self.next_drawing
+        xml = _renumber(_DRAWING_ID, xml, lambda value: str(int(value) + offset))
+        self.next_drawing = _max_id(_DRAWING_ID, xml, offset) + 1
+        return xml
+    
+    def _merge_numbering(self, body: str, numbering: str) -> str:
+        abstract_map = {}
+        for match in _ABSTRACT_NUM.finditer(numbering):
+            definition = self._definition(match.group(0))
+            if definition not in self.abstract_nums:
+                new_id = str(self.next_abstract_num)
+                self.next_abstract_num += 1
+                element = _renumber(_ABSTRACT_NUM_ID, match.group(0), lambda _: new_id)
+                element = _renumber(_NSID, element, lambda _: f"{int(new_id) & 0xFFFFFFFF:08X}")
+                self.new_abstract_nums.append(element)
+                self.abstract_nums[definition] = new_id
+            abstract_map[match.group(1)] = self.abstract_nums[definition]
+        
+        num_map = {}
+        for match in _NUM.finditer(numbering):
+            new_id = str(self.next_num)
+            self.next_num += 1
+            num_map[match.group(1)] = new_id
+            element = _renumber(_NUM_ID, match.group(0), lambda _: new_id)
+            element = _renumber(_ABSTRACT_NUM_REF, element, lambda value: abstract_map.get(value, value))
+            self.new_nums.append(element)
+        
+        def rewrite(value: str) -> str:
+            if value not in num_map:
+                raise DocxMergeError(f"Reference to unknown list {value}")
+            return num_map[value]
+        return _renumber(_NUM_REF, body, rewrite)
+    
+    def _merge_footnotes(self, body: str, footnotes: str, rel_map: Dict[str, str]) -> str:
+        footnote_map = {}
+        for match in _FOOTNOTE.finditer(footnotes):
+            # Ids -1 and 0 are the separators every document defines
+            if int(match.group(1)) <= 0:
+                continue
+            new_id = str(self.next_footnote)
+            self.next_footnote += 1
+            footnote_map[match.group(1)] = new_id
+            element = _renumber(_FOOTNOTE_ID, match.group(0), lambda _: new_id)
+            element = self._map_relationships(element, rel_map)
+            self.new_footnotes.append(self._renumber_drawings(element))
+        
+        def rewrite(value: str) -> str:
+            if value not in footnote_map:
+                raise DocxMergeError(f"Reference to unknown footnote {value}")
+            return footnote_map[value]
+        return _renumber(_FOOTNOTE_REF, body, rewrite)
+    
+    def result(self) -> bytes:
+        """Write the merged DOCX"""
+        parts = dict(self.parts)
+        parts["word/document.xml"] = "".join(self.bodies) + self.document_tail
+        parts["word/_rels/document.xml.rels"] = self.document_rels
+        parts["[Content_Types].xml"] = self.content_types
+        
+        if self.new_abstract_nums or self.new_nums:
+            if "</w:numbering>" not in self.numbering:
+                raise DocxMergeError("Base document has no numbering part")
+            numbering = self.numbering
+            first_num = _NUM.search(numbering)
+            insert_at = first_num.start() if first_num else numbering.rfind("</w:numbering>")
+            numbering = numbering[:insert_at] + "".join(self.new_abstract_nums) + numbering[insert_at:]
+            parts["word/numbering.xml"] = numbering.replace(
+                "</w:numbering>", "".join(self.new_nums) + "</w:numbering>"
+            )
+        
+        if self.new_footnotes:
+            if "</w:footnotes>" not in self.footnotes:
+                raise DocxMergeError("Base document has no footnotes part")
+            parts["word/footnotes.xml"] = self.footnotes.replace(
+                "</w:footnotes>", "".join(self.new_footnotes) + "</w:footnotes>"
+            )
+            if self.footnote_rels:
+                parts["word/_rels/footnotes.xml.rels"] = self.footnote_rels
+        
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, data in parts.items():
+                archive.writestr(name, data.encode("utf-8") if isinstance(data, str) else data)
+        return output.getvalue()
+
+
+def merge_docx(documents: List[bytes]) -> bytes:
+    """
+    Concatenate DOCX files produced by pandoc into one document
+    
+    Args:
+        documents: DOCX files in document order, all converted with the
+            same pandoc options and reference document
+    
+    Returns:
+        The merged DOCX, styled and laid out like the first document
+    
+    Raises:
+        DocxMergeError: If a document contains parts that cannot be merged
+    """
+    if not documents:
+        raise DocxMergeError("Nothing to merge")
+    try:
+        merger = _DocxMerger(documents[0])
+        for index, document in enumerate(documents[1:], start=1):
+            merger.add(index, document)
+        return merger.result()
+    except (zipfile.BadZipFile, KeyError, UnicodeDecodeError) as e:
+        raise DocxMergeError(f"Invalid document: {str(e)}")
@@ -0,0 +1,182 @@
+"""
+Retention of uploaded and converted files
+"""
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .config import (
+    DOCX_DIR,
+    JANITOR_INTERVAL,
+    MD_DIR,
+    UPLOAD_TTL_DOCX,
+    UPLOAD_TTL_MD,
+    UPLOADS_QUOTA_BYTES
+)
+from .metrics import janitor_reclaimed_bytes, janitor_scan_seconds
+
+
+class UploadJanitor:
+    """
+    Background retention for the upload directories.
+    
+    Every `interval` seconds the directories are scanned in a worker thread,
+    so conversions on the event loop are never blocked. Files older than
+    their directory's TTL are deleted first; if the remaining files still
+    exceed `quota_bytes`, the oldest ones are deleted until they fit.
+    
+    Args:
+        directories: (directory, ttl seconds) pairs; a TTL of 0 keeps files
+            until the quota needs the space
+        quota_bytes: Total size allowed across all directories (0 disables)
+        interval: Seconds between sweeps (0 disables the background task)
+    """
+    
+    def __init__(
+        self,
+        directories: List[Tuple[Path, float]] = None,
+        quota_bytes: int = UPLOADS_QUOTA_BYTES,
+        interval: float = JANITOR_INTERVAL
+    ):
+        if directories is None:
+            directories = [(MD_DIR, UPLOAD_TTL_MD), (DOCX_DIR, UPLOAD_TTL_DOCX)]
+        self.directories = directories
+        self.quota_bytes = quota_bytes
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        
+        self.sweeps = 0
+        self.expired_files = 0
+        self.evicted_files = 0
+        self.reclaimed_bytes = 0
+        self.last_sweep_at: Optional[float] = None
+        self.last_scan_seconds: Optional[float] = None
+        self.tracked_files = 0
+        self.tracked_bytes = 0
+    
+    def _delete(self, path: str, size: int, reason: str) -> bool:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            print(f"Janitor error deleting {path}: {str(e)}")
+            return False
+        self.reclaimed_bytes += size
+        janitor_reclaimed_bytes.inc(size, reason=reason)
+        return True
+    
+    def sweep(self) -> dict:
+        """
+        Delete expired files, then the oldest files beyond the quota (blocking)
+        
+        Returns:
+            Files deleted and bytes reclaimed by this sweep
+        """
+        started = time.monotonic()
+        now = time.time()
+        reclaimed_before = self.reclaimed_bytes
+        expired = 0
+        remaining = []
+        in_progress_bytes = 0
+        
+        for directory, ttl in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                try:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                if ttl > 0 and now - stat.st_mtime > ttl:
+                    if self._delete(entry.path, stat.st_size, "expired"):
+                        expired += 1
+                elif entry.name.startswith("."):
+                    # Temporary file of a write in progress: counted, never evicted
+                    in_progress_bytes += stat.st_size
+                else:
+                    remaining.append((stat.st_mtime, entry.path, stat.st_size))
+        
+        total = in_progress_bytes + sum(size for _, _, size in remaining)
+        kept = len(remaining)
+        evicted = 0
+        if self.quota_bytes > 0 and total > self.quota_bytes:
+            remaining.sort()
+            for _, path, size in remaining:
+                if total <= self.quota_bytes:
+                    break
+                total -= size
+                kept -= 1
+                if self._delete(path, size, "quota"):
+                    evicted += 1
+        
+        self.sweeps += 1
+        self.expired_files += expired
+        self.evicted_files += evicted
+        self.tracked_files = kept
+        self.tracked_bytes = total
+        self.last_sweep_at = now
+        self.last_scan_seconds = time.monotonic() - started
+        janitor_scan_seconds.observe(self.last_scan_seconds)
+        
+        return {
+            "expired_files": expired,
+            "evicted_files": evicted,
+            "reclaimed_bytes": self.reclaimed_bytes - reclaimed_before
+        }
+    
+    async def sweep_async(self) -> dict:
+        """Run a sweep in a worker thread without blocking the event loop"""
+        return await asyncio.to_thread(self.sweep)
+    
+    def start(self) -> None:
+        """Start the background sweep loop on the running event loop"""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._sweep_loop())
+    
+    async def stop(self) -> None:
+        """Cancel the background sweep loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _sweep_loop(self) -> None:
+        while True:
+            try:
+                result = await self.sweep_async()
+                if result["expired_files"] or result["evicted_files"]:
+                    print(
+                        f"Janitor: deleted {result['expired_files']} expired and "
+                        f"{result['evicted_files']} over-quota files "
+                        f"({result['reclaimed_bytes']} bytes)"
+                    )
+            except Exception as e:
+                print(f"Janitor error: {str(e)}")
+            await asyncio.sleep(self.interval)
+    
+    def stats(self) -> dict:
+        """Counters describing retention activity"""
+        return {
+            "sweeps": self.sweeps,
+            "expired_files": self.expired_files,
+            "evicted_files": self.evicted_files,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "last_sweep_at": self.last_sweep_at,
+            "last_scan_seconds": self.last_scan_seconds,
+            "tracked_files": self.tracked_files,
+            "tracked_bytes": self.tracked_bytes,
+            "quota_bytes": self.quota_bytes
+        }
+
+
+upload_janitor = UploadJanitor()
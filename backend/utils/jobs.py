@@ -0,0 +1,200 @@
+"""
+Background conversion jobs
+"""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from .config import DOCX_DIR, JOB_MAX_QUEUED, JOB_RETENTION_SECONDS, JOB_WORKERS
+from .markdown_processor import PreprocessingTimeout
+from .pandoc import save_docx
+from .pipeline import render_docx
+from .preprocess_pool import PreprocessingCrashed
+from .scheduler import LANE_BULK
+from .templates import TemplateInfo
+
+
+class JobQueueFull(Exception):
+    """Raised when no more jobs can be queued"""
+
+
+@dataclass
+class ConversionJob:
+    """State of one queued markdown to DOCX conversion"""
+    filename: str
+    markdown: Optional[str] = field(default=None, repr=False)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    template: Optional[TemplateInfo] = field(default=None, repr=False)
+    
+    def to_dict(self) -> dict:
+        """Public view of the job, including queue and run timings"""
+        queued_until = self.started_at or self.finished_at or time.time()
+        run_seconds = None
+        if self.started_at is not None:
+            run_seconds = (self.finished_at or time.time()) - self.started_at
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "template": self.template.name if self.template is not None else None,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queued_seconds": queued_until - self.created_at,
+            "run_seconds": run_seconds
+        }
+
+
+class JobManager:
+    """
+    Queue of conversion jobs executed by a pool of asyncio workers.
+    
+    Jobs run the same preprocess + pandoc pipeline as the synchronous
+    endpoints and save the result to DOCX_DIR, where it is served by the
+    regular download route. Finished jobs are forgotten after `retention`
+    seconds.
+    
+    Args:
+        workers: Number of jobs converted at once
+        max_queued: Maximum number of jobs waiting to run
+        retention: Seconds finished jobs are kept for status queries
+    """
+    
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_MAX_QUEUED,
+        retention: float = JOB_RETENTION_SECONDS
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self._jobs = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop = None
+    
+    def start(self) -> None:
+        """Start the worker pool on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._tasks and self._loop is loop:
+            return
+        # Asyncio queues and tasks cannot be shared across event loops
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        for job in self._jobs.values():
+            # Jobs left over from a previous loop can no longer run
+            if job.status in ("queued", "running"):
+                self._finish(job, "Job was interrupted")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def stop(self) -> None:
+        """Cancel the workers; unfinished jobs are marked as failed"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        for job in self._jobs.values():
+            if job.status in ("queued", "running"):
+                self._finish(job, "Job was interrupted")
+    
+    def submit(self, markdown: str, filename: str, template: Optional[TemplateInfo] = None) -> ConversionJob:
+        """
+        Queue a conversion
+        
+        Args:
+            markdown: The original markdown content
+            filename: Name of the DOCX file to create in DOCX_DIR
+            template: Optional reference DOCX template to style the output with
+        
+        Returns:
+            The queued job
+        
+        Raises:
+            JobQueueFull: If `max_queued` jobs are already waiting
+        """
+        self.start()
+        self._prune()
+        job = ConversionJob(filename=filename, markdown=markdown, template=template)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"{self.max_queued} jobs are already queued")
+        self._jobs[job.id] = job
+        return job
+    
+    def get(self, job_id: str) -> Optional[ConversionJob]:
+        """Look up a job by id (None if unknown or expired)"""
+        self._prune()
+        return self._jobs.get(job_id)
+    
+    def _finish(self, job: ConversionJob, error: Optional[str] = None) -> None:
+        job.status = "failed" if error else "done"
+        job.error = error
+        job.finished_at = time.time()
+        job.markdown = None
+    
+    def _prune(self) -> None:
+        """Forget finished jobs older than the retention period"""
+        cutoff = time.time() - self.retention
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+    
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+    
+    async def _run(self, job: ConversionJob) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            docx_bytes = await render_docx(job.markdown, job.template, LANE_BULK)
+            if docx_bytes is None:
+                self._finish(job, "Failed to convert markdown to DOCX. Please check your markdown syntax.")
+                return
+            await asyncio.to_thread(save_docx, docx_bytes, DOCX_DIR / job.filename)
+        except PreprocessingTimeout:
+            self._finish(job, "The markdown took too long to process. Please split it into smaller documents.")
+        except PreprocessingCrashed:
+            self._finish(job, "The markdown crashed the preprocessing worker. Please split it into smaller documents.")
+        except asyncio.CancelledError:
+            self._finish(job, "Job was interrupted")
+            raise
+        except Exception as e:
+            self._finish(job, f"An error occurred during conversion: {str(e)}")
+        else:
+            self._finish(job)
+    
+    def stats(self) -> dict:
+        """Job counts by status and the current queue depth"""
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            **counts,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "workers": len(self._tasks),
+            "max_queued": self.max_queued
+        }
+
+
+job_manager = JobManager()
@@ -2,9 +2,590 @@
 Markdown processing utilities for converting and fixing markdown content
 """
 import re
+import time
+from bisect import bisect_left
+from typing import Optional
 
 
-def fix_latex_formulas(markdown_content: str) -> str:
+class PreprocessingTimeout(Exception):
+    """Raised when preprocessing exceeds its time budget"""
+
+
+# Notations recognised by fix_latex_formulas(), in the order the conversions
+# were originally applied. Their opening delimiters are combined into one
+# alternation so the document is scanned a single time; at any position the
+# earliest listed construct wins, which reproduces the original pass order.
+# Every branch starts with a literal character so the regex engine can skip
+# quickly to candidate positions.
+#
+# Only the opening delimiters are found with regular expressions; the rest
+# of each formula is matched by the explicit scanners in _FormulaScanner and
+# _InlineScanner, which run in linear time instead of relying on
+# backtracking. The legacy notations are line-anchored, so their opener
+# consumes the newline before the line (the document is scanned with a
+# leading newline added).
+
+# LaTeX-style block delimiters: \[ ... \] (the notation ChatGPT uses)
+_LATEX_OPEN = r'(?P<latex_open>\\\[)'
+
+# LaTeX-style inline delimiters: \( ... \), only with spaces around the content
+_LATEX_INLINE_OPEN = r'(?P<latex_inline>\\\(\s)'
+
+# Legacy formulas in square brackets on their own lines, either multiline
+# ([\na_0 = \frac{1}{T} \int_{T} f(t), dt\n]) or single-line
+# ([ a_0 = \frac{1}{T} \int_{T} f(t), dt ])
+_LEGACY_OPEN = r'\n[^\S\n]*(?P<legacy_open>\[)'
+# A converted \[ ... \] block stands on lines of its own, so a legacy
+# formula may also start right after one
+_LEGACY_AFTER_BLOCK_PATTERN = re.compile(r'\s*\[')
+
+# Inline formulas in parentheses with spaces: ( formula )
+# The spaces distinguish math variables from normal parentheses like (x)
+_PAREN_OPEN = r'(?P<paren_inline>\([^\S\n])'
+
+# Inline formulas in brackets within text: The formula [x = y] is simple
+# Not preceded by \left or \right (those are LaTeX bracket commands)
+_BRACKET_OPEN = r'(?P<bracket_inline>\[(?<!\\left\[)(?<!\\right\[))'
+
+_FORMULA_PATTERN = re.compile(
+    '|'.join([
+        _LATEX_OPEN,
+        _LATEX_INLINE_OPEN,
+        _LEGACY_OPEN,
+        _PAREN_OPEN,
+        _BRACKET_OPEN
+    ])
+)
+_LATEX_INLINE_OPEN_PATTERN = re.compile(_LATEX_INLINE_OPEN)
+_INLINE_OPEN_PATTERN = re.compile(_PAREN_OPEN + '|' + _BRACKET_OPEN)
+_PAREN_OPEN_PATTERN = re.compile(_PAREN_OPEN)
+# The bracket content cannot contain brackets, so this lazy match stops at
+# the next bracket or newline and never rescans text
+_BRACKET_INLINE_PATTERN = re.compile(r'\[(?P<formula>[^\[\]\n]+?)\](?!\$)')
+# Closing delimiters preceded by the whitespace they require
+_PAREN_CLOSE_PATTERN = re.compile(r'(?<=[^\S\n])\)')
+_LATEX_INLINE_CLOSE_PATTERN = re.compile(r'(?<=\s)\\\)')
+_BRACKET_CHAR_PATTERN = re.compile(r'[\[\]]')
+_WHITESPACE_PATTERN = re.compile(r'\s*')
+_HSPACE_PATTERN = re.compile(r'[^\S\n]*')
+_NEWLINE_PATTERN = re.compile(r'\n')
+_LEFT_RIGHT_BRACKET_PATTERN = re.compile(r'\\left\[|\\right\]')
+_BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+
+# How many candidate delimiters are examined between two time budget checks
+_DEADLINE_CHECK_INTERVAL = 64
+
+
+def _looks_like_paren_formula(formula: str) -> bool:
+    """
+    Decide whether the content of ( ... ) is a formula or variable:
+    1. Contains LaTeX commands (backslash)
+    2. Contains subscripts/superscripts with braces
+    3. Has mathematical operators: =, <, >, ≤, ≥, ≠
+    4. Contains both ^ (superscript) and math symbols
+    5. Is short (≤6 chars) - likely a variable like T, x, f(t)
+    """
+    has_latex = '\\' in formula
+    has_subscript_superscript = ('^' in formula and '{' in formula) or ('_' in formula and '{' in formula)
+    has_math_operator = any(op in formula for op in ['=', '<', '>', '≤', '≥', '≠'])
+    has_superscript_simple = '^' in formula  # Like B^2
+    is_short = len(formula) <= 6
+    
+    return (has_latex or
+            has_subscript_superscript or
+            has_math_operator or
+            (has_superscript_simple and any(c in formula for c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ+-*/')) or
+            is_short)
+
+
+def _looks_like_bracket_formula(formula: str) -> bool:
+    """Only treat [ ... ] inside text as a formula if it contains LaTeX commands"""
+    return ('\\' in formula or ('_' in formula and '{' in formula) or
+            ('^' in formula and '{' in formula))
+
+
+def _skip_inline_line(line: str) -> bool:
+    r"""Lines that are block formulas, empty or use \left[ / \right] are left alone"""
+    stripped = line.strip()
+    return (stripped.startswith('$$') or not stripped or
+            '\\left[' in line or '\\right]' in line)
+
+
+class _InlineScanner:
+    r"""
+    Matches the inline notations \( formula \), ( formula ) and [ formula ]
+    in one piece of text.
+    
+    The formula inside \( ... \) and ( ... ) is the shortest text on the
+    line that is followed by whitespace and the closing delimiter. A lazy
+    pattern such as \(\s+(.+?)\s+\) finds it by trying every length, and
+    retries the whole rest of the line from every opening delimiter when
+    there is no closing one, which takes quadratic time on long lines.
+    Here the next closing delimiter and the next newline are looked up with
+    forward searches whose results are cached, so a scan stays linear in
+    the size of the text. The matches are the ones the patterns would find.
+    """
+    
+    def __init__(self, text: str):
+        self.text = text
+        # (searched_from, index) of the last lookup of each search
+        self.lookups = {}
+    
+    def _find(self, pattern, pos: int) -> int:
+        """Start of the first `pattern` match at or after `pos`, or -1 if there is none"""
+        # The last lookup covers [searched_from, found); lookups only move
+        # forward while the text is scanned, so each search is short
+        searched_from, found = self.lookups.get(pattern, (len(self.text) + 1, -1))
+        if not (searched_from <= pos and (found == -1 or pos <= found)):
+            match = pattern.search(self.text, pos)
+            found = match.start() if match is not None else -1
+            self.lookups[pattern] = (pos, found)
+        return found
+    
+    def _line_end(self, pos: int) -> int:
+        """Index of the newline ending the line at `pos`, or the text length"""
+        found = self._find(_NEWLINE_PATTERN, pos)
+        return found if found != -1 else len(self.text)
+    
+    def _formula_end(self, content_start: int, close: int) -> int:
+        """Start of the whitespace before `close`, keeping at least one formula character"""
+        text = self.text
+        end = close - 1
+        while end > content_start + 1 and text[end - 1].isspace():
+            end -= 1
+        return end
+    
+    def match_paren(self, start: int):
+        """
+        Match ( formula ) opening at `start`
+        
+        Returns:
+            (end, formula) or None if there is no match here
+        """
+        text = self.text
+        content_start = _HSPACE_PATTERN.match(text, start + 1).end()
+        close = self._find(_PAREN_CLOSE_PATTERN, content_start + 2)
+        if close != -1 and close < self._line_end(content_start):
+            return close + 1, text[content_start:self._formula_end(content_start, close)]
+        # With the ) right after the opening spaces, the formula is a single
+        # one of those spaces
+        if text.startswith(')', content_start) and content_start - start >= 4:
+            return content_start + 1, text[content_start - 2]
+        return None
+    
+    def match_latex(self, start: int):
+        r"""
+        Match \( formula \) opening at `start`
+        
+        The whitespace around the formula may span lines, the formula may not.
+        
+        Returns:
+            (end, formula) or None if there is no match here
+        """
+        text = self.text
+        content_start = _WHITESPACE_PATTERN.match(text, start + 2).end()
+        close = self._find(_LATEX_INLINE_CLOSE_PATTERN, content_start + 2)
+        if close != -1:
+            formula_end = self._formula_end(content_start, close)
+            if formula_end <= self._line_end(content_start):
+                return close + 2, text[content_start:formula_end]
+        # With the \) right after the opening whitespace, the formula is a
+        # single one of those whitespace characters
+        if text.startswith('\\)', content_start):
+            for pos in range(content_start - 2, start + 2, -1):
+                if text[pos] != '\n':
+                    return content_start + 2, text[pos]
+        return None
+    
+    def replace_inline(self, kind: str, start: int):
+        """
+        Convert the ( formula ) or [ formula ] opening at `start`
+        
+        Returns:
+            (end, replacement) or None if there is no match here
+        """
+        text = self.text
+        if kind == 'paren_inline':
+            match = self.match_paren(start)
+            if match is None:
+                return None
+            end, formula = match
+            formula = formula.strip()
+            if _looks_like_paren_formula(formula):
+                return end, f"${formula}$"
+            return end, text[start:end]
+        
+        match = _BRACKET_INLINE_PATTERN.match(text, start)
+        if match is None:
+            return None
+        end = match.end()
+        # Parenthesised formulas inside the brackets are converted first
+        body = _convert_inline(match.group('formula'))
+        # A converted ( formula ) right after the bracket would start with $,
+        # which the (?!\$) guard rejects
+        if _PAREN_OPEN_PATTERN.match(text, end):
+            follower = self.match_paren(end)
+            if follower is not None and _looks_like_paren_formula(follower[1].strip()):
+                return end, f"[{body}]"
+        if _looks_like_bracket_formula(body.strip()):
+            return end, f"${body.strip()}$"
+        return end, f"[{body}]"
+    
+    def replace_latex_inline(self, kind: str, start: int):
+        r"""Convert the \( formula \) opening at `start`, like replace_inline()"""
+        match = self.match_latex(start)
+        if match is None:
+            return None
+        end, formula = match
+        return end, f"${formula.strip()}$"
+    
+    def sub(self, pattern, replace) -> str:
+        """Replace every match of `replace` at the openers found by `pattern`"""
+        text = self.text
+        pieces = []
+        copied = pos = 0
+        while True:
+            opener = pattern.search(text, pos)
+            if opener is None:
+                break
+            start = opener.start()
+            replaced = replace(opener.lastgroup, start)
+            if replaced is None:
+                pos = start + 1
+                continue
+            end, replacement = replaced
+            pieces.append(text[copied:start])
+            pieces.append(replacement)
+            copied = pos = end
+        pieces.append(text[copied:])
+        return ''.join(pieces)
+
+
+def _convert_inline(text: str) -> str:
+    """Convert every ( formula ) and [ formula ] in a piece of text"""
+    scanner = _InlineScanner(text)
+    return scanner.sub(_INLINE_OPEN_PATTERN, scanner.replace_inline)
+
+
+def _convert_latex_inline(text: str) -> str:
+    r"""Convert every \( formula \) in a piece of text"""
+    scanner = _InlineScanner(text)
+    return scanner.sub(_LATEX_INLINE_OPEN_PATTERN, scanner.replace_latex_inline)
+
+
+def _convert_inline_lines(text: str) -> str:
+    """Apply inline conversion to every line of a short piece of text"""
+    return '\n'.join(
+        line if _skip_inline_line(line) else _convert_inline(line)
+        for line in text.split('\n')
+    )
+
+
+def _display_formula(formula: str) -> str:
+    return f"\n$$\n{_convert_inline_lines(formula)}\n$$\n"
+
+
+class _FormulaScanner:
+    r"""
+    State for the single fix_latex_formulas() scan.
+    
+    Inline conversions only apply to lines that are not display formulas and
+    do not use \left[ / \right]. Those checks refer to the line as it looks
+    after block conversion, i.e. the current line cut at the \[ ... \] blocks
+    that start or end on it. The line bounds and the positions of its
+    \left[ / \right] are found once per line, and the next \[ ... \] block
+    is looked up with cached forward searches, so long lines are not
+    rescanned for every match.
+    
+    Block formulas are matched by hand rather than with regular expressions:
+    every helper only moves forward over the text (or backward over the
+    whitespace just before a match), and the position of the next \] is
+    cached, so the total work stays linear in the document size even for
+    unterminated or pathological input. Inline formulas are matched by an
+    _InlineScanner over the whole document, which works the same way.
+    """
+    
+    def __init__(self, text: str, deadline: Optional[float] = None):
+        self.text = text
+        self.deadline = deadline
+        self.inline = _InlineScanner(text)
+        self.block_end = 0
+        # (line_start, line_end, positions of \left[ / \right] on the line)
+        self.line = (-1, -1, [])
+        # (segment_start, whether the segment is a $$ display formula)
+        self.display = (-1, False)
+        # (searched_from, index) of the last lookups of the next block / \]
+        self.next_block = (len(text) + 1, -1)
+        self.next_close = (len(text) + 1, -1)
+        self.latex_close = (len(text) + 1, -1)
+    
+    def _segment_skipped(self, pos: int) -> bool:
+        text = self.text
+        line_start, line_end, markers = self.line
+        if not line_start <= pos < line_end:
+            line_start = text.rfind('\n', 0, pos) + 1
+            line_end = text.find('\n', pos)
+            if line_end == -1:
+                line_end = len(text)
+            markers = [
+                marker.start()
+                for marker in _LEFT_RIGHT_BRACKET_PATTERN.finditer(text, line_start, line_end)
+            ]
+            self.line = (line_start, line_end, markers)
+        
+        # A block converted earlier on the line starts a new segment
+        seg_start = max(line_start, self.block_end)
+        if self.display[0] != seg_start:
+            content = _HSPACE_PATTERN.match(text, seg_start).end()
+            self.display = (seg_start, text.startswith('$$', content))
+        if self.display[1]:
+            return True
+        
+        # The segment ends at the next \[ ... \] block, which starts a new
+        # line; a \left[ / \right] only counts if it comes before that
+        index = bisect_left(markers, seg_start)
+        if index == len(markers):
+            return False
+        block = self._next_block(pos)
+        return block == -1 or block > markers[index]
+    
+    def _next_block(self, pos: int) -> int:
+        r"""Index of the first \[ ... \] block starting at or after `pos`, or -1"""
+        searched_from, block = self.next_block
+        if searched_from <= pos and (block == -1 or pos <= block):
+            return block
+        
+        text = self.text
+        block = text.find('\\[', pos)
+        while block != -1:
+            close = self._next_close(block + 2)
+            if close == -1:
+                # No \] follows, so no later \[ opens a block either
+                block = -1
+            elif close == block + 2:
+                block = text.find('\\[', block + 2)
+                continue
+            break
+        self.next_block = (pos, block)
+        return block
+    
+    def _next_close(self, pos: int) -> int:
+        searched_from, close = self.next_close
+        if not (searched_from <= pos and (close == -1 or pos <= close)):
+            close = self.text.find('\\]', pos)
+            self.next_close = (pos, close)
+        return close
+    
+    def _latex_block_end(self, start: int) -> int:
+        r"""
+        Match \[ ... \] opening at `start`
+        
+        The formula runs to the first \] and must not be empty.
+        
+        Returns:
+            Index of the closing \], or -1 if there is no block here
+        """
+        # The last lookup covers [searched_from, close); only the part of the
+        # text it does not cover is searched again
+        searched_from, close = self.latex_close
+        if close != -1 and close < start + 2:
+            close = self.text.find('\\]', start + 2)
+        elif start + 2 < searched_from:
+            earlier = self.text.find('\\]', start + 2, searched_from + 1)
+            if earlier != -1:
+                close = earlier
+        self.latex_close = (start + 2, close)
+        if close <= start + 2:
+            return -1
+        return close
+    
+    def _line_end(self, pos: int) -> int:
+        r"""
+        Match the trailing \s*$ of a legacy formula starting at `pos`
+        
+        Returns:
+            End of the match (before the last newline of the whitespace run,
+            or the end of the text or of the run before a \[ ... \] block),
+            or -1 if non-blank text follows on the line
+        """
+        text = self.text
+        run_end = _WHITESPACE_PATTERN.match(text, pos).end()
+        if run_end == len(text):
+            return run_end
+        # A converted \[ ... \] block starts a new line
+        if text.startswith('\\[', run_end) and self._latex_block_end(run_end) != -1:
+            return run_end
+        return text.rfind('\n', pos, run_end)
+    
+    def _is_bare_bracket(self, pos: int) -> bool:
+        r"""A [ or ] that is not part of \left[, \right[, \left] or \right]"""
+        text = self.text
+        return text[pos - 5:pos] != '\\left' and text[pos - 6:pos] != '\\right'
+    
+    def _match_legacy(self, bracket: int):
+        r"""
+        Match a legacy bracket formula whose opening [ is at `bracket`
+        
+        Multiline form: [ alone on its line, then the formula, then ] alone on
+        its line. Single-line form: [ formula ] with nothing else on the line.
+        Brackets inside the formula are only allowed as \left[, \right[,
+        \left] or \right].
+        
+        Returns:
+            (end, formula, is_block) or None if there is no legacy formula here
+        """
+        text = self.text
+        content_start = _WHITESPACE_PATTERN.match(text, bracket + 1).end()
+        
+        # Multiline form: the formula ends at the first bare bracket, which
+        # must be a ] on a line of its own
+        first_newline = text.find('\n', bracket + 1, content_start)
+        if first_newline != -1:
+            close = _BRACKET_CHAR_PATTERN.search(text, content_start)
+            while close is not None and not self._is_bare_bracket(close.start()):
+                close = _BRACKET_CHAR_PATTERN.search(text, close.end())
+            if close is not None and close.group() == ']':
+                close = close.start()
+                last_newline = text.rfind('\n', first_newline + 2, close)
+                if last_newline != -1 and not text[last_newline + 1:close].strip():
+                    end = self._line_end(close + 1)
+                    if end != -1:
+                        return end, text[bracket + 1:close], True
+        
+        # Single-line form: the formula may not span lines and ends at a ]
+        # followed by the end of the line. Like the regex it replaces, the
+        # ] right after the leading text is tried first, then the first bare
+        # bracket (or a ] opening the next line), and finally the ] of any
+        # \left] / \right] passed on the way, latest first.
+        line_end = text.find('\n', content_start)
+        if line_end == -1:
+            line_end = len(text)
+        candidates = []
+        passed = []
+        close = _BRACKET_CHAR_PATTERN.search(text, content_start, line_end)
+        while close is not None:
+            pos = close.start()
+            bare = self._is_bare_bracket(pos)
+            if close.group() == ']':
+                if bare or not candidates and not passed:
+                    candidates.append(pos)
+                else:
+                    passed.append(pos)
+            elif not bare:
+                passed.append(None)
+            if bare:
+                break
+            close = _BRACKET_CHAR_PATTERN.search(text, close.end(), line_end)
+        else:
+            next_content = _WHITESPACE_PATTERN.match(text, line_end).end()
+            if text[next_content:next_content + 1] == ']':
+                candidates.append(next_content)
+        
+        candidates.extend(pos for pos in reversed(passed) if pos is not None)
+        for pos in candidates:
+            end = self._line_end(pos + 1)
+            if end != -1:
+                return end, text[content_start:pos], False
+        return None
+    
+    def _replace_legacy(self, first: int, legacy, line_break: str) -> str:
+        """
+        Convert a legacy formula matched by _match_legacy()
+        
+        Args:
+            first: Start of the replaced text
+            legacy: The match
+            line_break: Text put before a display formula
+        """
+        end, formula, is_block = legacy
+        formula = _convert_latex_inline(formula).strip()
+        # Single-line brackets only hold a formula if it contains LaTeX
+        # commands; otherwise they are kept as is
+        if is_block or '\\' in formula or '_' in formula or '^' in formula:
+            return line_break + _display_formula(formula)
+        return _convert_inline_lines(self.text[first:end])
+    
+    def _check_deadline(self) -> None:
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise PreprocessingTimeout("Preprocessing exceeded its time budget")
+    
+    def run(self) -> str:
+        text = self.text
+        pieces = []
+        copied = 0
+        pos = 0
+        candidates = 0
+        
+        while True:
+            match = _FORMULA_PATTERN.search(text, pos)
+            if match is None:
+                break
+            
+            # Failed candidates count too: each one costs a lookup
+            candidates += 1
+            if candidates % _DEADLINE_CHECK_INTERVAL == 0:
+                self._check_deadline()
+            
+            kind = match.lastgroup
+            start = match.start()
+            
+            if kind == 'latex_open':
+                close = self._latex_block_end(start)
+                if close == -1:
+                    pos = start + 1
+                    continue
+                formula = _convert_latex_inline(text[start + 2:close].strip())
+                pieces.append(text[copied:start])
+                pieces.append(_display_formula(formula))
+                copied = pos = self.block_end = close + 2
+                
+                after = _LEGACY_AFTER_BLOCK_PATTERN.match(text, pos)
+                if after is not None:
+                    legacy = self._match_legacy(after.end() - 1)
+                    if legacy is not None:
+                        pieces.append(self._replace_legacy(pos, legacy, ''))
+                        copied = pos = legacy[0]
+                continue
+            
+            if kind == 'legacy_open':
+                legacy = self._match_legacy(match.start('legacy_open'))
+                if legacy is None:
+                    pos = start + 1
+                    continue
+                # Blank lines before the formula are absorbed into it
+                first = start
+                while first > pos and text[first - 1].isspace():
+                    first -= 1
+                first = text.find('\n', first, start + 1)
+                
+                pieces.append(text[copied:first])
+                pieces.append(self._replace_legacy(first, legacy, '\n'))
+                copied = pos = legacy[0]
+                continue
+            
+            if kind == 'latex_inline':
+                replaced = self.inline.replace_latex_inline(kind, start)
+            else:
+                replaced = self.inline.replace_inline(kind, start)
+            if replaced is None:
+                pos = start + 1
+                continue
+            end, replacement = replaced
+            if kind == 'latex_inline':
+                if not self._segment_skipped(start):
+                    replacement = _convert_inline(replacement)
+            elif self._segment_skipped(start):
+                replacement = text[start:end]
+            pieces.append(text[copied:start])
+            pieces.append(replacement)
+            copied = pos = end
+        
+        self._check_deadline()
+        pieces.append(text[copied:])
+        return ''.join(pieces)
+
+
+def fix_latex_formulas(markdown_content: str, deadline: Optional[float] = None) -> str:
     r"""
     Convert LaTeX formulas from various notations to proper markdown format.
     
@@ -13,146 +594,30 @@ def fix_latex_formulas(markdown_content: str) -> str:
     - Inline formulas with spaces: \( var \) or ( var ) -> $var$
     - Inline without spaces: (var) -> keep as is (normal parentheses)
     
+    All notations are recognised in a single scan over the document,
+    followed by a cleanup of consecutive blank lines.
+    
     Args:
         markdown_content: The markdown content with LaTeX formulas
-        
+        deadline: Optional time.monotonic() value after which to give up
+    
     Returns:
         Corrected markdown content with proper LaTeX delimiters
+    
+    Raises:
+        PreprocessingTimeout: If the deadline passes during the scan
     """
     if not markdown_content:
         return markdown_content
     
-    # Handle LaTeX-style block delimiters: \[ ... \]
-    # This is the standard LaTeX notation that ChatGPT uses
-    # Use raw string and re.DOTALL to match across newlines
-    latex_block_pattern = r'\\\[\s*((?:[^\\]|\\(?!\]))+?)\s*\\\]'
-    
-    def replace_latex_block(match):
-        formula = match.group(1).strip()
-        return f"\n$$\n{formula}\n$$\n"
-    
-    markdown_content = re.sub(latex_block_pattern, replace_latex_block, markdown_content, flags=re.DOTALL)
-    
-    # Handle LaTeX-style inline delimiters: \( ... \)
-    # This is the standard LaTeX notation for inline math
-    # Only convert if there are spaces around the content (indicates it's a variable/formula)
-    latex_inline_pattern = r'\\\(\s+(.+?)\s+\\\)'
-    
-    def replace_latex_inline(match):
-        formula = match.group(1).strip()
-        return f"${formula}$"
-    
-    markdown_content = re.sub(latex_inline_pattern, replace_latex_inline, markdown_content)
-    
-    # Pattern to match formulas in square brackets (legacy notation)
-    # This matches formulas that are on their own lines (block formulas)
-    # Example: [\na_0 = \frac{1}{T} \int_{T} f(t), dt\n]
-    # We need to be careful not to replace \left[ and \right[ inside the formula
-    block_formula_pattern = r'^\s*\[\s*\n((?:[^\[\]]|\\left\[|\\right\[|\\left\]|\\right\]|\n)+?)\n\s*\]\s*$'
-    
-    # Replace block formulas (multiline formulas in brackets)
-    def replace_block_formula(match):
-        formula = match.group(1).strip()
-        return f"\n$$\n{formula}\n$$\n"
-    
-    # Process block formulas
-    markdown_content = re.sub(
-        block_formula_pattern,
-        replace_block_formula,
-        markdown_content,
-        flags=re.MULTILINE
-    )
-    
-    # Pattern to match single-line formulas in brackets
-    # Example: [ a_0 = \frac{1}{T} \int_{T} f(t), dt ]
-    # Also allow \left[ and \right] inside
-    single_line_block_pattern = r'^\s*\[\s*([^\[\]\n]*(?:\\left\[|\\right\[|\\left\]|\\right\]|[^\[\]\n])*?)\s*\]\s*$'
-    
-    def replace_single_line_formula(match):
-        formula = match.group(1).strip()
-        # Check if it contains LaTeX commands (likely a formula)
-        if '\\' in formula or '_' in formula or '^' in formula:
-            return f"\n$$\n{formula}\n$$\n"
-        # Otherwise, keep it as is (might be a regular bracket)
-        return match.group(0)
-    
-    # Process single-line block formulas
-    markdown_content = re.sub(
-        single_line_block_pattern,
-        replace_single_line_formula,
-        markdown_content,
-        flags=re.MULTILINE
-    )
-    
-    # Pattern to match inline formulas in parentheses with spaces: ( formula )
-    # Only convert if there are spaces after ( and before )
-    # This distinguishes math variables from normal parentheses like (x) in function calls
-    inline_paren_formula_pattern = r'\(\s+(.+?)\s+\)'
-    
-    def replace_paren_inline_formula(match):
-        formula = match.group(1).strip()
-        
-        # Convert if it looks like a formula or variable:
-        # 1. Contains LaTeX commands (backslash)
-        # 2. Contains subscripts/superscripts with braces
-        # 3. Has mathematical operators: =, <, >, ≤, ≥, ≠
-        # 4. Contains both ^ (superscript) and math symbols
-        # 5. Is short (≤6 chars) - likely a variable like T, x, f(t)
-        has_latex = '\\' in formula
-        has_subscript_superscript = ('^' in formula and '{' in formula) or ('_' in formula and '{' in formula)
-        has_math_operator = any(op in formula for op in ['=', '<', '>', '≤', '≥', '≠'])
-        has_superscript_simple = '^' in formula  # Like B^2
-        is_short = len(formula) <= 6
-        
-        if (has_latex or 
-            has_subscript_superscript or 
-            has_math_operator or
-            (has_superscript_simple and any(c in formula for c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ+-*/')) or
-            is_short):
-            return f"${formula}$"
-        # Otherwise, keep it as is
-        return match.group(0)
-    
-    # Pattern to match inline formulas in brackets within text
-    # Example: The formula [x = y] is simple
-    # Only convert if it contains LaTeX commands
-    # But NOT if it's preceded by \left or \right (those are LaTeX bracket commands)
-    inline_formula_pattern = r'(?<!\\left)(?<!\\right)\[([^\[\]\n]+?)\](?!\$)'
-    
-    def replace_inline_formula(match):
-        formula = match.group(1).strip()
-        # Only convert if it looks like a formula (contains LaTeX commands)
-        if ('\\' in formula or ('_' in formula and '{' in formula) or 
-            ('^' in formula and '{' in formula)):
-            return f"${formula}$"
-        # Otherwise, keep it as is (might be a regular bracket)
-        return match.group(0)
-    
-    # Process inline formulas (only within text, not on their own lines)
-    lines = markdown_content.split('\n')
-    processed_lines = []
-    
-    for line in lines:
-        # Skip if line is already a block formula or empty or contains \left[ or \right]
-        if (line.strip().startswith('$$') or not line.strip() or 
-            '\\left[' in line or '\\right]' in line):
-            processed_lines.append(line)
-            continue
-        
-        # Process inline formulas in parentheses first
-        processed_line = re.sub(inline_paren_formula_pattern, replace_paren_inline_formula, line)
-        # Then process inline formulas in brackets
-        processed_line = re.sub(inline_formula_pattern, replace_inline_formula, processed_line)
-        processed_lines.append(processed_line)
+    text = '\n' + markdown_content
+    result = _FormulaScanner(text, deadline).run()[1:]
     
     # Clean up multiple consecutive blank lines
-    result = '\n'.join(processed_lines)
-    result = re.sub(r'\n{3,}', '\n\n', result)
-    
-    return result
+    return _BLANK_LINES_PATTERN.sub('\n\n', result)
 
 
-def preprocess_markdown(markdown_content: str) -> str:
+def preprocess_markdown(markdown_content: str, time_budget: Optional[float] = None) -> str:
     """
     Preprocess markdown content before conversion to DOCX.
     
@@ -162,12 +627,18 @@ def preprocess_markdown(markdown_content: str) -> str:
     
     Args:
         markdown_content: The original markdown content
-        
+        time_budget: Optional number of seconds preprocessing may take
+    
     Returns:
         Preprocessed markdown content
+    
+    Raises:
+        PreprocessingTimeout: If the time budget is exceeded
     """
+    deadline = time.monotonic() + time_budget if time_budget else None
+    
     # Fix LaTeX formulas
-    markdown_content = fix_latex_formulas(markdown_content)
+    markdown_content = fix_latex_formulas(markdown_content, deadline)
     
     # Additional preprocessing can be added here
     # For example:
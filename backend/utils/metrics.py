@@ -0,0 +1,252 @@
+"""
+Prometheus metrics for the conversion pipeline
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds: from a cached small document to a multi-megabyte conversion
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Bytes: a few KiB of text up to documents full of images
+SIZE_BUCKETS = tuple(1024 * 4 ** power for power in range(9))
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Common parts of the metric types: a name, help text and labelled series"""
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        """Exposition text of the metric"""
+        with self._lock:
+            samples = self._samples()
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + samples)
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. failures by cause"""
+    kind = "counter"
+    
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+    
+    def value(self, **labels: str) -> float:
+        return self._series.get(self._key(labels), 0)
+    
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._series.items())
+        ]
+
+
+class Gauge(Counter):
+    """A value that goes up and down, e.g. processes currently running"""
+    kind = "gauge"
+    
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+    
+    @contextmanager
+    def track(self, **labels: str):
+        """Count the enclosed block as in progress"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = STAGE_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+    
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts, then the sum of all observations
+                series = self._series[key] = [0] * len(self.buckets) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-1] += value
+    
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[:-1]) if series else 0
+    
+    @contextmanager
+    def time(self, **labels: str):
+        """Observe the wall time of the enclosed block, in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+    
+    def _samples(self) -> List[str]:
+        samples = []
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                samples.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            samples.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            samples.append(f"{self.name}_count{labels} {cumulative}")
+        return samples
+
+
+class MetricsRegistry:
+    """
+    The metrics of one API worker process, in the Prometheus text format.
+    
+    Each uvicorn worker keeps its own registry; Prometheus adds them up
+    when every worker is scraped (or through the load balancer over time).
+    """
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+    
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def render(self) -> str:
+        """Exposition text of every registered metric"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+stage_seconds = metrics_registry.register(Histogram(
+    "mdtodocx_stage_seconds",
+    "Wall time of each conversion stage (parse, preprocess, pandoc_queue, pandoc, docx_write, download)",
+    ["stage"]
+))
+docx_size_bytes = metrics_registry.register(Histogram(
+    "mdtodocx_docx_size_bytes",
+    "Size of the DOCX files produced by pandoc",
+    buckets=SIZE_BUCKETS
+))
+conversion_failures = metrics_registry.register(Counter(
+    "mdtodocx_conversion_failures_total",
+    "Failed conversions by cause",
+    ["cause"]
+))
+pandoc_in_flight = metrics_registry.register(Gauge(
+    "mdtodocx_pandoc_in_flight",
+    "Pandoc conversions currently running, by backend",
+    ["backend"]
+))
+admission_active = metrics_registry.register(Gauge(
+    "mdtodocx_admission_active",
+    "Conversions currently admitted"
+))
+admission_queued = metrics_registry.register(Gauge(
+    "mdtodocx_admission_queued",
+    "Conversions waiting to be admitted"
+))
+admission_rejections = metrics_registry.register(Counter(
+    "mdtodocx_admission_rejections_total",
+    "Conversions turned away by admission control, by reason",
+    ["reason"]
+))
+pandoc_lane_queued = metrics_registry.register(Gauge(
+    "mdtodocx_pandoc_lane_queued",
+    "Conversions waiting for a pandoc slot, by priority lane",
+    ["lane"]
+))
+pandoc_lane_wait_seconds = metrics_registry.register(Histogram(
+    "mdtodocx_pandoc_lane_wait_seconds",
+    "Time spent waiting for a pandoc slot, by priority lane",
+    ["lane"]
+))
+pandoc_killed = metrics_registry.register(Counter(
+    "mdtodocx_pandoc_killed_total",
+    "Pandoc processes killed before they finished, by reason (timeout, cancelled)",
+    ["reason"]
+))
+conversion_cancellations = metrics_registry.register(Counter(
+    "mdtodocx_conversion_cancellations_total",
+    "Conversions abandoned because the client disconnected, by endpoint",
+    ["endpoint"]
+))
+result_cache_hits = metrics_registry.register(Counter(
+    "mdtodocx_result_cache_hits_total",
+    "Conversions answered from the result cache, by tier (memory, disk)",
+    ["tier"]
+))
+result_cache_misses = metrics_registry.register(Counter(
+    "mdtodocx_result_cache_misses_total",
+    "Result cache lookups that found nothing"
+))
+result_cache_evictions = metrics_registry.register(Counter(
+    "mdtodocx_result_cache_evictions_total",
+    "Results dropped from the cache to fit its budget, by tier (memory, disk)",
+    ["tier"]
+))
+janitor_reclaimed_bytes = metrics_registry.register(Counter(
+    "mdtodocx_janitor_reclaimed_bytes_total",
+    "Bytes of uploaded and converted files deleted by the janitor, by reason (expired, quota)",
+    ["reason"]
+))
+janitor_scan_seconds = metrics_registry.register(Histogram(
+    "mdtodocx_janitor_scan_seconds",
+    "Wall time of each janitor sweep over the upload directories"
+))
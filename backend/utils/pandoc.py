@@ -1,17 +1,59 @@
 """
 Pandoc conversion utilities
 """
+import asyncio
+import base64
+import functools
+import http.client
+import json
+import os
+import signal
+import socket
 import subprocess
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
 
+from .config import (
+    PANDOC_BACKEND,
+    PANDOC_REFRESH_INTERVAL,
+    PANDOC_SERVER_HEALTH_INTERVAL,
+    PANDOC_SERVER_MAX_USES,
+    PANDOC_SERVER_PROCESSES,
+    PANDOC_TIMEOUT,
+    PANDOC_WARM_POOL_MAX_AGE,
+    PANDOC_WARM_POOL_SIZE,
+    PANDOC_WARM_POOL_TEMPLATES
+)
+from .metrics import conversion_failures, pandoc_in_flight, pandoc_killed, stage_seconds
+from .scheduler import LANE_INTERACTIVE, pandoc_scheduler
 
-def check_pandoc_installed() -> bool:
+
+@dataclass
+class PandocInfo:
+    """Snapshot of the pandoc installation as seen by the last probe"""
+    installed: bool = False
+    version: Optional[str] = None
+    features: List[str] = field(default_factory=list)
+    output_formats: List[str] = field(default_factory=list)
+    checked_at: Optional[float] = None
+    
+    def supports(self, feature: str) -> bool:
+        """Return True if pandoc was built with the given feature (e.g. "server")"""
+        return feature in self.features
+
+
+def probe_pandoc() -> PandocInfo:
     """
-    Check if pandoc is installed on the system
+    Run pandoc once to discover its version and capabilities
     
     Returns:
-        True if pandoc is available, False otherwise
+        PandocInfo describing the installation (installed=False if unavailable)
     """
+    info = PandocInfo(checked_at=time.time())
     try:
         result = subprocess.run(
             ["pandoc", "--version"],
@@ -19,9 +61,103 @@ def check_pandoc_installed() -> bool:
             text=True,
             timeout=5
         )
-        return result.returncode == 0
+        if result.returncode != 0:
+            return info
+        
+        lines = result.stdout.splitlines()
+        if lines:
+            # First line looks like "pandoc 3.1.9"
+            info.version = lines[0].split()[-1]
+        for line in lines:
+            if line.startswith("Features:"):
+                info.features = [
+                    token.lstrip("+") for token in line.split()[1:]
+                    if token.startswith("+")
+                ]
+        
+        formats = subprocess.run(
+            ["pandoc", "--list-output-formats"],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        if formats.returncode == 0:
+            info.output_formats = formats.stdout.split()
+        
+        info.installed = True
+        return info
     except (subprocess.TimeoutExpired, FileNotFoundError):
-        return False
+        return info
+
+
+class PandocRegistry:
+    """
+    Cached pandoc capability registry.
+    
+    Pandoc is probed once (at startup or on first use) and the result is
+    served from memory afterwards. A background task re-probes it every
+    `refresh_interval` seconds so that installs/removals are still noticed.
+    """
+    
+    def __init__(self, refresh_interval: float = PANDOC_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._info: Optional[PandocInfo] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def info(self) -> PandocInfo:
+        """Cached pandoc info, probing synchronously if nothing is cached yet"""
+        if self._info is None:
+            self.refresh()
+        return self._info
+    
+    def refresh(self) -> PandocInfo:
+        """Re-probe pandoc (blocking) and update the cached state"""
+        self._info = probe_pandoc()
+        return self._info
+    
+    async def refresh_async(self) -> PandocInfo:
+        """Re-probe pandoc in a worker thread without blocking the event loop"""
+        self._info = await asyncio.to_thread(probe_pandoc)
+        return self._info
+    
+    def start(self) -> None:
+        """Start the background refresh loop on the running event loop"""
+        if self._task is None and self.refresh_interval > 0:
+            self._task = asyncio.create_task(self._refresh_loop())
+    
+    async def stop(self) -> None:
+        """Cancel the background refresh loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh_async()
+            except Exception as e:
+                print(f"Pandoc probe error: {str(e)}")
+
+
+pandoc_registry = PandocRegistry()
+
+
+def check_pandoc_installed() -> bool:
+    """
+    Check if pandoc is installed on the system
+    
+    Reads the cached registry state, so no process is spawned per call.
+    
+    Returns:
+        True if pandoc is available, False otherwise
+    """
+    return pandoc_registry.info.installed
 
 
 def convert_md_to_docx(md_file_path: Path, docx_file_path: Path) -> bool:
@@ -31,7 +167,7 @@ def convert_md_to_docx(md_file_path: Path, docx_file_path: Path) -> bool:
     Args:
         md_file_path: Path to the input markdown file
         docx_file_path: Path to the output DOCX file
-        
+    
     Returns:
         True if successful, False otherwise
     """
@@ -40,7 +176,7 @@ def convert_md_to_docx(md_file_path: Path, docx_file_path: Path) -> bool:
             ["pandoc", str(md_file_path), "-o", str(docx_file_path)],
             capture_output=True,
             text=True,
-            timeout=30
+            timeout=PANDOC_TIMEOUT
         )
         
         if result.returncode != 0:
@@ -55,3 +191,683 @@ def convert_md_to_docx(md_file_path: Path, docx_file_path: Path) -> bool:
     except Exception as e:
         print(f"Conversion error: {str(e)}")
         return False
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _kill(process: asyncio.subprocess.Process) -> None:
+    """Kill a pandoc process together with anything it started (filters, converters)"""
+    if process.returncode is not None:
+        return
+    try:
+        # Pandoc processes lead their own process group (start_new_session)
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, OSError):
+        process.kill()
+
+
+# Arguments of the in-memory markdown to DOCX conversion
+DOCX_STDIN_ARGS = ["-f", "markdown", "-t", "docx", "-o", "-"]
+
+
+def docx_stdin_args(reference_doc: Optional[Path] = None) -> List[str]:
+    """
+    Pandoc arguments of an in-memory markdown to DOCX conversion
+    
+    Args:
+        reference_doc: Optional reference DOCX whose styles are applied
+    
+    Returns:
+        Command line arguments reading stdin and writing the DOCX to stdout
+    """
+    if reference_doc is None:
+        return DOCX_STDIN_ARGS
+    return DOCX_STDIN_ARGS + ["--reference-doc", str(reference_doc)]
+
+
+class PandocWarmPool:
+    """
+    Pandoc CLI processes started ahead of time and blocked reading stdin.
+    
+    A CLI process converts exactly one document, so the pool keeps `size`
+    idle processes per argument list and hands one to each conversion,
+    immediately spawning its replacement in the background. The fork/exec
+    and runtime start-up then overlap with request handling instead of
+    sitting on the critical path. Idle processes older than `max_age`
+    seconds are replaced rather than used.
+    
+    Besides the argument lists it was created with, the pool warms the
+    `max_extra` most recently used other ones (conversions with a reference
+    template); the least recently used is dropped for a new one, so the
+    number of idle processes stays bounded however many templates exist.
+    
+    Args:
+        size: Idle processes kept per argument list (0 disables the pool)
+        max_age: Seconds an idle process may wait before it is replaced
+        args: Argument lists to always keep warm processes for
+        max_extra: Other argument lists kept warm at once
+    """
+    
+    def __init__(
+        self,
+        size: int = PANDOC_WARM_POOL_SIZE,
+        max_age: float = PANDOC_WARM_POOL_MAX_AGE,
+        args: Optional[List[List[str]]] = None,
+        max_extra: int = PANDOC_WARM_POOL_TEMPLATES
+    ):
+        self.size = size
+        self.max_age = max_age
+        self.max_extra = max_extra
+        self.args = [tuple(a) for a in (args or [DOCX_STDIN_ARGS])]
+        # Other argument lists kept warm, least recently used first
+        self._extra: "OrderedDict[tuple, None]" = OrderedDict()
+        self._idle: Dict[tuple, Deque[Tuple[float, asyncio.subprocess.Process]]] = {}
+        self._pending: Dict[tuple, int] = {}
+        self._refills = set()
+        self._loop = None
+        
+        self.hits = 0
+        self.misses = 0
+        self.spawned = 0
+        self.expired = 0
+    
+    def start(self) -> None:
+        """Spawn the idle processes on the running event loop"""
+        if self.size <= 0 or self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        for key in [*self.args, *self._extra]:
+            self._idle[key] = deque()
+            self._schedule_refill(key)
+    
+    async def stop(self) -> None:
+        """Cancel pending spawns and kill the idle processes"""
+        self._loop = None
+        for task in list(self._refills):
+            task.cancel()
+        await asyncio.gather(*self._refills, return_exceptions=True)
+        for idle in self._idle.values():
+            for _, process in idle:
+                if process.returncode is None:
+                    _kill(process)
+                    await process.wait()
+        self._idle.clear()
+        self._pending.clear()
+    
+    def warm(self, args: List[str]) -> None:
+        """
+        Keep idle processes for this argument list too, as the most recently
+        used one (from any thread)
+        
+        Args:
+            args: Command line arguments conversions start pandoc with
+        """
+        loop = self._loop
+        if loop is not None and loop is not _running_loop():
+            loop.call_soon_threadsafe(self.warm, args)
+            return
+        key = tuple(args)
+        if key in self.args:
+            return
+        if key in self._extra:
+            self._extra.move_to_end(key)
+            return
+        if self.max_extra <= 0:
+            return
+        self._extra[key] = None
+        if len(self._extra) > self.max_extra:
+            oldest, _ = self._extra.popitem(last=False)
+            self._drop(oldest)
+        if self._loop is not None:
+            self._idle[key] = deque()
+            self._schedule_refill(key)
+    
+    def forget(self, args: List[str]) -> None:
+        """Stop keeping processes for this argument list and kill its idle ones (from any thread)"""
+        loop = self._loop
+        if loop is not None and loop is not _running_loop():
+            loop.call_soon_threadsafe(self.forget, args)
+            return
+        key = tuple(args)
+        if key in self.args:
+            self.args.remove(key)
+        self._extra.pop(key, None)
+        self._drop(key)
+    
+    def _drop(self, key: tuple) -> None:
+        for _, process in self._idle.pop(key, ()):
+            _kill(process)
+    
+    def take(self, args: List[str]) -> Optional[asyncio.subprocess.Process]:
+        """
+        Hand out an idle process started with exactly these arguments
+        
+        Args:
+            args: Command line arguments the caller would start pandoc with
+        
+        Returns:
+            A running process waiting for stdin, or None to spawn one as usual
+        """
+        if self._loop is not asyncio.get_running_loop():
+            return None
+        key = tuple(args)
+        # A conversion with other arguments (a template) makes them recently
+        # used; the first one starts cold while its processes are spawned
+        self.warm(args)
+        idle = self._idle.get(key)
+        if idle is None:
+            return None
+        
+        process = None
+        while idle:
+            spawned_at, candidate = idle.popleft()
+            if candidate.returncode is None and time.monotonic() - spawned_at <= self.max_age:
+                process = candidate
+                break
+            self.expired += 1
+            _kill(candidate)
+        
+        self._schedule_refill(key)
+        if process is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return process
+    
+    def _schedule_refill(self, key: tuple) -> None:
+        task = asyncio.create_task(self._refill(key))
+        self._refills.add(task)
+        task.add_done_callback(self._refills.discard)
+    
+    async def _refill(self, key: tuple) -> None:
+        idle = self._idle[key]
+        while self._loop is not None and len(idle) + self._pending.get(key, 0) < self.size:
+            self._pending[key] = self._pending.get(key, 0) + 1
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    "pandoc", *key,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True
+                )
+            except FileNotFoundError:
+                return
+            finally:
+                self._pending[key] -= 1
+            if self._loop is None or self._idle.get(key) is not idle:
+                # Stopped or forgotten while the process was starting
+                _kill(process)
+                await process.wait()
+                return
+            idle.append((time.monotonic(), process))
+            self.spawned += 1
+    
+    def stats(self) -> dict:
+        """Pool size and hit/miss counters"""
+        return {
+            "size": self.size,
+            "warm_args": len(self._idle),
+            "idle": sum(len(idle) for idle in self._idle.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "spawned": self.spawned,
+            "expired": self.expired
+        }
+
+
+pandoc_warm_pool = PandocWarmPool()
+
+
+async def run_pandoc_async(
+    args: List[str],
+    input_data: Optional[bytes] = None,
+    lane: str = LANE_INTERACTIVE
+) -> Optional[bytes]:
+    """
+    Run pandoc as an asyncio subprocess without blocking the event loop
+    
+    At most PANDOC_MAX_CONCURRENCY processes run at once; further callers
+    wait for a free slot, which the scheduler hands out by priority lane.
+    Conversions fed through stdin use a pre-spawned process from the warm
+    pool when one is available. On timeout or cancellation (e.g. the client
+    disconnected) pandoc's whole process group is killed at once, so no CPU
+    is spent on output nobody will read.
+    
+    Args:
+        args: Command line arguments passed to pandoc
+        input_data: Optional bytes written to pandoc's stdin
+        lane: Priority lane the conversion waits for a slot in
+    
+    Returns:
+        Captured stdout if pandoc exited successfully, None otherwise
+    """
+    queued = time.perf_counter()
+    async with pandoc_scheduler.slot(lane):
+        stage_seconds.observe(time.perf_counter() - queued, stage="pandoc_queue")
+        process = pandoc_warm_pool.take(args) if input_data is not None else None
+        if process is None:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    "pandoc", *args,
+                    stdin=asyncio.subprocess.PIPE if input_data is not None else asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True
+                )
+            except FileNotFoundError:
+                print("Conversion error: pandoc executable not found")
+                conversion_failures.inc(cause="pandoc_missing")
+                return None
+        
+        try:
+            with pandoc_in_flight.track(backend="cli"), stage_seconds.time(stage="pandoc"):
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(input_data),
+                    timeout=PANDOC_TIMEOUT
+                )
+        except asyncio.TimeoutError:
+            print("Pandoc conversion timed out")
+            conversion_failures.inc(cause="timeout")
+            pandoc_killed.inc(reason="timeout")
+            return None
+        except asyncio.CancelledError:
+            if process.returncode is None:
+                pandoc_killed.inc(reason="cancelled")
+            raise
+        finally:
+            if process.returncode is None:
+                _kill(process)
+                await process.wait()
+        
+        if process.returncode != 0:
+            print(f"Pandoc error: {stderr.decode('utf-8', errors='replace')}")
+            conversion_failures.inc(cause="pandoc_exit")
+            return None
+        
+        return stdout
+
+
+class PandocServerError(Exception):
+    """Raised when a `pandoc server` process cannot be reached"""
+
+
+class PandocServer:
+    """
+    One long-lived `pandoc server` process listening on localhost.
+    
+    Conversions are POSTed to it as JSON over keep-alive HTTP connections,
+    which are pooled so consecutive requests skip the TCP handshake. All
+    methods block and are meant to be called from a worker thread.
+    """
+    
+    def __init__(self, timeout: float = PANDOC_TIMEOUT):
+        self.timeout = timeout
+        self.port: Optional[int] = None
+        self.process: Optional[subprocess.Popen] = None
+        self.started_at: Optional[float] = None
+        self.healthy = False
+        self.uses = 0
+        self.active = 0
+        self._connections: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+    
+    def start(self) -> bool:
+        """
+        Spawn the server on a free port and wait until it converts
+        
+        Returns:
+            True if the server passed its first health check
+        """
+        self.stop()
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        try:
+            self.process = subprocess.Popen(
+                ["pandoc", "server", "--port", str(self.port), "--timeout", str(int(self.timeout))],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            return False
+        self.started_at = time.time()
+        self.uses = 0
+        
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and self.process.poll() is None:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        return self.check()
+    
+    def stop(self) -> None:
+        """Close pooled connections and terminate the process"""
+        self.healthy = False
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+    
+    def check(self) -> bool:
+        """Run a tiny conversion and record whether the server answered it"""
+        try:
+            status, _ = self.request({"text": "ok", "from": "markdown", "to": "plain"})
+            self.healthy = status == 200
+        except PandocServerError:
+            self.healthy = False
+        return self.healthy
+    
+    def request(self, params: dict) -> Tuple[int, bytes]:
+        """
+        Send one conversion to the server
+        
+        Args:
+            params: JSON body understood by `pandoc server` (text, from, to, ...)
+        
+        Returns:
+            HTTP status and raw response body (the converted document on 200)
+        
+        Raises:
+            PandocServerError: If the process is gone or the connection failed
+        """
+        if self.process is None or self.process.poll() is not None:
+            self.healthy = False
+            raise PandocServerError("pandoc server is not running")
+        
+        with self._lock:
+            connection = self._connections.pop() if self._connections else None
+        if connection is None:
+            # Leave pandoc's own --timeout room to report the error first
+            connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=self.timeout + 5)
+        
+        try:
+            connection.request(
+                "POST", "/",
+                body=json.dumps(params).encode("utf-8"),
+                headers={"Content-Type": "application/json", "Accept": "application/octet-stream"}
+            )
+            response = connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            connection.close()
+            self.healthy = False
+            raise PandocServerError(f"pandoc server request failed: {str(e)}")
+        
+        if response.will_close:
+            connection.close()
+        else:
+            with self._lock:
+                self._connections.append(connection)
+        return response.status, body
+
+
+class PandocServerBackend:
+    """
+    Conversion backend backed by a set of `pandoc server` processes.
+    
+    Keeping pandoc resident removes the process start-up and runtime
+    initialisation from every conversion. Requests are spread round-robin
+    over the healthy servers; a background task health-checks them every
+    `health_interval` seconds and restarts the ones that died or stopped
+    answering. While no server is healthy, conversions use the CLI.
+    
+    A server cannot abort a single conversion, so when the caller of a
+    conversion is cancelled (its client disconnected) and no other
+    conversion is running on that server, the server is killed and
+    restarted in the background instead of finishing the document.
+    
+    Args:
+        processes: Number of server processes to keep running
+        health_interval: Seconds between health checks
+        max_uses: Conversions after which a server is recycled by the next
+            health check (0 never recycles)
+        enabled: Whether start() launches any servers at all
+    """
+    
+    def __init__(
+        self,
+        processes: int = PANDOC_SERVER_PROCESSES,
+        health_interval: float = PANDOC_SERVER_HEALTH_INTERVAL,
+        max_uses: int = PANDOC_SERVER_MAX_USES,
+        enabled: bool = PANDOC_BACKEND == "server"
+    ):
+        self.processes = processes
+        self.health_interval = health_interval
+        self.max_uses = max_uses
+        self.enabled = enabled
+        self.servers: List[PandocServer] = []
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+        self._restarts: Dict[PandocServer, asyncio.Task] = {}
+        
+        self.conversions = 0
+        self.fallbacks = 0
+        self.restarts = 0
+    
+    @property
+    def available(self) -> bool:
+        """True if at least one server is healthy"""
+        return any(server.healthy for server in self.servers)
+    
+    async def start(self) -> None:
+        """Launch the servers and the health check loop on the running event loop"""
+        if not self.enabled or self.servers or self.processes <= 0:
+            return
+        if not pandoc_registry.info.supports("server"):
+            print("Pandoc server mode is not available, using the CLI backend")
+            return
+        self.servers = [PandocServer() for _ in range(self.processes)]
+        started = await asyncio.gather(*(asyncio.to_thread(server.start) for server in self.servers))
+        if not all(started):
+            print(f"{started.count(False)} of {len(started)} pandoc servers failed to start, using the CLI for now")
+        if self.health_interval > 0:
+            self._task = asyncio.create_task(self._health_loop())
+    
+    async def stop(self) -> None:
+        """Cancel the health check loop and terminate the servers"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.gather(*self._restarts.values(), return_exceptions=True)
+        servers, self.servers = self.servers, []
+        await asyncio.gather(*(asyncio.to_thread(server.stop) for server in servers))
+    
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for server in self.servers:
+                if server in self._restarts:
+                    continue
+                try:
+                    if self._worn_out(server):
+                        print(f"Pandoc server on port {server.port} reached {server.uses} conversions, recycling it")
+                    elif await asyncio.to_thread(server.check):
+                        continue
+                    else:
+                        print(f"Pandoc server on port {server.port} is unhealthy, restarting it")
+                    self.restarts += 1
+                    await asyncio.to_thread(server.start)
+                except Exception as e:
+                    print(f"Pandoc server health check error: {str(e)}")
+    
+    def _worn_out(self, server: PandocServer) -> bool:
+        return self.max_uses > 0 and server.uses >= self.max_uses
+    
+    def _pick_server(self) -> Optional[PandocServer]:
+        # Prefer an idle server, so an abandoned conversion can be killed
+        # without taking others down with it
+        busy = None
+        for _ in range(len(self.servers)):
+            server = self.servers[self._next % len(self.servers)]
+            self._next += 1
+            if server.healthy and not self._worn_out(server):
+                if server.active == 0:
+                    return server
+                busy = busy or server
+        return busy
+    
+    async def _kill(self, server: PandocServer) -> None:
+        """Stop a server busy with an abandoned conversion and restart it in the background"""
+        pandoc_killed.inc(reason="cancelled")
+        self.restarts += 1
+        await asyncio.to_thread(server.stop)
+        task = asyncio.create_task(asyncio.to_thread(server.start))
+        self._restarts[server] = task
+        task.add_done_callback(lambda _: self._restarts.pop(server, None))
+    
+    async def convert(self, params: dict) -> Optional[bytes]:
+        """
+        Convert a document on the next healthy server
+        
+        Args:
+            params: JSON body understood by `pandoc server` (text, from, to, ...)
+        
+        Returns:
+            Converted document if successful, None if pandoc rejected it
+        
+        Raises:
+            PandocServerError: If no server could be reached
+        """
+        server = self._pick_server()
+        if server is None:
+            raise PandocServerError("no healthy pandoc server")
+        server.uses += 1
+        server.active += 1
+        try:
+            with pandoc_in_flight.track(backend="server"), stage_seconds.time(stage="pandoc"):
+                status, body = await asyncio.to_thread(server.request, params)
+        except asyncio.CancelledError:
+            if server.active == 1:
+                await self._kill(server)
+            raise
+        finally:
+            server.active -= 1
+        if status != 200:
+            print(f"Pandoc error: {body.decode('utf-8', errors='replace')}")
+            conversion_failures.inc(cause="pandoc_exit")
+            return None
+        self.conversions += 1
+        return body
+    
+    def stats(self) -> dict:
+        """Backend state and conversion counters"""
+        return {
+            "backend": "server" if self.available else "cli",
+            "servers": len(self.servers),
+            "healthy_servers": sum(1 for server in self.servers if server.healthy),
+            "conversions": self.conversions,
+            "fallbacks": self.fallbacks,
+            "restarts": self.restarts
+        }
+
+
+pandoc_server_backend = PandocServerBackend()
+
+
+@functools.lru_cache(maxsize=32)
+def _reference_doc_files(path: str, mtime_ns: int) -> Dict[str, str]:
+    """Base64 payload of a reference DOCX for `pandoc server` (cached per version)"""
+    with open(path, "rb") as f:
+        return {"reference.docx": base64.b64encode(f.read()).decode("ascii")}
+
+
+def _load_reference_doc(reference_doc: Path) -> Dict[str, str]:
+    """Base64 payload of the current version of a reference DOCX (blocking)"""
+    return _reference_doc_files(str(reference_doc), reference_doc.stat().st_mtime_ns)
+
+
+async def convert_markdown_to_docx_bytes(
+    markdown_content: str,
+    reference_doc: Optional[Path] = None,
+    lane: str = LANE_INTERACTIVE
+) -> Optional[bytes]:
+    """
+    Convert markdown text to DOCX entirely in memory
+    
+    Uses a resident `pandoc server` when the server backend is healthy.
+    Otherwise the markdown is streamed to a pandoc process's stdin and the
+    DOCX is read back from its stdout. Either way nothing touches the disk.
+    
+    Args:
+        markdown_content: The (preprocessed) markdown text
+        reference_doc: Optional reference DOCX whose styles are applied
+        lane: Priority lane the conversion waits for a pandoc slot in
+    
+    Returns:
+        DOCX file contents if successful, None otherwise
+    """
+    if pandoc_server_backend.available:
+        params = {"text": markdown_content, "from": "markdown", "to": "docx"}
+        try:
+            if reference_doc is not None:
+                # The server cannot read local files; the document travels in the request
+                params["reference-doc"] = "reference.docx"
+                params["files"] = await asyncio.to_thread(_load_reference_doc, reference_doc)
+            queued = time.perf_counter()
+            async with pandoc_scheduler.slot(lane):
+                stage_seconds.observe(time.perf_counter() - queued, stage="pandoc_queue")
+                return await pandoc_server_backend.convert(params)
+        except PandocServerError as e:
+            pandoc_server_backend.fallbacks += 1
+            print(f"{str(e)}, falling back to the pandoc CLI")
+        except Exception as e:
+            print(f"Conversion error: {str(e)}")
+            conversion_failures.inc(cause="error")
+            return None
+    
+    try:
+        return await run_pandoc_async(
+            docx_stdin_args(reference_doc),
+            markdown_content.encode("utf-8"),
+            lane
+        )
+    except Exception as e:
+        print(f"Conversion error: {str(e)}")
+        conversion_failures.inc(cause="error")
+        return None
+
+
+def save_docx(docx_bytes: bytes, docx_file_path: Path) -> Path:
+    """
+    Persist DOCX bytes to disk
+    
+    The file is written under a temporary name and renamed into place, so
+    readers never observe a partially written document.
+    
+    Args:
+        docx_bytes: DOCX file contents
+        docx_file_path: Destination path
+    
+    Returns:
+        The destination path
+    """
+    tmp_path = docx_file_path.with_name(f".{docx_file_path.name}.tmp")
+    try:
+        with stage_seconds.time(stage="docx_write"):
+            with open(tmp_path, "wb") as f:
+                f.write(docx_bytes)
+            os.replace(tmp_path, docx_file_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return docx_file_path
@@ -0,0 +1,108 @@
+"""
+Markdown to DOCX conversion pipeline shared by the API routes
+"""
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Optional
+
+from .admission import AdmissionController
+from .cache import make_cache_key, result_cache
+from .config import PREPROCESS_TIME_BUDGET, SECTION_PARALLEL_MIN_SIZE
+from .markdown_processor import PreprocessingTimeout
+from .metrics import conversion_failures, docx_size_bytes, stage_seconds
+from .pandoc import convert_markdown_to_docx_bytes, pandoc_registry
+from .preprocess_pool import PreprocessingCrashed, preprocess_pool
+from .scheduler import select_lane
+from .sections import convert_markdown_sections_to_docx
+from .singleflight import conversion_flights
+from .templates import TemplateInfo
+
+# Options that shape the pandoc output; part of every cache key
+CONVERSION_OPTIONS = {"from": "markdown", "to": "docx"}
+
+
+async def render_docx(
+    markdown_content: str,
+    template: Optional[TemplateInfo] = None,
+    lane: Optional[str] = None,
+    admission: Optional[AdmissionController] = None
+) -> Optional[bytes]:
+    """
+    Preprocess markdown and convert it to DOCX, reusing cached results
+    
+    Concurrent calls for the same document and options wait for a single
+    conversion and all receive its result. Pandoc slots are taken in the
+    given priority lane, or in the lane matching the document size.
+    
+    With an admission controller, a slot is held only while pandoc runs for
+    a cache miss: cached results and requests joining a conversion already
+    in progress are answered without one.
+    
+    Args:
+        markdown_content: The original markdown content
+        template: Optional reference DOCX template to style the output with
+        lane: Optional priority lane (see utils.scheduler.select_lane)
+        admission: Optional admission controller to take a conversion slot from
+    
+    Returns:
+        DOCX file contents if successful, None otherwise
+    
+    Raises:
+        PreprocessingTimeout: If preprocessing exceeds PREPROCESS_TIME_BUDGET
+        PreprocessingCrashed: If the worker process preprocessing the document died
+        AdmissionRejected: If no conversion slot could be obtained
+        ValueError: If the lane does not exist
+    """
+    lane = select_lane(len(markdown_content), lane)
+    
+    # Preprocess markdown content (fix LaTeX formulas, etc.); large documents
+    # are handled by a worker process so the event loop stays responsive
+    try:
+        with stage_seconds.time(stage="preprocess"):
+            processed_markdown = await preprocess_pool.preprocess(markdown_content, PREPROCESS_TIME_BUDGET)
+    except PreprocessingTimeout:
+        conversion_failures.inc(cause="preprocess_timeout")
+        raise
+    except PreprocessingCrashed:
+        conversion_failures.inc(cause="preprocess_crash")
+        raise
+    
+    options = CONVERSION_OPTIONS
+    if template is not None:
+        options = {**CONVERSION_OPTIONS, "reference_doc": template.sha256}
+    key = make_cache_key(processed_markdown, pandoc_registry.info.version, options)
+    docx_bytes = await result_cache.get(key)
+    if docx_bytes is not None:
+        return docx_bytes
+    
+    # Identical requests arriving together share one conversion
+    reference_doc = template.path if template is not None else None
+    return await conversion_flights.run(
+        key,
+        lambda: _convert(key, processed_markdown, reference_doc, lane, admission)
+    )
+
+
+async def _convert(
+    key: str,
+    processed_markdown: str,
+    reference_doc: Optional[Path],
+    lane: str,
+    admission: Optional[AdmissionController] = None
+) -> Optional[bytes]:
+    """Run pandoc for a cache miss (holding an admission slot) and cache the result"""
+    # The admission slot is taken in the conversion's lane, before its pandoc
+    # slot: admission reserves slots per lane like the scheduler does, so bulk
+    # conversions waiting for pandoc never hold the slot an interactive one needs
+    async with admission.admit(lane) if admission is not None else nullcontext():
+        # Convert to DOCX over pandoc's stdin/stdout; very large documents are
+        # converted section by section in parallel and merged
+        if SECTION_PARALLEL_MIN_SIZE > 0 and len(processed_markdown) >= SECTION_PARALLEL_MIN_SIZE:
+            docx_bytes = await convert_markdown_sections_to_docx(processed_markdown, reference_doc, lane=lane)
+        else:
+            docx_bytes = await convert_markdown_to_docx_bytes(processed_markdown, reference_doc, lane)
+    if docx_bytes is not None:
+        docx_size_bytes.observe(len(docx_bytes))
+        await result_cache.put(key, docx_bytes)
+    
+    return docx_bytes
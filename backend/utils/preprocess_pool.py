@@ -0,0 +1,135 @@
+"""
+Process pool for CPU-heavy markdown preprocessing
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from .config import PREPROCESS_POOL_MIN_SIZE, PREPROCESS_WORKERS
+from .markdown_processor import preprocess_markdown
+
+
+class PreprocessingCrashed(Exception):
+    """Raised when the worker process preprocessing a document dies"""
+
+
+def _warm_up() -> None:
+    """Run once in every worker so the first real request skips the imports"""
+    preprocess_markdown("\\( x \\)")
+
+
+class PreprocessPool:
+    """
+    Runs preprocess_markdown() in worker processes for large documents.
+    
+    Preprocessing is pure Python and holds the GIL, so on the event loop a
+    multi-megabyte document stalls every other request of the worker. Documents
+    of at least `min_size` characters are sent to a ProcessPoolExecutor
+    instead; smaller ones stay inline, where they are cheaper than the IPC.
+    The time budget is applied inside the worker, from the moment it picks
+    the document up.
+    
+    A running worker cannot be interrupted short of killing the pool, so a
+    document whose request is cancelled keeps its worker busy until it is
+    done. The time budget bounds this: a worker never spends more than
+    PREPROCESS_TIME_BUDGET on one document, but with the budget disabled a
+    pathological document holds its worker for as long as it takes.
+    
+    If a worker dies, the pool is replaced and the requests it was serving
+    fail with PreprocessingCrashed; the document is not retried in the
+    server process, where it could do the same damage.
+    
+    Args:
+        workers: Number of worker processes (0 always preprocesses inline)
+        min_size: Smallest document, in characters, sent to the pool
+    """
+    
+    def __init__(self, workers: int = PREPROCESS_WORKERS, min_size: int = PREPROCESS_POOL_MIN_SIZE):
+        self.workers = workers
+        self.min_size = min_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        
+        self.inline_runs = 0
+        self.pool_runs = 0
+        self.pool_seconds = 0.0
+        self.in_flight = 0
+        self.restarts = 0
+    
+    def start(self) -> None:
+        """Create the worker processes and pre-warm them in the background"""
+        if self._executor is not None or self.workers <= 0:
+            return
+        # Fork is unsafe once the server has started threads
+        context = multiprocessing.get_context("spawn")
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        for _ in range(self.workers):
+            self._executor.submit(_warm_up)
+    
+    async def stop(self) -> None:
+        """Shut the worker processes down, dropping queued work"""
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+    
+    async def preprocess(self, markdown_content: str, time_budget: Optional[float] = None) -> str:
+        """
+        Preprocess markdown, in a worker process if the document is large
+        
+        Args:
+            markdown_content: The original markdown content
+            time_budget: Optional number of seconds preprocessing may take
+        
+        Returns:
+            Preprocessed markdown content
+        
+        Raises:
+            PreprocessingTimeout: If the time budget is exceeded
+            PreprocessingCrashed: If the worker process died
+        """
+        if self._executor is None or len(markdown_content) < self.min_size:
+            self.inline_runs += 1
+            return preprocess_markdown(markdown_content, time_budget)
+        
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        started = time.monotonic()
+        self.in_flight += 1
+        try:
+            result = await loop.run_in_executor(
+                executor, preprocess_markdown, markdown_content, time_budget
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OOM killer), possibly because
+            # of this very document; replace the pool once, however many
+            # requests were waiting on it
+            if self._executor is executor:
+                print("Preprocess pool broken, restarting it")
+                self.restarts += 1
+                self._executor = None
+                executor.shutdown(wait=False)
+                self.start()
+            raise PreprocessingCrashed("The preprocessing worker process died") from None
+        finally:
+            self.in_flight -= 1
+        
+        self.pool_runs += 1
+        self.pool_seconds += time.monotonic() - started
+        return result
+    
+    def stats(self) -> dict:
+        """Counters describing how preprocessing was dispatched"""
+        return {
+            "workers": self.workers if self._executor is not None else 0,
+            "min_size": self.min_size,
+            "inline_runs": self.inline_runs,
+            "pool_runs": self.pool_runs,
+            "pool_seconds": self.pool_seconds,
+            "in_flight": self.in_flight,
+            "restarts": self.restarts
+        }
+
+
+preprocess_pool = PreprocessPool()
@@ -0,0 +1,217 @@
+"""
+Priority lanes for the pandoc conversion slots
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+from .config import (
+    PANDOC_MAX_CONCURRENCY,
+    PRIORITY_BULK_RESERVED,
+    PRIORITY_BULK_WEIGHT,
+    PRIORITY_INTERACTIVE_MAX_SIZE,
+    PRIORITY_INTERACTIVE_RESERVED,
+    PRIORITY_INTERACTIVE_WEIGHT
+)
+from .metrics import pandoc_lane_queued, pandoc_lane_wait_seconds
+
+# Small documents a user is waiting on (/convert/text, /convert/markdown)
+LANE_INTERACTIVE = "interactive"
+# Uploads, batches, background jobs and large documents
+LANE_BULK = "bulk"
+LANES = (LANE_INTERACTIVE, LANE_BULK)
+
+
+def select_lane(size: int, requested: Optional[str] = None) -> str:
+    """
+    Pick the priority lane of a conversion
+    
+    Args:
+        size: Length of the markdown, in characters
+        requested: Lane chosen by the endpoint or the X-Priority header, if any
+    
+    Returns:
+        The requested lane, otherwise the interactive lane for documents of
+        at most PRIORITY_INTERACTIVE_MAX_SIZE characters and the bulk lane
+        for larger ones
+    
+    Raises:
+        ValueError: If the requested lane does not exist
+    """
+    if requested is not None:
+        requested = requested.strip().lower()
+        if requested not in LANES:
+            raise ValueError(f"Unknown priority lane '{requested}', expected one of: {', '.join(LANES)}")
+        return requested
+    return LANE_INTERACTIVE if size <= PRIORITY_INTERACTIVE_MAX_SIZE else LANE_BULK
+
+
+class _Lane:
+    """Waiting conversions and slot accounting of one priority lane"""
+    
+    def __init__(self, name: str, weight: int, reserved: int):
+        self.name = name
+        self.weight = max(weight, 1)
+        self.reserved = max(reserved, 0)
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        # Advances by 1 / weight for every conversion the lane starts
+        self.virtual_time = 0.0
+        
+        self.dispatched = 0
+        self.total_wait_seconds = 0.0
+
+
+class PandocScheduler:
+    """
+    Shares the pandoc slots between priority lanes.
+    
+    At most `capacity` conversions run at once. Each lane has `reserved`
+    slots that no other lane may take, so a burst of bulk exports can never
+    occupy every slot ahead of an interactive request; the other slots are
+    shared. When lanes compete for a shared slot, it goes to the lane
+    furthest behind its weighted share (start-time fair queueing): with
+    weights 4 and 1, interactive conversions get four slots for every bulk
+    one while both lanes have work waiting, and either lane may use every
+    shared slot while the other is idle. Within a lane, conversions start
+    in arrival order.
+    
+    Args:
+        capacity: Conversions running at once across all lanes
+        lanes: (weight, reserved slots) of each lane, by name
+    
+    Raises:
+        ValueError: If the lanes reserve more slots than there are
+    """
+    
+    def __init__(
+        self,
+        capacity: int = PANDOC_MAX_CONCURRENCY,
+        lanes: Optional[Dict[str, Tuple[int, int]]] = None
+    ):
+        if lanes is None:
+            lanes = {
+                LANE_INTERACTIVE: (PRIORITY_INTERACTIVE_WEIGHT, PRIORITY_INTERACTIVE_RESERVED),
+                LANE_BULK: (PRIORITY_BULK_WEIGHT, PRIORITY_BULK_RESERVED)
+            }
+        self.capacity = max(capacity, 1)
+        self.lanes = {name: _Lane(name, weight, reserved) for name, (weight, reserved) in lanes.items()}
+        if sum(lane.reserved for lane in self.lanes.values()) > self.capacity:
+            raise ValueError(f"Priority lanes reserve more than the {self.capacity} pandoc slots")
+        self._virtual_clock = 0.0
+    
+    @property
+    def active(self) -> int:
+        """Conversions currently holding a slot"""
+        return sum(lane.active for lane in self.lanes.values())
+    
+    def _can_start(self, lane: _Lane) -> bool:
+        # Slots other lanes have reserved but are not using stay free for them
+        held_back = sum(
+            max(0, other.reserved - other.active)
+            for other in self.lanes.values() if other is not lane
+        )
+        return self.active + held_back < self.capacity
+    
+    def _start_tag(self, lane: _Lane) -> float:
+        # A lane that was idle does not bank credit for the time it had no work
+        return max(lane.virtual_time, self._virtual_clock)
+    
+    def _start(self, lane: _Lane) -> None:
+        start_tag = self._start_tag(lane)
+        self._virtual_clock = start_tag
+        lane.virtual_time = start_tag + 1 / lane.weight
+        lane.active += 1
+        lane.dispatched += 1
+    
+    def _has_waiters(self, lane: _Lane) -> bool:
+        while lane.waiters and lane.waiters[0].done():
+            lane.waiters.popleft()
+        return bool(lane.waiters)
+    
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting conversions, fairest lane first"""
+        while True:
+            candidates = [
+                lane for lane in self.lanes.values()
+                if self._has_waiters(lane) and self._can_start(lane)
+            ]
+            if not candidates:
+                return
+            lane = min(candidates, key=self._start_tag)
+            self._start(lane)
+            lane.waiters.popleft().set_result(None)
+    
+    async def acquire(self, lane_name: str) -> None:
+        """
+        Wait for a pandoc slot in a lane
+        
+        Args:
+            lane_name: One of the configured lanes
+        """
+        lane = self.lanes[lane_name]
+        if not lane.waiters and self._can_start(lane):
+            self._start(lane)
+            pandoc_lane_wait_seconds.observe(0, lane=lane.name)
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        lane.waiters.append(future)
+        pandoc_lane_queued.inc(lane=lane.name)
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # A slot handed over while the caller was being cancelled moves on
+            if future.done() and not future.cancelled():
+                self.release(lane_name)
+            raise
+        finally:
+            if future in lane.waiters:
+                lane.waiters.remove(future)
+            pandoc_lane_queued.dec(lane=lane.name)
+            waited = time.monotonic() - started
+            lane.total_wait_seconds += waited
+            pandoc_lane_wait_seconds.observe(waited, lane=lane.name)
+    
+    def release(self, lane_name: str) -> None:
+        """
+        Give a slot back and start the next waiting conversions
+        
+        Args:
+            lane_name: The lane the slot was acquired in
+        """
+        self.lanes[lane_name].active -= 1
+        self._dispatch()
+    
+    @asynccontextmanager
+    async def slot(self, lane_name: str):
+        """Hold a pandoc slot in a lane for the enclosed block"""
+        await self.acquire(lane_name)
+        try:
+            yield
+        finally:
+            self.release(lane_name)
+    
+    def stats(self) -> dict:
+        """Slot usage and waiting conversions of every lane"""
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "lanes": {
+                lane.name: {
+                    "weight": lane.weight,
+                    "reserved": lane.reserved,
+                    "active": lane.active,
+                    "queued": len(lane.waiters),
+                    "dispatched": lane.dispatched,
+                    "total_wait_seconds": lane.total_wait_seconds
+                }
+                for lane in self.lanes.values()
+            }
+        }
+
+
+pandoc_scheduler = PandocScheduler()
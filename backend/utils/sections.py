@@ -0,0 +1,187 @@
+"""
+Section-parallel conversion of very large markdown documents
+"""
+import asyncio
+import re
+from pathlib import Path
+from typing import List, Optional
+
+from .config import SECTION_PARALLEL_MAX_PARTS
+from .docx_merge import DocxMergeError, merge_docx
+from .pandoc import convert_markdown_to_docx_bytes
+from .scheduler import LANE_BULK
+
+_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_HEADING = re.compile(r"^(#{1,6})(?:[ \t]|$)")
+_DEFINITION = re.compile(r"^ {0,3}\[[^\]]+\]:")
+_YAML_START = re.compile(r"^---[ \t]*$")
+_YAML_END = re.compile(r"^(?:---|\.\.\.)[ \t]*$")
+
+
+def _scan(lines: List[str]):
+    """
+    Walk the lines of a document outside code fences and $$ blocks
+    
+    Yields (index, level) for every line that matters to the split: headings
+    with their level, and footnote or link reference definitions with level
+    0 (pandoc resolves those across the whole document).
+    """
+    fence = None
+    in_math = False
+    previous_blank = True
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if fence is not None:
+            match = _FENCE.match(line)
+            if match and match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence) \
+                    and not line[match.end():].strip():
+                fence = None
+        elif in_math:
+            if line.count("$$") % 2:
+                in_math = False
+        else:
+            match = _FENCE.match(line)
+            if match:
+                fence = match.group(1)
+            elif line.count("$$") % 2:
+                in_math = True
+            elif previous_blank:
+                heading = _HEADING.match(line)
+                if heading:
+                    yield index, len(heading.group(1))
+                elif _DEFINITION.match(line):
+                    yield index, 0
+        previous_blank = not stripped
+
+
+def split_markdown_sections(markdown_content: str, parts: int) -> List[str]:
+    """
+    Split a preprocessed markdown document at its top-level headings
+    
+    The top level is the shallowest heading level with enough headings to
+    make `parts` chunks (so "# Title" followed by "## Section" headings
+    splits at the sections). Only headings outside code fences and $$
+    blocks are split points, so every chunk is valid markdown on its own.
+    Footnote and link reference definitions are copied into every chunk,
+    as a reference and its definition may end up in different ones. A YAML
+    metadata block stays with the first chunk. Sections are grouped into at
+    most `parts` chunks of about the same size.
+    
+    Args:
+        markdown_content: Preprocessed markdown content
+        parts: Maximum number of chunks
+    
+    Returns:
+        The chunks in document order (a single chunk if the document has no
+        safe split points)
+    """
+    if parts <= 1 or not markdown_content:
+        return [markdown_content]
+    
+    lines = markdown_content.splitlines(keepends=True)
+    start = 0
+    if lines and _YAML_START.match(lines[0]):
+        for index in range(1, len(lines)):
+            if _YAML_END.match(lines[index]):
+                start = index + 1
+                break
+    
+    headings = []
+    definitions = []
+    for index, level in _scan(lines[start:]):
+        index += start
+        if level:
+            headings.append((index, level))
+            continue
+        # Definitions (and consecutive ones) run until a blank line followed
+        # by an unindented line, like list items
+        end = index + 1
+        while end < len(lines):
+            if not lines[end].strip():
+                if end + 1 >= len(lines) or not lines[end + 1].startswith((" ", "\t")):
+                    break
+            elif _HEADING.match(lines[end]):
+                break
+            end += 1
+        definitions.append((index, end))
+    
+    # Split at the shallowest heading level with enough split points; a
+    # lone title heading at the top does not count
+    first_content = next((index for index in range(start, len(lines)) if lines[index].strip()), len(lines))
+    candidates = {}
+    for index, level in headings:
+        if index > first_content:
+            candidates.setdefault(level, []).append(index)
+    if not candidates:
+        return [markdown_content]
+    boundaries = next(
+        (candidates[level] for level in sorted(candidates) if len(candidates[level]) >= parts - 1),
+        max(candidates.values(), key=len)
+    )
+    
+    # Definitions are moved out of the body and appended to every chunk
+    in_definition = set()
+    for first, end in definitions:
+        in_definition.update(range(first, end))
+    shared = "\n".join("".join(lines[first:end]).rstrip("\n") + "\n" for first, end in definitions)
+    body = ["" if index in in_definition else line for index, line in enumerate(lines)]
+    
+    sections = []
+    previous = 0
+    for boundary in boundaries + [len(lines)]:
+        sections.append("".join(body[previous:boundary]))
+        previous = boundary
+    
+    # Group consecutive sections into chunks of roughly equal size
+    target = sum(len(section) for section in sections) / parts
+    chunks = [""]
+    for section in sections:
+        if chunks[-1] and len(chunks[-1]) + len(section) / 2 > target and len(chunks) < parts:
+            chunks.append("")
+        chunks[-1] += section
+    
+    if len(chunks) == 1:
+        return [markdown_content]
+    if shared:
+        chunks = [chunk.rstrip("\n") + "\n\n" + shared for chunk in chunks]
+    return chunks
+
+
+async def convert_markdown_sections_to_docx(
+    markdown_content: str,
+    reference_doc: Optional[Path] = None,
+    parts: int = SECTION_PARALLEL_MAX_PARTS,
+    lane: str = LANE_BULK
+) -> Optional[bytes]:
+    """
+    Convert a large document section by section and merge the results
+    
+    Each chunk is an ordinary conversion, so it goes through the same
+    concurrency limit, warm processes and server backend as any other.
+    Documents without safe split points, or whose chunks cannot be merged,
+    are converted in one piece instead.
+    
+    Args:
+        markdown_content: Preprocessed markdown content
+        reference_doc: Optional reference DOCX to take styles from
+        parts: Maximum number of chunks converted concurrently
+        lane: Priority lane the chunks wait for pandoc slots in
+    
+    Returns:
+        DOCX file contents if successful, None otherwise
+    """
+    chunks = split_markdown_sections(markdown_content, parts)
+    if len(chunks) == 1:
+        return await convert_markdown_to_docx_bytes(markdown_content, reference_doc, lane)
+    
+    results = await asyncio.gather(
+        *(convert_markdown_to_docx_bytes(chunk, reference_doc, lane) for chunk in chunks)
+    )
+    if any(result is None for result in results):
+        return None
+    
+    try:
+        return await asyncio.to_thread(merge_docx, list(results))
+    except DocxMergeError as e:
+        print(f"Could not merge {len(chunks)} sections, converting in one piece: {str(e)}")
+        return await convert_markdown_to_docx_bytes(markdown_content, reference_doc, lane)
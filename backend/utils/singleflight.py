@@ -0,0 +1,99 @@
+"""
+Single-flight execution of identical concurrent conversions
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """One conversion in progress and the number of callers waiting on it"""
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        self.abandoned = False
+
+
+class SingleFlight:
+    """
+    Runs at most one conversion per key at a time.
+    
+    Callers that ask for a key while a conversion of it is in progress
+    wait for that conversion and get its result, instead of starting
+    pandoc again. This covers the bursts a result cache cannot: a
+    double-clicked export or a client retry arrive before the first result
+    is cached. The conversion runs as its own task, so one caller going
+    away does not fail the others; it is cancelled only once every caller
+    has gone. The key stays taken until a cancelled conversion has wound
+    down, so a new identical call never runs alongside it.
+    """
+    
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+    
+    @property
+    def in_flight(self) -> int:
+        """Keys currently being converted"""
+        return len(self._flights)
+    
+    async def run(self, key: str, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `work` for a key, or join the run already in progress
+        
+        Args:
+            key: Identity of the work (e.g. the result cache key)
+            work: Coroutine function performing the conversion
+        
+        Returns:
+            The result of `work`, shared by every concurrent caller
+        """
+        flight = self._flights.get(key)
+        while flight is not None and flight.abandoned:
+            # Let the cancelled run finish killing pandoc, then start afresh
+            await asyncio.wait({flight.task})
+            flight = self._flights.get(key)
+        
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(work()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._finished(key, flight, task))
+            self.leaders += 1
+        else:
+            self.followers += 1
+        
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Nobody wants the result any more; stop the run and wait
+                # for it, so its pandoc process is gone when this returns
+                flight.abandoned = True
+                flight.task.cancel()
+                await asyncio.wait({flight.task})
+            raise
+        finally:
+            flight.waiters -= 1
+    
+    def _finished(self, key: str, flight: _Flight, task: asyncio.Task) -> None:
+        # Retrieve the outcome, so a run whose callers all left does not
+        # log "Task exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+    
+    def stats(self) -> dict:
+        """How many conversions ran and how many callers shared one"""
+        return {
+            "in_flight": self.in_flight,
+            "leaders": self.leaders,
+            "followers": self.followers
+        }
+
+
+conversion_flights = SingleFlight()
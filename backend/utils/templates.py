@@ -0,0 +1,215 @@
+"""
+Registry of reference DOCX templates used for styled output
+"""
+import hashlib
+import io
+import os
+import re
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from xml.etree import ElementTree
+
+from .config import TEMPLATE_MAX_BYTES, TEMPLATES_DIR
+from .pandoc import docx_stdin_args, pandoc_warm_pool, save_docx
+
+_TEMPLATE_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_REQUIRED_PARTS = ("[Content_Types].xml", "word/document.xml", "word/styles.xml")
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class TemplateError(Exception):
+    """Raised when a template name or file is not acceptable"""
+
+
+@dataclass
+class TemplateInfo:
+    """Metadata of a registered reference DOCX"""
+    name: str
+    path: Path
+    sha256: str
+    size: int
+    registered_at: float
+    styles: List[str] = field(default_factory=list)
+    # Modification time of the file the metadata was read from
+    mtime_ns: int = 0
+    
+    def to_dict(self) -> dict:
+        """Public view of the template"""
+        return {
+            "name": self.name,
+            "sha256": self.sha256,
+            "size": self.size,
+            "registered_at": self.registered_at,
+            "styles": self.styles
+        }
+
+
+def read_reference_docx_styles(data: bytes) -> List[str]:
+    """
+    Check that bytes are a usable reference DOCX and list its styles
+    
+    Args:
+        data: Contents of the uploaded DOCX
+    
+    Returns:
+        Names of the styles defined in word/styles.xml
+    
+    Raises:
+        TemplateError: If the file is not a DOCX pandoc can take styles from
+    """
+    if TEMPLATE_MAX_BYTES > 0 and len(data) > TEMPLATE_MAX_BYTES:
+        raise TemplateError(f"Template is too large. The maximum size is {TEMPLATE_MAX_BYTES} bytes.")
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            names = set(archive.namelist())
+            missing = [part for part in _REQUIRED_PARTS if part not in names]
+            if missing:
+                raise TemplateError(f"Template is missing {', '.join(missing)}")
+            # Styles are parsed in memory; refuse to inflate anything huge
+            if archive.getinfo("word/styles.xml").file_size > 16 * 1024 * 1024:
+                raise TemplateError("Template styles are too large")
+            styles_xml = archive.read("word/styles.xml")
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, KeyError):
+        raise TemplateError("Template must be a .docx file")
+    
+    try:
+        root = ElementTree.fromstring(styles_xml)
+    except ElementTree.ParseError:
+        raise TemplateError("Template styles are not valid XML")
+    
+    styles = []
+    for style in root.iter(f"{_WORD_NS}style"):
+        name = style.find(f"{_WORD_NS}name")
+        if name is not None:
+            styles.append(name.get(f"{_WORD_NS}val"))
+    return styles
+
+
+class TemplateRegistry:
+    """
+    Named reference DOCX files, validated once and kept on local disk.
+    
+    Templates live in `directory` as <name>.docx. Their metadata (hash,
+    size, style names) is computed when they are registered or first
+    loaded and then served from memory. The content hash is what the
+    result cache keys on, so replacing a template never returns output
+    styled by the old one. The most recently used templates also get warm
+    pandoc processes (see PandocWarmPool), so their conversions start as
+    fast as plain ones.
+    
+    Every server process keeps its own copy of the metadata, so lookups
+    check the template file again: a template registered, replaced or
+    deleted through another process is picked up on its next use. Only a
+    file whose size or modification time changed is read again.
+    
+    Args:
+        directory: Directory the template files are stored in
+    """
+    
+    def __init__(self, directory: Path = TEMPLATES_DIR):
+        self.directory = Path(directory)
+        self.templates: Dict[str, TemplateInfo] = {}
+    
+    def load(self) -> None:
+        """Scan the template directory and read the metadata (blocking)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.list()
+    
+    def _describe(self, name: str, path: Path, data: bytes) -> TemplateInfo:
+        return TemplateInfo(
+            name=name,
+            path=path,
+            sha256=hashlib.sha256(data).hexdigest(),
+            size=len(data),
+            registered_at=0.0,
+            styles=read_reference_docx_styles(data)
+        )
+    
+    def _stamp(self, template: TemplateInfo, stat: os.stat_result) -> TemplateInfo:
+        template.registered_at = stat.st_mtime
+        template.mtime_ns = stat.st_mtime_ns
+        return template
+    
+    def _forget(self, name: str) -> None:
+        template = self.templates.pop(name, None)
+        if template is not None:
+            pandoc_warm_pool.forget(docx_stdin_args(template.path))
+    
+    def get(self, name: str) -> Optional[TemplateInfo]:
+        """Look up a template by name (None if unknown; blocking)"""
+        if not _TEMPLATE_NAME.match(name):
+            return None
+        path = self.directory / f"{name}.docx"
+        known = self.templates.get(name)
+        try:
+            stat = path.stat()
+            if known is not None and (known.size, known.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                return known
+            template = self._stamp(self._describe(name, path, path.read_bytes()), stat)
+        except FileNotFoundError:
+            self._forget(name)
+            return None
+        except (OSError, TemplateError) as e:
+            print(f"Skipping template {path.name}: {str(e)}")
+            self._forget(name)
+            return None
+        
+        self.templates[name] = template
+        return template
+    
+    def list(self) -> List[TemplateInfo]:
+        """All templates in the directory, sorted by name (blocking)"""
+        names = {path.stem for path in self.directory.glob("*.docx")} | set(self.templates)
+        templates = [self.get(name) for name in sorted(names)]
+        return [template for template in templates if template is not None]
+    
+    def register(self, name: str, data: bytes) -> TemplateInfo:
+        """
+        Validate a reference DOCX and store it under a name (blocking)
+        
+        Registering an existing name replaces that template.
+        
+        Args:
+            name: Template name (letters, digits, "-" and "_")
+            data: Contents of the reference DOCX
+        
+        Returns:
+            Metadata of the stored template
+        
+        Raises:
+            TemplateError: If the name or the file is invalid
+        """
+        if not _TEMPLATE_NAME.match(name):
+            raise TemplateError("Template names may only contain letters, digits, '-' and '_' (at most 64)")
+        
+        path = self.directory / f"{name}.docx"
+        template = self._describe(name, path, data)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        save_docx(data, path)
+        
+        self.templates[name] = self._stamp(template, path.stat())
+        return template
+    
+    def remove(self, name: str) -> bool:
+        """
+        Delete a template (blocking)
+        
+        Args:
+            name: Template name
+        
+        Returns:
+            True if the template existed
+        """
+        self._forget(name)
+        if not _TEMPLATE_NAME.match(name):
+            return False
+        try:
+            os.remove(self.directory / f"{name}.docx")
+        except FileNotFoundError:
+            return False
+        return True
+
+
+template_registry = TemplateRegistry()
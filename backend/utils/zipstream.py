@@ -0,0 +1,87 @@
+"""
+Incremental ZIP writer for streaming responses
+"""
+import zipfile
+
+
+class _ChunkBuffer:
+    """Write-only, unseekable file object collecting what zipfile writes"""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self) -> None:
+        pass
+    
+    def take(self) -> bytes:
+        """Return everything written since the last call"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ZipStream:
+    """
+    Build a ZIP archive piece by piece.
+    
+    Every add() returns the bytes of the new entry, so an archive can be
+    sent to the client while later entries are still being produced. The
+    underlying buffer is not seekable, which makes zipfile write data
+    descriptors instead of patching local headers afterwards.
+    """
+    
+    def __init__(self, compression: int = zipfile.ZIP_STORED):
+        self._buffer = _ChunkBuffer()
+        self._zip = zipfile.ZipFile(self._buffer, mode="w", compression=compression)
+        self._names = set()
+    
+    def unique_name(self, name: str) -> str:
+        """
+        Return `name`, or `name` with a numeric suffix if it is already taken
+        
+        Args:
+            name: Desired file name inside the archive
+        
+        Returns:
+            A name not used by any entry added so far
+        """
+        if name not in self._names:
+            return name
+        stem, dot, extension = name.rpartition(".")
+        if not dot:
+            stem, extension = name, ""
+        counter = 2
+        while True:
+            candidate = f"{stem}_{counter}{dot}{extension}"
+            if candidate not in self._names:
+                return candidate
+            counter += 1
+    
+    def add(self, name: str, data: bytes) -> bytes:
+        """
+        Add a file to the archive
+        
+        Args:
+            name: File name inside the archive (must be unique)
+            data: File contents
+        
+        Returns:
+            The bytes to send for this entry
+        """
+        self._names.add(name)
+        self._zip.writestr(name, data)
+        return self._buffer.take()
+    
+    def close(self) -> bytes:
+        """
+        Finish the archive
+        
+        Returns:
+            The trailing central directory bytes
+        """
+        self._zip.close()
+        return self._buffer.take()
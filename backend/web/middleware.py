@@ -0,0 +1,161 @@
+"""
+ASGI middleware for the web application
+"""
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from utils import DecompressionError, body_decoder
+
+
+def _too_large(max_bytes: int) -> str:
+    return f"Request body is too large. The maximum size is {max_bytes} bytes."
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies larger than a per-path limit with 413.
+    
+    Requests announcing a larger Content-Length are rejected before any of
+    the body is read. Other requests (e.g. chunked uploads) are counted as
+    they stream in and fail as soon as the limit is crossed, so an oversized
+    upload is never buffered or spooled to disk in full.
+    
+    Args:
+        app: The ASGI application to wrap
+        limits: (path prefix, max bytes) pairs; the first matching prefix wins
+    """
+    
+    def __init__(self, app, limits: List[Tuple[str, int]]):
+        self.app = app
+        self.limits = limits
+    
+    def _limit_for(self, path: str) -> Optional[int]:
+        for prefix, max_bytes in self.limits:
+            if path.startswith(prefix):
+                return max_bytes if max_bytes > 0 else None
+        return None
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        max_bytes = self._limit_for(scope["path"])
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+        
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    too_large = int(value) > max_bytes
+                except ValueError:
+                    too_large = False
+                if too_large:
+                    response = JSONResponse({"detail": _too_large(max_bytes)}, status_code=413)
+                    await response(scope, receive, send)
+                    return
+        
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # Raised inside the route's body parsing, where FastAPI
+                    # passes HTTPExceptions through to the exception handler
+                    raise HTTPException(status_code=413, detail=_too_large(max_bytes))
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+
+class RequestDecompressionMiddleware:
+    """
+    Decompress request bodies sent with a Content-Encoding (gzip or deflate).
+    
+    The body is decompressed as it streams in, one bounded piece at a time,
+    so neither the compressed nor the decompressed body is ever held as a
+    whole. Routes see a plain body: Content-Encoding and Content-Length are
+    removed, which also makes the body size limits apply to the
+    decompressed bytes. Decompression stops with 413 once `max_bytes` have
+    come out, so a small zip bomb cannot inflate into memory or disk.
+    
+    Args:
+        app: The ASGI application to wrap
+        prefixes: Path prefixes whose request bodies may be compressed
+        max_bytes: Largest decompressed body accepted (0 disables the limit)
+    """
+    
+    def __init__(self, app, prefixes: List[str], max_bytes: int):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        self.max_bytes = max_bytes
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = None
+        for name, value in scope["headers"]:
+            if name == b"content-encoding":
+                encoding = value.decode("latin-1")
+        try:
+            decoder = body_decoder(encoding)
+        except ValueError as e:
+            response = JSONResponse({"detail": str(e)}, status_code=415)
+            await response(scope, receive, send)
+            return
+        if decoder is None:
+            await self.app(scope, receive, send)
+            return
+        
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+        pieces = None
+        more_body = True
+        finished = False
+        produced = 0
+        
+        async def decompressing_receive():
+            nonlocal pieces, more_body, finished, produced
+            if finished:
+                return await receive()
+            # Raised inside the route's body parsing, where FastAPI passes
+            # HTTPExceptions through to the exception handler
+            try:
+                while True:
+                    if pieces is not None:
+                        piece = next(pieces, None)
+                        if piece is not None:
+                            produced += len(piece)
+                            if self.max_bytes > 0 and produced > self.max_bytes:
+                                raise HTTPException(
+                                    status_code=413,
+                                    detail=f"Decompressed request body is too large. The maximum size is {self.max_bytes} bytes."
+                                )
+                            return {"type": "http.request", "body": piece, "more_body": True}
+                        pieces = None
+                    if not more_body:
+                        decoder.finish()
+                        finished = True
+                        return {"type": "http.request", "body": b"", "more_body": False}
+                    
+                    message = await receive()
+                    if message["type"] != "http.request":
+                        return message
+                    more_body = message.get("more_body", False)
+                    pieces = decoder.feed(message.get("body", b""))
+            except DecompressionError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
+        await self.app(scope, decompressing_receive, send)
+
@@ -2,5 +2,7 @@
 Initialize web routes package
 """
 from .conversion import router as conversion_router
+from .jobs import router as jobs_router
+from .templates import router as templates_router
 
-__all__ = ['conversion_router']
+__all__ = ['conversion_router', 'jobs_router', 'templates_router']
@@ -1,39 +1,346 @@
 """
 Conversion API routes for markdown to DOCX conversion
 """
+import asyncio
+import codecs
+import json
 import os
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Awaitable, List, Optional, TypeVar
+from urllib.parse import quote, unquote
 
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Header, Query
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 from utils import (
+    AdmissionRejected,
+    PreprocessingCrashed,
+    PreprocessingTimeout,
+    TemplateInfo,
+    ZipStream,
+    admission_controller,
     check_pandoc_installed,
-    convert_md_to_docx,
-    preprocess_markdown,
+    conversion_cancellations,
+    conversion_failures,
+    render_docx,
+    save_docx,
+    select_lane,
+    stage_seconds,
+    template_registry,
     MD_DIR,
-    DOCX_DIR
+    DOCX_DIR,
+    BATCH_MAX_CONCURRENCY,
+    BATCH_MAX_ITEMS,
+    LANE_BULK,
+    MAX_UPLOAD_BYTES,
+    UPLOAD_CHUNK_SIZE
 )
 
 router = APIRouter()
 
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Content types accepted as a raw markdown request body
+MARKDOWN_MEDIA_TYPES = ("text/markdown", "text/x-markdown", "text/plain")
+
+# Status logged for requests whose client went away (nothing is sent)
+CLIENT_CLOSED_REQUEST = 499
+
+# Error for conversions turned away by admission control
+BUSY_DETAIL = "The server is busy converting other documents. Please try again later."
+
+T = TypeVar("T")
+
+
+class _TimedFileResponse(FileResponse):
+    """FileResponse that records how long sending the file took"""
+    
+    async def __call__(self, scope, receive, send):
+        with stage_seconds.time(stage="download"):
+            await super().__call__(scope, receive, send)
+
 
 class MarkdownTextRequest(BaseModel):
     markdown: str
     filename: Optional[str] = None
+    template: Optional[str] = None
+
+
+_batch_adapter = TypeAdapter(List[MarkdownTextRequest])
+
+
+async def _decode_markdown_chunks(chunks: AsyncIterator[bytes], what: str) -> str:
+    """
+    Decode markdown arriving in chunks as UTF-8
+    
+    The raw bytes are never held in memory as a whole: each chunk is
+    validated and decoded as soon as it is read.
+    
+    Args:
+        chunks: The raw bytes, chunk by chunk
+        what: What the bytes are ("File", "Request body"), for error messages
+    
+    Returns:
+        The decoded markdown text
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    parts = []
+    size = 0
+    try:
+        with stage_seconds.time(stage="parse"):
+            async for chunk in chunks:
+                size += len(chunk)
+                if MAX_UPLOAD_BYTES > 0 and size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"{what} is too large. The maximum size is {MAX_UPLOAD_BYTES} bytes."
+                    )
+                parts.append(decoder.decode(chunk))
+            parts.append(decoder.decode(b"", final=True))
+    except UnicodeDecodeError:
+        conversion_failures.inc(cause="decode_error")
+        raise HTTPException(status_code=400, detail=f"{what} must be UTF-8 encoded text")
+    
+    return "".join(parts)
+
+
+async def _read_markdown_upload(file: UploadFile) -> str:
+    """
+    Read and decode an uploaded markdown file chunk by chunk
+    
+    Args:
+        file: The uploaded file
+    
+    Returns:
+        The decoded markdown text
+    """
+    async def chunks():
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+    
+    return await _decode_markdown_chunks(chunks(), "File")
+
+
+def _unique_docx_filename(filename: Optional[str]) -> str:
+    """
+    Build a unique DOCX file name from an optional client supplied name
+    
+    Args:
+        filename: Optional custom filename (extensions are removed)
+    
+    Returns:
+        File name of the form <base>_<id>.docx
+    """
+    unique_id = str(uuid.uuid4())
+    base_filename = filename or f"converted_{unique_id[:8]}"
+    
+    # Remove any file extensions if provided
+    base_filename = base_filename.replace(".md", "").replace(".docx", "")
+    
+    return f"{base_filename}_{unique_id[:8]}.docx"
+
+
+async def _resolve_template(name: Optional[str]) -> Optional[TemplateInfo]:
+    """
+    Look up the reference DOCX template a request asked for
+    
+    Args:
+        name: Template name from the request, if any
+    
+    Returns:
+        The template, or None if no template was requested
+    """
+    if not name:
+        return None
+    template = await asyncio.to_thread(template_registry.get, name)
+    if template is None:
+        raise HTTPException(status_code=400, detail=f"Unknown template: {name}")
+    return template
+
+
+class _ClientDisconnected(Exception):
+    """Raised when the client went away before its conversion finished"""
+
+
+async def _cancel_on_disconnect(request: Request, conversion: Awaitable[T]) -> T:
+    """
+    Await a conversion, cancelling it as soon as the client disconnects
+    
+    Once the body has been read, the next message of a request is its
+    http.disconnect, so waiting for it costs nothing while pandoc runs.
+    Cancelling the conversion kills its pandoc process right away, unless
+    identical requests are still waiting for the same result.
+    
+    Args:
+        request: The request the conversion is for (its body already read)
+        conversion: The conversion to run
+    
+    Returns:
+        The result of the conversion
+    
+    Raises:
+        _ClientDisconnected: If the client disconnected first
+    """
+    async def disconnected():
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+    
+    work = asyncio.ensure_future(conversion)
+    watcher = asyncio.ensure_future(disconnected())
+    try:
+        done, _ = await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not work.done():
+            work.cancel()
+            # Wait for pandoc to be killed before the request slot is given back
+            await asyncio.gather(work, return_exceptions=True)
+    if work in done:
+        return work.result()
+    watcher.result()
+    raise _ClientDisconnected()
+
+
+def _priority_lane(x_priority: Optional[str], default: Optional[str] = None) -> Optional[str]:
+    """
+    Priority lane a request asked for with the X-Priority header
+    
+    Args:
+        x_priority: Header value ("interactive" or "bulk"), if sent
+        default: Lane of the endpoint (None picks the lane by document size)
+    
+    Returns:
+        The lane name, or None to pick it by document size
+    """
+    if x_priority is None:
+        return default
+    try:
+        return select_lane(0, x_priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _wants_docx(stream: bool, accept: Optional[str]) -> bool:
+    """True if the client asked for the DOCX itself instead of a download URL"""
+    return stream or (accept is not None and DOCX_MEDIA_TYPE in accept)
+
+
+def _docx_response(docx_bytes: bytes, docx_filename: str) -> Response:
+    """Send DOCX bytes as an attachment"""
+    quoted = quote(docx_filename)
+    if quoted != docx_filename:
+        disposition = f"attachment; filename*=utf-8''{quoted}"
+    else:
+        disposition = f'attachment; filename="{docx_filename}"'
+    return Response(
+        content=docx_bytes,
+        media_type=DOCX_MEDIA_TYPE,
+        headers={"Content-Disposition": disposition}
+    )
+
+
+async def _convert_and_save(
+    markdown_content: str,
+    docx_filename: str,
+    stream: bool = False,
+    template: Optional[TemplateInfo] = None,
+    lane: Optional[str] = None,
+    request: Optional[Request] = None
+):
+    """
+    Convert markdown to DOCX and persist it for download (or send it directly)
+    
+    Args:
+        markdown_content: The original markdown content
+        docx_filename: Name of the DOCX file to create in DOCX_DIR
+        stream: Return the DOCX in the response body instead of saving it
+        template: Optional reference DOCX template to style the output with
+        lane: Priority lane of the conversion (None picks it by size)
+        request: The HTTP request; if its client disconnects, the conversion
+            is cancelled and nothing is saved
+    
+    Returns:
+        Response payload with the download URL, or the DOCX itself if streaming
+    """
+    # Preprocess and convert, reusing a cached result when available
+    try:
+        conversion = render_docx(markdown_content, template, lane, admission_controller)
+        if request is not None:
+            docx_bytes = await _cancel_on_disconnect(request, conversion)
+        else:
+            docx_bytes = await conversion
+    except _ClientDisconnected:
+        print(f"Client disconnected, cancelled the conversion of {docx_filename}")
+        conversion_cancellations.inc(endpoint=request.url.path)
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except PreprocessingTimeout:
+        raise HTTPException(
+            status_code=422,
+            detail="The markdown took too long to process. Please split it into smaller documents."
+        )
+    except PreprocessingCrashed:
+        raise HTTPException(
+            status_code=422,
+            detail="The markdown crashed the preprocessing worker. Please split it into smaller documents."
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=BUSY_DETAIL,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    if docx_bytes is None:
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to convert markdown to DOCX. Please check your markdown syntax."
+        )
+    
+    # Single round trip: send the document right away, nothing is persisted
+    if stream:
+        return _docx_response(docx_bytes, docx_filename)
+    
+    # Persist the result so it can be fetched from /download (off the event loop)
+    await asyncio.to_thread(save_docx, docx_bytes, DOCX_DIR / docx_filename)
+    
+    # Return download URL
+    return {
+        "success": True,
+        "message": "Conversion successful",
+        "download_url": f"/download/{docx_filename}",
+        "filename": docx_filename
+    }
 
 
 @router.post("/convert/text")
-async def convert_text_to_docx(request: MarkdownTextRequest):
+async def convert_text_to_docx(
+    request: MarkdownTextRequest,
+    http_request: Request,
+    stream: bool = Query(False),
+    accept: Optional[str] = Header(None),
+    x_priority: Optional[str] = Header(None)
+):
     """
     Convert markdown text to DOCX
     
     Request body:
     - markdown: The markdown text content
     - filename: Optional custom filename (without extension)
+    - template: Optional name of a registered reference DOCX template
+    
+    Query parameters:
+    - stream: Return the DOCX file itself (same as sending an Accept header
+      with the DOCX media type)
+    
+    Headers:
+    - X-Priority: Optional "interactive" or "bulk" lane for the conversion;
+      by default small documents run in the interactive lane
     
     Returns:
     - download_url: URL to download the converted DOCX file
@@ -48,43 +355,95 @@ async def convert_text_to_docx(request: MarkdownTextRequest):
     if not request.markdown or not request.markdown.strip():
         raise HTTPException(status_code=400, detail="Markdown content is required")
     
+    template = await _resolve_template(request.template)
+    lane = _priority_lane(x_priority)
+    
     # Generate unique filename
-    unique_id = str(uuid.uuid4())
-    base_filename = request.filename or f"converted_{unique_id[:8]}"
+    docx_filename = _unique_docx_filename(request.filename)
     
-    # Remove any file extensions if provided
-    base_filename = base_filename.replace(".md", "").replace(".docx", "")
+    try:
+        return await _convert_and_save(
+            request.markdown,
+            docx_filename,
+            _wants_docx(stream, accept),
+            template,
+            lane,
+            http_request
+        )
     
-    md_filename = f"{base_filename}_{unique_id[:8]}.md"
-    docx_filename = f"{base_filename}_{unique_id[:8]}.docx"
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"An error occurred during conversion: {str(e)}"
+        )
+
+
+@router.post("/convert/markdown")
+async def convert_markdown_body_to_docx(
+    request: Request,
+    filename: Optional[str] = Query(None),
+    stream: bool = Query(False),
+    template: Optional[str] = Query(None),
+    x_filename: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    x_priority: Optional[str] = Header(None)
+):
+    """
+    Convert a raw markdown request body to DOCX
+    
+    Unlike /convert/text, the markdown is sent as is (Content-Type
+    text/markdown or text/plain, UTF-8), without JSON escaping, and is
+    decoded as it streams in.
+    
+    Query parameters:
+    - filename: Optional custom filename (without extension); the
+      X-Filename header (percent-encoded if not ASCII) works too
+    - stream: Return the DOCX file itself (same as sending an Accept header
+      with the DOCX media type)
+    - template: Optional name of a registered reference DOCX template
+    
+    Headers:
+    - X-Priority: Optional "interactive" or "bulk" lane for the conversion;
+      by default small documents run in the interactive lane
+    
+    Returns:
+    - download_url: URL to download the converted DOCX file
+    - filename: Name of the converted file
+    """
+    if not check_pandoc_installed():
+        raise HTTPException(
+            status_code=500,
+            detail="Pandoc is not installed on the server. Please contact the administrator."
+        )
     
-    md_file_path = MD_DIR / md_filename
-    docx_file_path = DOCX_DIR / docx_filename
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in MARKDOWN_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Content-Type must be one of: {', '.join(MARKDOWN_MEDIA_TYPES)}"
+        )
+    
+    reference_template = await _resolve_template(template)
+    lane = _priority_lane(x_priority)
+    
+    markdown_content = await _decode_markdown_chunks(request.stream(), "Request body")
+    if not markdown_content.strip():
+        raise HTTPException(status_code=400, detail="Markdown content is required")
+    
+    # Generate unique filename
+    docx_filename = _unique_docx_filename(filename or (unquote(x_filename) if x_filename else None))
     
     try:
-        # Preprocess markdown content (fix LaTeX formulas, etc.)
-        processed_markdown = preprocess_markdown(request.markdown)
-        
-        # Write processed markdown content to file
-        with open(md_file_path, "w", encoding="utf-8") as f:
-            f.write(processed_markdown)
-        
-        # Convert to DOCX
-        success = convert_md_to_docx(md_file_path, docx_file_path)
-        
-        if not success:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to convert markdown to DOCX. Please check your markdown syntax."
-            )
-        
-        # Return download URL
-        return {
-            "success": True,
-            "message": "Conversion successful",
-            "download_url": f"/download/{docx_filename}",
-            "filename": docx_filename
-        }
+        return await _convert_and_save(
+            markdown_content,
+            docx_filename,
+            _wants_docx(stream, accept),
+            reference_template,
+            lane,
+            request
+        )
     
     except HTTPException:
         raise
@@ -96,13 +455,29 @@ async def convert_text_to_docx(request: MarkdownTextRequest):
 
 
 @router.post("/convert/upload")
-async def convert_upload_to_docx(file: UploadFile = File(...)):
+async def convert_upload_to_docx(
+    request: Request,
+    file: UploadFile = File(...),
+    stream: bool = Query(False),
+    template: Optional[str] = Query(None),
+    accept: Optional[str] = Header(None),
+    x_priority: Optional[str] = Header(None)
+):
     """
     Upload a markdown file and convert to DOCX
     
     Form data:
     - file: The markdown file to upload
     
+    Query parameters:
+    - stream: Return the DOCX file itself (same as sending an Accept header
+      with the DOCX media type)
+    - template: Optional name of a registered reference DOCX template
+    
+    Headers:
+    - X-Priority: Optional "interactive" or "bulk" lane for the conversion;
+      uploads run in the bulk lane by default
+    
     Returns:
     - download_url: URL to download the converted DOCX file
     - filename: Name of the converted file
@@ -123,44 +498,27 @@ async def convert_upload_to_docx(file: UploadFile = File(...)):
             detail="Only markdown files (.md) are supported"
         )
     
+    reference_template = await _resolve_template(template)
+    lane = _priority_lane(x_priority, LANE_BULK)
+    
     # Generate unique filename
     unique_id = str(uuid.uuid4())
     base_filename = file.filename.replace(".md", "")
     
-    md_filename = f"{base_filename}_{unique_id[:8]}.md"
     docx_filename = f"{base_filename}_{unique_id[:8]}.docx"
     
-    md_file_path = MD_DIR / md_filename
-    docx_file_path = DOCX_DIR / docx_filename
-    
     try:
         # Read uploaded file content
-        content = await file.read()
-        markdown_content = content.decode('utf-8')
+        markdown_content = await _read_markdown_upload(file)
         
-        # Preprocess markdown content (fix LaTeX formulas, etc.)
-        processed_markdown = preprocess_markdown(markdown_content)
-        
-        # Save processed file
-        with open(md_file_path, "w", encoding="utf-8") as f:
-            f.write(processed_markdown)
-        
-        # Convert to DOCX
-        success = convert_md_to_docx(md_file_path, docx_file_path)
-        
-        if not success:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to convert markdown to DOCX. Please check your markdown syntax."
-            )
-        
-        # Return download URL
-        return {
-            "success": True,
-            "message": "Conversion successful",
-            "download_url": f"/download/{docx_filename}",
-            "filename": docx_filename
-        }
+        return await _convert_and_save(
+            markdown_content,
+            docx_filename,
+            _wants_docx(stream, accept),
+            reference_template,
+            lane,
+            request
+        )
     
     except HTTPException:
         raise
@@ -171,6 +529,222 @@ async def convert_upload_to_docx(file: UploadFile = File(...)):
         )
 
 
+class _BatchItem:
+    """One document of a batch request, or the reason it was rejected"""
+    
+    def __init__(
+        self,
+        index: int,
+        name: str,
+        markdown: Optional[str] = None,
+        error: Optional[str] = None,
+        template: Optional[TemplateInfo] = None
+    ):
+        self.index = index
+        self.name = name
+        self.markdown = markdown
+        self.error = error
+        self.template = template
+
+
+def _batch_name(filename: Optional[str], index: int) -> str:
+    """Base name used for a batch document inside the ZIP"""
+    # Never let client supplied names create directories in the archive
+    name = Path(filename or "").name
+    name = name.replace(".md", "").replace(".docx", "")
+    return name or f"document_{index + 1}"
+
+
+async def _read_batch_json(request: Request, template: Optional[TemplateInfo]) -> List[_BatchItem]:
+    """Parse a JSON array of MarkdownTextRequest items"""
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be a JSON array of documents")
+    
+    try:
+        documents = _batch_adapter.validate_python(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(), body=body)
+    
+    items = []
+    templates = {}
+    for index, document in enumerate(documents):
+        item = _BatchItem(index, _batch_name(document.filename, index), document.markdown, template=template)
+        if not document.markdown or not document.markdown.strip():
+            item.error = "Markdown content is required"
+        elif document.template:
+            if document.template not in templates:
+                templates[document.template] = await asyncio.to_thread(template_registry.get, document.template)
+            item.template = templates[document.template]
+            if item.template is None:
+                item.error = f"Unknown template: {document.template}"
+        items.append(item)
+    return items
+
+
+async def _read_batch_uploads(request: Request, template: Optional[TemplateInfo]) -> List[_BatchItem]:
+    """Read the .md files sent in the multipart "files" field"""
+    form = await request.form(max_files=BATCH_MAX_ITEMS, max_fields=BATCH_MAX_ITEMS)
+    
+    items = []
+    for index, upload in enumerate(form.getlist("files")):
+        if isinstance(upload, str):
+            items.append(_BatchItem(index, f"document_{index + 1}", error="Expected a file upload"))
+            continue
+        
+        item = _BatchItem(index, _batch_name(upload.filename, index), template=template)
+        if not upload.filename or not upload.filename.endswith(".md"):
+            item.error = "Only markdown files (.md) are supported"
+            items.append(item)
+            continue
+        
+        # Each document is held to the single upload limit; one byte more
+        # is enough to tell an oversized file apart
+        if MAX_UPLOAD_BYTES > 0:
+            data = await upload.read(MAX_UPLOAD_BYTES + 1)
+        else:
+            data = await upload.read()
+        if MAX_UPLOAD_BYTES > 0 and len(data) > MAX_UPLOAD_BYTES:
+            item.error = f"File is too large. The maximum size is {MAX_UPLOAD_BYTES} bytes."
+        else:
+            try:
+                item.markdown = data.decode('utf-8')
+            except UnicodeDecodeError:
+                conversion_failures.inc(cause="decode_error")
+                item.error = "File is not valid UTF-8"
+            if item.markdown is not None and not item.markdown.strip():
+                item.error = "Markdown content is required"
+        items.append(item)
+    return items
+
+
+async def _convert_batch_item(item: _BatchItem, semaphore: asyncio.Semaphore, lane: str):
+    """Convert one batch document, recording failures on the item"""
+    async with semaphore:
+        try:
+            docx_bytes = await render_docx(item.markdown, item.template, lane, admission_controller)
+        except PreprocessingTimeout:
+            item.error = "The markdown took too long to process. Please split it into smaller documents."
+            return item, None
+        except PreprocessingCrashed:
+            item.error = "The markdown crashed the preprocessing worker. Please split it into smaller documents."
+            return item, None
+        except AdmissionRejected:
+            item.error = BUSY_DETAIL
+            return item, None
+        except Exception as e:
+            item.error = f"An error occurred during conversion: {str(e)}"
+            return item, None
+    
+    if docx_bytes is None:
+        item.error = "Failed to convert markdown to DOCX. Please check your markdown syntax."
+    return item, docx_bytes
+
+
+async def _stream_batch(items: List[_BatchItem], lane: str):
+    """
+    Convert batch documents in parallel and yield a ZIP as they finish
+    
+    Each DOCX is sent as soon as its conversion completes. The archive ends
+    with manifest.json describing the outcome of every document, so
+    individual failures do not fail the whole batch.
+    """
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(_convert_batch_item(item, semaphore, lane))
+        for item in items if item.error is None
+    ]
+    archive = ZipStream()
+    results = {}
+    
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item, docx_bytes = await next_done
+            if docx_bytes is None:
+                continue
+            entry = archive.unique_name(f"{item.name}.docx")
+            results[item.index] = entry
+            yield archive.add(entry, docx_bytes)
+    finally:
+        # Stop outstanding conversions if the client went away, and wait for
+        # them so none outlives the response
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    manifest = {
+        "total": len(items),
+        "succeeded": len(results),
+        "failed": len(items) - len(results),
+        "items": [
+            {
+                "index": item.index,
+                "name": item.name,
+                "success": item.index in results,
+                "filename": results.get(item.index),
+                "error": item.error
+            }
+            for item in items
+        ]
+    }
+    yield archive.add("manifest.json", json.dumps(manifest, indent=2).encode("utf-8"))
+    yield archive.close()
+
+
+@router.post("/convert/batch")
+async def convert_batch_to_zip(request: Request, template: Optional[str] = Query(None)):
+    """
+    Convert many markdown documents and return the DOCX files as a ZIP
+    
+    Request body, either:
+    - JSON: an array of {"markdown": ..., "filename": ..., "template": ...} objects
+    - multipart/form-data: .md files in the "files" field
+    
+    Query parameters:
+    - template: Optional reference DOCX template for every document (JSON
+      documents may pick their own)
+    
+    Headers:
+    - X-Priority: Optional "interactive" or "bulk" lane for the conversions;
+      batches run in the bulk lane by default
+    
+    Documents are converted in parallel (up to BATCH_MAX_CONCURRENCY at a
+    time) and streamed into the ZIP as they finish. The archive ends with
+    manifest.json listing the result or error of every document.
+    """
+    if not check_pandoc_installed():
+        raise HTTPException(
+            status_code=500,
+            detail="Pandoc is not installed on the server. Please contact the administrator."
+        )
+    
+    reference_template = await _resolve_template(template)
+    lane = _priority_lane(request.headers.get("x-priority"), LANE_BULK)
+    
+    content_type = request.headers.get("content-type", "")
+    with stage_seconds.time(stage="parse"):
+        if content_type.startswith("multipart/form-data"):
+            items = await _read_batch_uploads(request, reference_template)
+        else:
+            items = await _read_batch_json(request, reference_template)
+    
+    if not items:
+        raise HTTPException(status_code=400, detail="At least one document is required")
+    
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {BATCH_MAX_ITEMS} documents"
+        )
+    
+    return StreamingResponse(
+        _stream_batch(items, lane),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="converted.zip"'}
+    )
+
+
 @router.get("/download/{filename}")
 async def download_file(filename: str):
     """
@@ -187,10 +761,10 @@ async def download_file(filename: str):
     if not file_path.is_file():
         raise HTTPException(status_code=400, detail="Invalid file")
     
-    return FileResponse(
+    return _TimedFileResponse(
         path=file_path,
         filename=filename,
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        media_type=DOCX_MEDIA_TYPE
     )
 
 
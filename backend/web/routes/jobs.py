@@ -0,0 +1,74 @@
+"""
+Job API routes for asynchronous markdown to DOCX conversion
+"""
+from fastapi import APIRouter, HTTPException
+
+from utils import JobQueueFull, check_pandoc_installed, job_manager
+
+from .conversion import MarkdownTextRequest, _resolve_template, _unique_docx_filename
+
+router = APIRouter()
+
+
+def _job_payload(job) -> dict:
+    """Job status with the URLs a client needs next"""
+    payload = job.to_dict()
+    payload["status_url"] = f"/jobs/{job.id}"
+    payload["download_url"] = f"/download/{job.filename}" if job.status == "done" else None
+    return payload
+
+
+@router.post("/jobs", status_code=202)
+async def create_job(request: MarkdownTextRequest):
+    """
+    Queue a markdown to DOCX conversion
+    
+    Request body:
+    - markdown: The markdown text content
+    - filename: Optional custom filename (without extension)
+    - template: Optional name of a registered reference DOCX template
+    
+    Returns immediately with the job id. Poll GET /jobs/{job_id} until the
+    status is "done" (then fetch download_url) or "failed".
+    """
+    if not check_pandoc_installed():
+        raise HTTPException(
+            status_code=500,
+            detail="Pandoc is not installed on the server. Please contact the administrator."
+        )
+    
+    if not request.markdown or not request.markdown.strip():
+        raise HTTPException(status_code=400, detail="Markdown content is required")
+    
+    template = await _resolve_template(request.template)
+    
+    try:
+        job = job_manager.submit(request.markdown, _unique_docx_filename(request.filename), template)
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many conversions are queued. Please try again later."
+        )
+    
+    return _job_payload(job)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Report the status of a conversion job
+    
+    Path parameter:
+    - job_id: Id returned by POST /jobs
+    
+    Returns:
+    - status: queued, running, done or failed
+    - timings: created_at, started_at, finished_at, queued_seconds, run_seconds
+    - download_url: Set once the job is done
+    - error: Set if the job failed
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return _job_payload(job)
@@ -0,0 +1,79 @@
+"""
+Template API routes for managing reference DOCX templates
+"""
+import asyncio
+
+from fastapi import APIRouter, HTTPException, UploadFile, File
+
+from utils import TemplateError, template_registry, TEMPLATE_MAX_BYTES
+
+router = APIRouter()
+
+
+@router.get("/templates")
+async def list_templates():
+    """
+    List the registered reference DOCX templates
+    
+    Returns:
+    - templates: Name, content hash, size and style names of each template
+    """
+    templates = await asyncio.to_thread(template_registry.list)
+    return {"templates": [template.to_dict() for template in templates]}
+
+
+@router.get("/templates/{name}")
+async def get_template(name: str):
+    """
+    Describe one reference DOCX template
+    
+    Path parameter:
+    - name: Template name
+    """
+    template = await asyncio.to_thread(template_registry.get, name)
+    if template is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    return template.to_dict()
+
+
+@router.put("/templates/{name}")
+async def register_template(name: str, file: UploadFile = File(...)):
+    """
+    Register (or replace) a reference DOCX template
+    
+    Path parameter:
+    - name: Template name (letters, digits, "-" and "_")
+    
+    Form data:
+    - file: The reference .docx whose styles converted documents use
+    
+    Select the template with "template" on /convert/text, /convert/upload,
+    /convert/batch and /jobs.
+    """
+    data = await file.read(TEMPLATE_MAX_BYTES + 1 if TEMPLATE_MAX_BYTES > 0 else -1)
+    if TEMPLATE_MAX_BYTES > 0 and len(data) > TEMPLATE_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Template is too large. The maximum size is {TEMPLATE_MAX_BYTES} bytes."
+        )
+    
+    try:
+        # Hashing, parsing the styles and writing the file stay off the event loop
+        template = await asyncio.to_thread(template_registry.register, name, data)
+    except TemplateError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return template.to_dict()
+
+
+@router.delete("/templates/{name}")
+async def delete_template(name: str):
+    """
+    Delete a reference DOCX template
+    
+    Path parameter:
+    - name: Template name
+    """
+    if not await asyncio.to_thread(template_registry.remove, name):
+        raise HTTPException(status_code=404, detail="Template not found")
+    return {"success": True, "name": name}